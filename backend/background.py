@@ -0,0 +1,74 @@
+"""Периодические фоновые задачи воркера
+
+Задачи, которые должны выполняться в одном месте (пересчёт рейтингов,
+сверка статистики), берут аренду в таблице job_leases: строка задачи
+хранит воркера-владельца и срок аренды. Владелец продлевает аренду при
+каждом запуске, остальные воркеры пропускают запуск, пока аренда не
+истечёт (владелец остановлен или завис). Срок - LEASE_PERIODS интервалов
+задачи, поэтому задача дольше интервала может выполниться ещё на одном
+воркере; время берётся из часов воркеров.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import JobLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_PERIODS = 2
+
+_TOKEN = secrets.token_hex(4)
+
+
+def _owner() -> str:
+    # pid читается при каждом вызове: после fork у воркера свой
+    return f"{socket.gethostname()}:{os.getpid()}:{_TOKEN}"
+
+
+def acquire_lease(name: str, duration: float) -> bool:
+    """Взять или продлить аренду задачи name на duration секунд"""
+    now = datetime.utcnow()
+    owner = _owner()
+    expires_at = now + timedelta(seconds=duration)
+    db = SessionLocal()
+    try:
+        taken = db.query(JobLease).filter(
+            JobLease.name == name, or_(JobLease.owner == owner, JobLease.expires_at < now)
+        ).update({JobLease.owner: owner, JobLease.expires_at: expires_at}, synchronize_session=False)
+        if not taken:
+            db.add(JobLease(name=name, owner=owner, expires_at=expires_at))
+            try:
+                db.flush()
+            except IntegrityError:
+                # Аренда действует и принадлежит другому воркеру
+                db.rollback()
+                return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+async def run_periodically(interval: float, job, error_message: str, lease: str = None):
+    """Выполнять job в пуле потоков раз в interval секунд (0 - не выполнять)
+
+    С lease job выполняет только воркер, владеющий арендой с этим именем.
+    Ошибка пишется в лог с error_message и не останавливает задачу.
+    """
+    while interval > 0:
+        await asyncio.sleep(interval)
+        try:
+            if lease is None or await run_in_threadpool(acquire_lease, lease, LEASE_PERIODS * interval):
+                await run_in_threadpool(job)
+        except Exception:
+            logger.exception(error_message)
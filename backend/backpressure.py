@@ -0,0 +1,65 @@
+"""Ограничение числа одновременных запросов воркера
+
+Воркер обрабатывает не больше MAX_CONCURRENT_REQUESTS запросов сразу.
+Лишние запросы не ждут в очереди процесса (где они копили бы задержку
+и память), а сразу получают 503 с Retry-After: клиент или балансировщик
+повторит запрос, а остальные воркеры продолжат принимать соединения
+из общего сокета (serve.py).
+
+Проверки здоровья, метрики и потоки SSE не ограничиваются: число
+подписчиков SSE ограничивает EVENTS_MAX_SUBSCRIBERS.
+"""
+
+import os
+
+import fast_json
+
+# Одновременных запросов на воркер (0 - без ограничения)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "0"))
+# Значение заголовка Retry-After в ответе 503, секунд
+RETRY_AFTER = int(os.getenv("OVERLOAD_RETRY_AFTER", "1"))
+
+EXEMPT_PATHS = {"/health", "/ready", "/metrics"}
+OVERLOAD_BODY = fast_json.dumps({"detail": "Сервер перегружен, повторите запрос позже"})
+
+
+def _exempt(path: str) -> bool:
+    return path in EXEMPT_PATHS or path.endswith("/stream")
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware: 503 при превышении числа одновременных запросов
+
+    Счётчик без блокировок: воркер обрабатывает запросы в одном event loop.
+    """
+
+    def __init__(self, app, limit: int = MAX_CONCURRENT_REQUESTS):
+        self.app = app
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limit or _exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        if self.active >= self.limit:
+            self.rejected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(OVERLOAD_BODY)).encode()),
+                    (b"retry-after", str(RETRY_AFTER).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": OVERLOAD_BODY})
+            return
+
+        self.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.active -= 1
@@ -0,0 +1,14 @@
+"""Бенчмарки производительности backend
+
+    datagen     - синтетические данные 1k/100k/1m поверх init_db.py
+    workload    - смешанная нагрузка на все маршруты через uvicorn
+    micro       - сериализация и запросы в процессе
+    serialization - response_model против fast_json
+    search      - ILIKE против полнотекстового индекса
+    async_stack - синхронный и асинхронный стек БД
+    startup     - холодный старт: импорт main и запуск воркера
+    scaling     - RPS при 1..N воркерах serve.py
+
+workload и micro сохраняют результаты в JSON (--output) и сравнивают
+их с базовым прогоном (--baseline, --max-regression).
+"""
@@ -0,0 +1,60 @@
+"""Сравнение синхронного и асинхронного стека БД под нагрузкой
+
+Запуск из каталога backend:
+    python -m benchmarks.async_stack --concurrency 500 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load import BACKEND_DIR, run_load, start_server
+
+READ_REQUESTS = [
+    ("GET", "/api/projects", None),
+    ("GET", "/api/projects/1", None),
+    ("GET", "/api/projects?sort_by=new&limit=20", None),
+    ("GET", "/api/statistics", None),
+]
+
+# Кэш ответов отключён, чтобы измерять именно работу с БД
+NO_CACHE = {f"CACHE_TTL_{route}": "0" for route in ("FEATURED", "CATEGORIES", "PROJECT", "STATISTICS")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_async.db")
+    subprocess.run(
+        [sys.executable, "init_db.py"], cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}"},
+    )
+
+    modes = {
+        "sync": f"sqlite:///{path}",
+        "async": f"sqlite+aiosqlite:///{path}",
+    }
+    print(f"{'mode':<8}{'rps':>10}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}{'errors':>8}")
+    for mode, url in modes.items():
+        server = start_server({"DATABASE_URL": url, **NO_CACHE}, args.port)
+        try:
+            report = asyncio.run(run_load(
+                f"http://127.0.0.1:{args.port}", READ_REQUESTS, args.concurrency, args.duration
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+        total = report["total"]
+        print(f"{mode:<8}{total['rps']:>10}{total['p50']:>10}{total['p95']:>10}"
+              f"{total['p99']:>10}{total['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Генератор синтетических данных для бенчмарков
+
+Создаёт схему и демо данные через init_db.py, затем добавляет пачками
+пользователей, проекты, инвестиции и отзывы. Суммы и число инвесторов
+проектов согласованы с инвестициями, статистика, рейтинги, итоги
+инвестиций и оценки пересчитываются в конце.
+
+Запуск из каталога backend (база берётся из DATABASE_URL):
+    python -m benchmarks.datagen --size 100k
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from benchmarks.search import WORDS
+
+# Число проектов и инвестиций для каждого размера набора
+SIZES = {"1k": 1000, "100k": 100000, "1m": 1000000}
+CHUNK_SIZE = 10000
+SEED = 42
+
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(engine, table, rows) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        with engine.begin() as connection:
+            connection.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def _new_ids(engine, table, after: int) -> list:
+    with engine.connect() as connection:
+        return [
+            row[0] for row in connection.execute(
+                select(table.c.id).where(table.c.id > after).order_by(table.c.id)
+            )
+        ]
+
+
+def _max_id(engine, table) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.max(table.c.id))).scalar() or 0
+
+
+def _investment_plan(rnd: random.Random, projects: int, investments: int):
+    """(индекс проекта, сумма) для каждой инвестиции; популярность неравномерна"""
+    for _ in range(investments):
+        yield min(int(rnd.paretovariate(1.2)) - 1, projects - 1), rnd.choice((100, 500, 1000, 5000))
+
+
+def generate(size: str, seed: int = SEED) -> dict:
+    import init_db  # noqa: F401 - схема, поисковый индекс и демо данные
+    from database import engine, SessionLocal
+    from models import User, Category, Project, Investment, Review
+    import platform_stats
+    import ranking
+    import rollups
+    import ratings
+    import lifecycle
+
+    projects_count = SIZES[size]
+    users_count = max(100, projects_count // 10)
+    reviews_count = projects_count // 10
+    now = datetime.utcnow()
+    rnd = random.Random(seed)
+
+    category_ids = _new_ids(engine, Category.__table__, 0)
+
+    users_table = User.__table__
+    base = _max_id(engine, users_table)
+    _insert(engine, users_table, (
+        {
+            "username": f"bench_{base + i}",
+            "email": f"bench_{base + i}@example.com",
+            "full_name": f"Пользователь {base + i}",
+            "created_at": now,
+        }
+        for i in range(users_count)
+    ))
+    user_ids = _new_ids(engine, users_table, base)
+
+    # Суммы проектов считаются заранее по тому же плану, что и инвестиции
+    raised = [0.0] * projects_count
+    backers = [0] * projects_count
+    for index, amount in _investment_plan(random.Random(seed), projects_count, projects_count):
+        raised[index] += amount
+        backers[index] += 1
+
+    projects_table = Project.__table__
+    base = _max_id(engine, projects_table)
+    _insert(engine, projects_table, (
+        {
+            "title": " ".join(rnd.choices(WORDS, k=4)).capitalize(),
+            "description": " ".join(rnd.choices(WORDS, k=30)),
+            "goal": rnd.choice((100000, 500000, 1000000)),
+            "raised_amount": raised[i],
+            "backers_count": backers[i],
+            # Часть проектов уже завершена
+            "deadline": now + timedelta(days=rnd.randint(-30, 90)),
+            "created_at": now - timedelta(minutes=projects_count - i),
+            "updated_at": now,
+            "category_id": rnd.choice(category_ids),
+            "creator_id": rnd.choice(user_ids),
+        }
+        for i in range(projects_count)
+    ))
+    project_ids = _new_ids(engine, projects_table, base)
+
+    investments = _insert(engine, Investment.__table__, (
+        {
+            "amount": amount,
+            "project_id": project_ids[index],
+            "user_id": rnd.choice(user_ids),
+            "created_at": now,
+        }
+        for index, amount in _investment_plan(random.Random(seed), projects_count, projects_count)
+    ))
+    reviews = _insert(engine, Review.__table__, (
+        {
+            "text": " ".join(rnd.choices(WORDS, k=8)),
+            "rating": rnd.randint(1, 5),
+            "project_id": rnd.choice(project_ids),
+            "user_id": rnd.choice(user_ids),
+            "created_at": now,
+        }
+        for _ in range(reviews_count)
+    ))
+
+    db = SessionLocal()
+    try:
+        platform_stats.reconcile(db)
+        ranking.rebuild(db)
+        rollups.backfill(db)
+        ratings.reconcile(db)
+        # Проекты с прошедшим дедлайном - funded/expired
+        lifecycle.transition_due(db, datetime.utcnow())
+    finally:
+        db.close()
+
+    return {
+        "users": len(user_ids),
+        "projects": len(project_ids),
+        "investments": investments,
+        "reviews": reviews,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.size, args.seed)
+    print(f"✓ Добавлено: {counts} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
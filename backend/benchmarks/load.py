@@ -0,0 +1,100 @@
+"""Асинхронный генератор нагрузки на HTTP API (нужен пакет httpx)"""
+
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    """RPS и перцентили задержки в миллисекундах"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50": round(percentile(latencies, 50) * 1000, 2),
+        "p95": round(percentile(latencies, 95) * 1000, 2),
+        "p99": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_load(base_url: str, requests: list, concurrency: int, duration: float) -> dict:
+    """Выполнять запросы (method, path, json[, label]) в concurrency соединений duration секунд
+
+    path и json могут быть функциями без аргументов - тогда они вызываются
+    перед каждым запросом (уникальные имена, случайные проекты).
+    Возвращает сводку по каждой метке (по умолчанию - путь) и общую под ключом "total".
+    """
+    latencies = {}
+    errors = {}
+    plan = itertools.cycle(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                method, path, body, *label = next(plan)
+                label = label[0] if label else path
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        method,
+                        path() if callable(path) else path,
+                        json=body() if callable(body) else body,
+                    )
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.setdefault(label, []).append(time.perf_counter() - started)
+                else:
+                    errors[label] = errors.get(label, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        label: summarize(latencies.get(label, []), errors.get(label, 0), elapsed)
+        for label in sorted(set(latencies) | set(errors))
+    }
+    report["total"] = summarize(
+        [v for values in latencies.values() for v in values], sum(errors.values()), elapsed
+    )
+    return report
+
+
+def start_server(env: dict, port: int, extra_args: list = None,
+                 command: list = None) -> subprocess.Popen:
+    """Запустить uvicorn с main:app (или command, например serve.py) и дождаться /health"""
+    process = subprocess.Popen(
+        [*(command or [sys.executable, "-m", "uvicorn", "main:app"]), "--port", str(port),
+         "--log-level", "warning", *(extra_args or [])],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Сервер не запустился")
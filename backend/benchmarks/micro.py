@@ -0,0 +1,112 @@
+"""Микробенчмарки слоя сериализации и запросов (в процессе, без HTTP)
+
+Запуск из каталога backend (база берётся из DATABASE_URL, иначе
+создаётся временная через benchmarks.datagen):
+    python -m benchmarks.micro --size 100k --output micro.json
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import SIZES
+from benchmarks.load import percentile
+from benchmarks.report import compare, print_table, save_results
+
+
+def measure(fn, repeat: int) -> dict:
+    """Операций в секунду и перцентили одного вызова fn в миллисекундах"""
+    fn()  # прогрев
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    return {
+        "ops": round(repeat / total, 1) if total else 0.0,
+        "p50": round(percentile(timings, 50) * 1000, 3),
+        "p95": round(percentile(timings, 95) * 1000, 3),
+        "p99": round(percentile(timings, 99) * 1000, 3),
+    }
+
+
+def run(repeat: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import desc
+    from sqlalchemy.orm import joinedload
+
+    from database import SessionLocal
+    from models import Project, Investment
+    from schemas import ProjectResponse
+    from search_index import apply_search
+    import platform_stats
+    import rollups
+
+    db = SessionLocal()
+    try:
+        page = db.query(Project).order_by(desc(Project.hot_score), desc(Project.id)).limit(100).all()
+        project_id = page[0].id
+        category_id = page[0].category_id
+        models = [ProjectResponse.model_validate(p) for p in page]
+
+        benchmarks = {
+            # Сериализация 100 проектов так же, как её выполняет FastAPI
+            "serialize: model_validate x100": lambda: [ProjectResponse.model_validate(p) for p in page],
+            "serialize: jsonable_encoder x100": lambda: jsonable_encoder(models),
+            "serialize: model_dump_json x100": lambda: [m.model_dump_json() for m in models],
+            "query: projects popular": lambda: db.query(Project).order_by(
+                desc(Project.hot_score), desc(Project.id)
+            ).limit(10).all(),
+            "query: projects popular in category": lambda: db.query(Project).filter(
+                Project.category_id == category_id
+            ).order_by(desc(Project.hot_score), desc(Project.id)).limit(10).all(),
+            "query: projects new": lambda: db.query(Project).order_by(
+                desc(Project.created_at), desc(Project.id)
+            ).limit(10).all(),
+            "query: project by id": lambda: db.get(Project, project_id, populate_existing=True),
+            "query: project details": lambda: (
+                db.query(Project).options(joinedload(Project.category), joinedload(Project.creator))
+                .filter(Project.id == project_id).populate_existing().one(),
+                db.query(Investment).filter(Investment.project_id == project_id)
+                .order_by(desc(Investment.created_at), desc(Investment.id)).limit(5).all(),
+            ),
+            "query: investments by project": lambda: db.query(Investment).filter(
+                Investment.project_id == project_id
+            ).order_by(desc(Investment.created_at), desc(Investment.id)).limit(10).all(),
+            "query: funding history by day": lambda: rollups.read_series(db, project_id, "day"),
+            "query: search": lambda: apply_search(db.query(Project), "экологичная", ranked=True).limit(20).all(),
+            "query: statistics": lambda: platform_stats.read_statistics(db),
+        }
+        return {name: measure(fn, repeat) for name, fn in benchmarks.items()}
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Допустимое ухудшение метрики, %%")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_micro.db")
+        from benchmarks.datagen import generate
+        generate(args.size)
+
+    results = run(args.repeat)
+    print_table(results)
+    if args.output:
+        save_results(args.output, "micro", results, {"size": args.size, "repeat": args.repeat})
+    if args.baseline and not compare(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
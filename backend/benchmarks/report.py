@@ -0,0 +1,56 @@
+"""Сохранение результатов бенчмарков и сравнение с базовым прогоном"""
+
+import json
+import platform
+import sys
+from datetime import datetime
+
+# Метрики, для которых рост - это регрессия (для rps и ops - наоборот)
+LOWER_IS_BETTER = ("p50", "p95", "p99")
+HIGHER_IS_BETTER = ("rps", "ops")
+
+
+def save_results(path: str, kind: str, results: dict, params: dict):
+    """Записать результаты в JSON вместе с параметрами прогона"""
+    document = {
+        "kind": kind,
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def print_table(results: dict):
+    rate = "ops" if any("ops" in row for row in results.values()) else "rps"
+    print(f"{'name':<44}{rate:>10}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}{'errors':>8}")
+    for name, row in results.items():
+        print(f"{name:<44}{row.get(rate, 0):>10}{row['p50']:>10}{row['p95']:>10}{row['p99']:>10}"
+              f"{row.get('errors', 0):>8}")
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> bool:
+    """Сравнить с базовым прогоном; False, если есть регрессия больше max_regression %"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    ok = True
+    print(f"\nСравнение с {baseline_path} (допустимо {max_regression}%):")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, value in row.items():
+            if metric not in LOWER_IS_BETTER + HIGHER_IS_BETTER or not base.get(metric):
+                continue
+            change = (value - base[metric]) / base[metric] * 100
+            regression = change if metric in LOWER_IS_BETTER else -change
+            if regression > max_regression:
+                ok = False
+                print(f"❌ {name} {metric}: {base[metric]} → {value} ({change:+.1f}%)")
+    if ok:
+        print("✓ Регрессий нет")
+    return ok
@@ -0,0 +1,110 @@
+"""Масштабирование RPS по числу воркеров serve.py
+
+Для каждого числа воркеров запускает `python serve.py --workers N` на
+синтетической базе и нагружает читающими маршрутами смешанной нагрузки
+(benchmarks.workload без записей: SQLite допускает одного писателя, и
+записи упирались бы в блокировку БД, а не в процессор воркеров).
+Нагрузку дают несколько процессов (--clients), чтобы генератор сам не
+стал узким местом. Эффективность - ускорение относительно одного
+воркера, делённое на число воркеров.
+
+Запуск из каталога backend:
+    python -m benchmarks.scaling --size 100k --workers 1,2,4,8 --output scaling.json
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.async_stack import NO_CACHE
+from benchmarks.datagen import SIZES
+from benchmarks.load import BACKEND_DIR, run_load, start_server
+from benchmarks.report import save_results
+from benchmarks.workload import build_plan, discover_ids
+
+WARMUP_SECONDS = 2
+
+
+def _client(base_url: str, seed: int, concurrency: int, duration: float) -> dict:
+    """Процесс нагрузки: читающая часть плана workload"""
+    plan = [
+        request for request in build_plan(*discover_ids(base_url), seed=seed)
+        if request[0] == "GET"
+    ]
+    return asyncio.run(run_load(base_url, plan, concurrency, duration))["total"]
+
+
+def measure(base_url: str, clients: int, concurrency: int, duration: float) -> dict:
+    """Суммарный RPS процессов нагрузки; p50 - медиана, p99 - максимум по процессам"""
+    with ProcessPoolExecutor(clients) as pool:
+        list(pool.map(_client, [base_url] * clients, range(clients),
+                      [max(1, concurrency // clients)] * clients, [WARMUP_SECONDS] * clients))
+        totals = list(pool.map(_client, [base_url] * clients, range(clients),
+                               [max(1, concurrency // clients)] * clients, [duration] * clients))
+    return {
+        "requests": sum(total["requests"] for total in totals),
+        "errors": sum(total["errors"] for total in totals),
+        "rps": round(sum(total["rps"] for total in totals), 1),
+        "p50": round(statistics.median(total["p50"] for total in totals), 2),
+        "p99": max(total["p99"] for total in totals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--workers", default=None,
+                        help="Числа воркеров через запятую (по умолчанию 1, 2, 4 ... до числа ядер)")
+    parser.add_argument("--clients", type=int, default=4, help="Процессов генератора нагрузки")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        cores = os.cpu_count() or 1
+        counts = [count for count in (1, 2, 4, 8, 16, 32, 64) if count < cores] + [cores]
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_scaling.db")
+    env = {"DATABASE_URL": f"sqlite:///{path}", **NO_CACHE}
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.datagen", "--size", args.size],
+        cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL, env={**os.environ, **env},
+    )
+
+    results = {}
+    for count in counts:
+        server = start_server(env, args.port, ["--workers", str(count)],
+                              command=[sys.executable, "serve.py"])
+        try:
+            results[f"{count} workers"] = measure(
+                f"http://127.0.0.1:{args.port}", args.clients, args.concurrency, args.duration
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    base = next(iter(results.values()))["rps"]
+    print(f"{'workers':<12}{'rps':>10}{'speedup':>10}{'efficiency':>12}{'p50, ms':>10}{'p99, ms':>10}{'errors':>8}")
+    for count, row in zip(counts, results.values()):
+        row["speedup"] = round(row["rps"] / base, 2) if base else 0.0
+        row["efficiency"] = round(row["speedup"] / count * counts[0], 2)
+        print(f"{count:<12}{row['rps']:>10}{row['speedup']:>10}{row['efficiency']:>12}"
+              f"{row['p50']:>10}{row['p99']:>10}{row['errors']:>8}")
+    if args.output:
+        save_results(args.output, "scaling", results, {
+            "size": args.size, "clients": args.clients,
+            "concurrency": args.concurrency, "duration": args.duration,
+        })
+
+
+if __name__ == "__main__":
+    main()
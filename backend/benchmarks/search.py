@@ -0,0 +1,86 @@
+"""Сравнение задержек поиска: ILIKE против полнотекстового индекса
+
+Запуск из каталога backend:
+    python -m benchmarks.search --projects 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+WORDS = [
+    "экологичная", "упаковка", "приложение", "обучение", "языков", "искусство",
+    "художников", "теплицы", "овощей", "реабилитация", "животных", "город",
+    "технологии", "образование", "платформа", "мастерская", "галерея", "ёлка",
+    "энергия", "солнечная", "школа", "детей", "музыка", "театр", "книга",
+    "velo", "smart", "garden", "robot", "coffee",
+]
+
+QUERIES = ["экологичной", "упаковки", "теплица", "школ", "елка", "smart", "музыкальный театр"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from database import SessionLocal
+    from models import Project, Category, User
+    from search_index import apply_search, _apply_ilike
+    import migrate
+
+    migrate.upgrade()
+
+    db = SessionLocal()
+    if db.query(Project).count() < args.projects:
+        rnd = random.Random(42)
+        category = Category(name="Бенчмарк")
+        user = User(username="bench", email="bench@example.com")
+        db.add_all([category, user])
+        db.commit()
+        deadline = datetime.utcnow() + timedelta(days=30)
+        rows = [
+            {
+                "title": " ".join(rnd.choices(WORDS, k=4)).capitalize(),
+                "description": " ".join(rnd.choices(WORDS, k=30)),
+                "goal": 100000, "raised_amount": 0, "backers_count": 0,
+                "deadline": deadline, "category_id": category.id, "creator_id": user.id,
+            }
+            for _ in range(args.projects)
+        ]
+        db.bulk_insert_mappings(Project, rows)
+        db.commit()
+
+    print(f"{'query':<22}{'path':<8}{'p50, ms':>10}{'p99, ms':>10}{'rows':>8}")
+    for q in QUERIES:
+        for name, build in (
+            ("ilike", lambda: _apply_ilike(db.query(Project), q)),
+            ("fts", lambda: apply_search(db.query(Project), q, ranked=True)),
+        ):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                rows = build().limit(20).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{q:<22}{name:<8}{statistics.median(timings):>10.2f}"
+                  f"{percentile(timings, 99):>10.2f}{len(rows):>8}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Сравнение сериализации списков проектов: response_model против fast_json
+
+Для каждого списка замеряет прежний путь (ORM-объекты ->
+ProjectResponse -> JSONResponse) и fast_json. Побайтное совпадение
+ответов проверяет tests/test_fast_json.py.
+
+Запуск из каталога backend (база берётся из DATABASE_URL, иначе
+создаётся временная через benchmarks.datagen):
+    python -m benchmarks.serialization --size 100k
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+from typing import List
+
+from benchmarks.datagen import SIZES
+from benchmarks.micro import measure
+from benchmarks.report import print_table, save_results
+
+
+def run(repeat: int) -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import desc
+
+    from database import SessionLocal
+    from models import Project
+    from schemas import ProjectResponse, SearchResponse
+    from search_index import apply_search
+    import fast_json
+
+    list_field = create_response_field(name="projects", type_=List[ProjectResponse])
+    search_field = create_response_field(name="search", type_=SearchResponse)
+
+    def old_path(field, content) -> bytes:
+        return JSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+    db = SessionLocal()
+    popular = (desc(Project.hot_score), desc(Project.id))
+    cases = {
+        "projects x100": (
+            list_field,
+            lambda: db.query(Project).order_by(*popular).limit(100).all(),
+            lambda rows: rows,
+            lambda: db.query(*fast_json.PROJECT_COLUMNS).order_by(*popular).limit(100).all(),
+            lambda rows: fast_json.project_list_response(rows).body,
+        ),
+        "projects x10": (
+            list_field,
+            lambda: db.query(Project).order_by(*popular).limit(10).all(),
+            lambda rows: rows,
+            lambda: db.query(*fast_json.PROJECT_COLUMNS).order_by(*popular).limit(10).all(),
+            lambda rows: fast_json.project_list_response(rows).body,
+        ),
+        "search x20": (
+            search_field,
+            lambda: apply_search(db.query(Project), "экологичная", ranked=True).limit(20).all(),
+            lambda rows: SearchResponse(query="экологичная", results=rows, total=len(rows)),
+            lambda: apply_search(
+                db.query(*fast_json.PROJECT_COLUMNS), "экологичная", ranked=True
+            ).limit(20).all(),
+            lambda rows: fast_json.dumps({
+                "query": "экологичная", "results": fast_json.project_rows(rows), "total": len(rows),
+            }),
+        ),
+    }
+
+    results = {}
+    try:
+        for name, (field, old_query, old_content, new_query, new_render) in cases.items():
+            # Каждый запрос API работает с новой сессией - очищаем identity map
+            def old_run():
+                db.expunge_all()
+                return old_path(field, old_content(old_query()))
+
+            results[f"{name}: response_model"] = measure(old_run, repeat)
+            results[f"{name}: fast_json"] = measure(lambda: new_render(new_query()), repeat)
+    finally:
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+        from benchmarks.datagen import generate
+        generate(args.size)
+
+    results = run(args.repeat)
+    print_table(results)
+    if args.output:
+        save_results(args.output, "serialization", results, {"size": args.size, "repeat": args.repeat})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Холодный старт: импорт main и запуск воркера uvicorn
+
+Каждый замер - в новом процессе:
+    import main    - время импорта и число SQL-запросов во время импорта;
+    worker health  - от запуска uvicorn до первого ответа 200 на /health;
+    worker request - от запуска uvicorn до первого ответа 200 на
+                     GET /api/projects?limit=1 (воркер готов обслуживать).
+
+Запуск из каталога backend (база берётся из DATABASE_URL, иначе
+создаётся временная через benchmarks.datagen):
+    python -m benchmarks.startup --repeat 10 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.datagen import SIZES
+from benchmarks.load import BACKEND_DIR
+from benchmarks.report import save_results
+
+IMPORT_SCRIPT = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+queries = []
+event.listen(Engine, "before_cursor_execute", lambda *args: queries.append(1))
+started = time.perf_counter()
+import main
+print(json.dumps({"seconds": time.perf_counter() - started, "queries": len(queries)}))
+"""
+
+POLL_INTERVAL = 0.005
+START_TIMEOUT = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "p50": round(statistics.median(ordered) * 1000, 1),
+        "min": round(ordered[0] * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+    }
+
+
+def measure_import(repeat: int) -> tuple:
+    seconds, queries = [], 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds.append(result["seconds"])
+        queries = result["queries"]
+    return seconds, queries
+
+
+def measure_worker(repeat: int) -> tuple:
+    health, request = [], []
+    for _ in range(repeat):
+        port = _free_port()
+        base = f"http://127.0.0.1:{port}"
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+        )
+        try:
+            marks = {}
+            with httpx.Client() as client:
+                while len(marks) < 2:
+                    if time.perf_counter() - started > START_TIMEOUT:
+                        raise RuntimeError("Воркер не запустился")
+                    for name, path in (("health", "/health"), ("request", "/api/projects?limit=1")):
+                        if name in marks:
+                            continue
+                        try:
+                            if client.get(base + path).status_code == 200:
+                                marks[name] = time.perf_counter() - started
+                        except httpx.HTTPError:
+                            pass
+                    time.sleep(POLL_INTERVAL)
+            health.append(marks["health"])
+            request.append(marks["request"])
+        finally:
+            process.terminate()
+            process.wait()
+    return health, request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_startup.db")
+        from benchmarks.datagen import generate
+        generate(args.size)
+
+    import_seconds, import_queries = measure_import(args.repeat)
+    health, request = measure_worker(args.repeat)
+    results = {
+        "import main": {**_summary(import_seconds), "queries": import_queries},
+        "worker health": _summary(health),
+        "worker request": _summary(request),
+    }
+
+    print(f"{'name':<20}{'p50, ms':>10}{'min, ms':>10}{'max, ms':>10}{'SQL':>6}")
+    for name, row in results.items():
+        print(f"{name:<20}{row['p50']:>10}{row['min']:>10}{row['max']:>10}{row.get('queries', ''):>6}")
+    if args.output:
+        save_results(args.output, "startup", results, {"size": args.size, "repeat": args.repeat})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Задержка подсказок (suggest.py) на большом числе названий
+
+Индекс строится в памяти из синтетических названий без БД: измеряется
+только поиск по префиксам. Словарь - слова benchmarks.search с
+суффиксами, чтобы число разных слов было ближе к реальным названиям.
+
+Запуск из каталога backend:
+    python -m benchmarks.suggest --titles 1000000
+"""
+
+import argparse
+import itertools
+import random
+import resource
+import statistics
+import time
+
+from benchmarks.search import WORDS, percentile
+from suggest import PrefixIndex
+
+SUFFIXES = ["", "ный", "ная", "ские", "ика", "ство", "ов", "er", "ing", "ly"]
+QUERIES = [
+    "э", "эко", "Экологичн", "ёлк", "ЕЛКА", "шк", "smart", "муз теа",
+    "экологичная упаковка", "р", "zzz", "теплицы ов",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=1000000)
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Число разных слов")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    vocabulary = [
+        f"{rnd.choice(WORDS)}{rnd.choice(SUFFIXES)}{i if i >= len(WORDS) * len(SUFFIXES) else ''}"
+        for i in range(args.vocabulary)
+    ]
+    # Частоты слов по закону Ципфа
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    words = iter(rnd.choices(vocabulary, cum_weights=cum_weights, k=args.titles * 6))
+    titles = [
+        " ".join(itertools.islice(words, rnd.randint(2, 6))).capitalize()
+        for _ in range(args.titles)
+    ]
+
+    index = PrefixIndex()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    index.build(enumerate(titles, start=1))
+    build_seconds = time.perf_counter() - started
+    rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    print(f"Названий: {len(index)}, слов: {len(index.words)}, "
+          f"построение {build_seconds:.1f} с, прирост RSS ~{rss_mb:.0f} МБ")
+
+    print(f"{'запрос':<24}{'найдено':>9}{'p50, мкс':>11}{'p99, мкс':>11}")
+    worst = 0.0
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            found = index.search(query, 8)
+            timings.append((time.perf_counter() - started) * 1e6)
+        worst = max(worst, percentile(timings, 99))
+        print(f"{query:<24}{len(found):>9}{statistics.median(timings):>11.1f}{percentile(timings, 99):>11.1f}")
+
+    timings = []
+    for row_id in rnd.sample(range(1, args.titles + 1), min(args.repeat, args.titles)):
+        started = time.perf_counter()
+        index.add(row_id, titles[row_id - 1] + " обновлено")
+        timings.append((time.perf_counter() - started) * 1e6)
+    print(f"{'обновление названия':<24}{'':>9}{statistics.median(timings):>11.1f}{percentile(timings, 99):>11.1f}")
+    print(f"Худший p99 поиска: {worst:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
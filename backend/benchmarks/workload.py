@@ -0,0 +1,170 @@
+"""Смешанная нагрузка на все маршруты API
+
+Сценарии и их доли в нагрузке: просмотр (50%), поиск (20%),
+инвестиции (20%), отзывы и прочие записи (10%). Внутри сценария
+маршруты выбираются по весам. Без --url создаёт базу через
+benchmarks.datagen и запускает локальный uvicorn.
+
+Запуск из каталога backend:
+    python -m benchmarks.workload --size 100k --duration 30 --output run.json
+    python -m benchmarks.workload --baseline run.json --max-regression 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.async_stack import NO_CACHE
+from benchmarks.datagen import SIZES
+from benchmarks.load import BACKEND_DIR, run_load, start_server
+from benchmarks.report import compare, print_table, save_results
+
+SCENARIO_WEIGHTS = {"browse": 50, "search": 20, "pledge": 20, "review": 10}
+
+SEARCH_QUERIES = ["экологичная", "упаковка", "теплиц", "школа", "елка", "smart", "музыка театр"]
+
+# Длина заранее перемешанного плана запросов
+PLAN_SIZE = 2000
+
+
+def build_plan(project_ids: list, user_ids: list, seed: int = 42) -> list:
+    """Список (method, path, json, label) в пропорциях SCENARIO_WEIGHTS"""
+    rnd = random.Random(seed)
+    counter = itertools.count()
+    deadline = (datetime.utcnow() + timedelta(days=30)).isoformat()
+
+    def project():
+        return rnd.choice(project_ids)
+
+    def user():
+        return rnd.choice(user_ids)
+
+    def investment():
+        return {"amount": rnd.choice((100, 500, 1000)), "project_id": project(), "user_id": user()}
+
+    def new_user():
+        number = next(counter)
+        return {"username": f"load_{seed}_{number}", "email": f"load_{seed}_{number}@example.com"}
+
+    scenarios = {
+        "browse": [
+            (10, "GET", lambda: "/api/projects", None, "GET /api/projects"),
+            (3, "GET", lambda: f"/api/projects?sort_by={rnd.choice(('new', 'ending'))}",
+             None, "GET /api/projects?sort_by"),
+            (3, "GET", lambda: "/api/projects?category=Технологии", None, "GET /api/projects?category"),
+            (8, "GET", lambda: f"/api/projects/{project()}", None, "GET /api/projects/{id}"),
+            (4, "GET", lambda: f"/api/projects/{project()}/details", None, "GET /api/projects/{id}/details"),
+            (3, "GET", lambda: f"/api/investments/project/{project()}", None,
+             "GET /api/investments/project/{id}"),
+            (3, "GET", lambda: f"/api/reviews/project/{project()}", None, "GET /api/reviews/project/{id}"),
+            (2, "GET", lambda: f"/api/users/{user()}", None, "GET /api/users/{id}"),
+            (3, "GET", lambda: "/api/categories", None, "GET /api/categories"),
+            (3, "GET", lambda: "/api/featured-projects", None, "GET /api/featured-projects"),
+            (2, "GET", lambda: "/api/statistics", None, "GET /api/statistics"),
+            (1, "GET", lambda: "/health", None, "GET /health"),
+        ],
+        "search": [
+            (3, "GET", lambda: f"/api/search?q={rnd.choice(SEARCH_QUERIES)}", None, "GET /api/search"),
+            (1, "GET", lambda: f"/api/projects?search={rnd.choice(SEARCH_QUERIES)}", None,
+             "GET /api/projects?search"),
+        ],
+        "pledge": [
+            (10, "POST", lambda: "/api/investments", investment, "POST /api/investments"),
+            (1, "POST", lambda: "/api/investments/batch", lambda: [investment() for _ in range(10)],
+             "POST /api/investments/batch"),
+        ],
+        "review": [
+            (6, "POST", lambda: "/api/reviews", lambda: {
+                "text": "Отличный проект, поддерживаю!", "rating": rnd.randint(1, 5),
+                "project_id": project(), "user_id": user(),
+            }, "POST /api/reviews"),
+            (1, "POST", lambda: "/api/users", new_user, "POST /api/users"),
+            (1, "POST", lambda: "/api/projects", lambda: {
+                "title": f"Нагрузочный проект {next(counter)}",
+                "description": "Проект, созданный во время нагрузочного теста",
+                "goal": 100000, "deadline": deadline, "category": "Технологии", "creator_id": user(),
+            }, "POST /api/projects"),
+            (1, "PUT", lambda: f"/api/projects/{project()}", lambda: {
+                "description": f"Описание обновлено нагрузочным тестом {next(counter)}",
+            }, "PUT /api/projects/{id}"),
+            (1, "POST", lambda: f"/api/categories?name=Нагрузка {seed} {next(counter)}", None,
+             "POST /api/categories"),
+        ],
+    }
+
+    plan = []
+    names = list(SCENARIO_WEIGHTS)
+    for name in rnd.choices(names, weights=[SCENARIO_WEIGHTS[n] for n in names], k=PLAN_SIZE):
+        routes = scenarios[name]
+        _, method, path, body, label = rnd.choices(routes, weights=[r[0] for r in routes])[0]
+        plan.append((method, path, body, label))
+    return plan
+
+
+def discover_ids(base_url: str) -> tuple:
+    """Открытые проекты и пользователи для запросов нагрузки"""
+    now = datetime.utcnow().isoformat()
+    projects = httpx.get(f"{base_url}/api/projects", params={"sort_by": "new", "limit": 100}).json()
+    project_ids = [p["id"] for p in projects if p["deadline"] > now]
+    user_ids = sorted({p["creator_id"] for p in projects})
+    if not project_ids or not user_ids:
+        raise RuntimeError("В базе нет открытых проектов - сначала запустите benchmarks.datagen")
+    return project_ids, user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Адрес запущенного API (иначе - локальный uvicorn)")
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--no-cache", action="store_true", help="Отключить кэш ответов")
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Допустимое ухудшение метрики, %%")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        path = os.path.join(tempfile.mkdtemp(), "bench_workload.db")
+        env = {"DATABASE_URL": f"sqlite:///{path}"}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.datagen", "--size", args.size],
+            cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL, env={**os.environ, **env},
+        )
+        server = start_server({**env, **(NO_CACHE if args.no_cache else {})}, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        plan = build_plan(*discover_ids(base_url))
+        results = asyncio.run(run_load(base_url, plan, args.concurrency, args.duration))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_table(results)
+    if args.output:
+        save_results(args.output, "workload", results, {
+            "size": None if args.url else args.size,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "no_cache": args.no_cache,
+        })
+    if args.baseline and not compare(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Пакетный импорт инвестиций (выгрузки платёжного провайдера)
+
+Записи InvestmentCreate читаются потоком (NDJSON построчно, CSV по записям,
+JSON-массив целиком), проверяются и вставляются пачками по
+BATCH_CHUNK_SIZE в отдельных транзакциях. Суммы проектов обновляются
+одним UPDATE на проект в пачке. Ошибочные строки попадают в отчёт и
+не прерывают импорт.
+"""
+
+import codecs
+import csv
+import json
+import os
+from collections import defaultdict, deque
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import Project, User, Investment
+from schemas import InvestmentCreate
+import platform_stats
+import ranking
+import rollups
+import lifecycle
+import events
+
+CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "1000"))
+# Сколько ошибок сохранять в отчёте (счётчик failed учитывает все)
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("ndjson", "csv", "json")
+
+
+class BatchReport:
+    """Итог пакетного импорта"""
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.project_ids = set()
+
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+        }
+
+
+def _csv_record(row: dict) -> dict:
+    # Лишние значения строки (ключ None) не используются, пустые - None
+    return {key: value or None for key, value in row.items() if key is not None}
+
+
+def _ndjson_record(line: str):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return f"Некорректная строка: {e}"
+    return record if isinstance(record, dict) else "Ожидался JSON-объект"
+
+
+class _LineQueue:
+    """Строки для csv.reader, поступающие частями
+
+    Пустая очередь завершает текущую итерацию, но не сам итератор:
+    reader продолжает чтение после следующего feed().
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+class RecordParser:
+    """Потоковый разбор тела запроса (NDJSON или CSV)
+
+    feed(bytes) и finish() возвращают [(номер записи, dict или текст ошибки)].
+    Байты декодируются инкрементально, CSV читает один csv.DictReader, поэтому
+    поле в кавычках может содержать переводы строк. Строки передаются reader
+    только целыми записями: запись заканчивается на переводе строки при
+    чётном числе кавычек (в поле кавычка удваивается).
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in ("ndjson", "csv"):
+            raise ValueError(f"Построчный разбор не поддерживает формат {fmt}")
+        self.fmt = fmt
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.tail = ""
+        self.row = 0
+        self.queue = _LineQueue()
+        self.reader = csv.DictReader(self.queue)
+        self.pending = []
+        self.quotes = 0
+
+    def feed(self, data: bytes, final: bool = False) -> list:
+        # Незавершённая последняя строка ждёт следующего фрагмента
+        *lines, self.tail = (self.tail + self.decoder.decode(data, final)).split("\n")
+        lines = [line + "\n" for line in lines]
+        if final and self.tail:
+            lines.append(self.tail)
+            self.tail = ""
+        if self.fmt == "ndjson":
+            return [self._number(_ndjson_record(line)) for line in lines if line.strip()]
+
+        for line in lines:
+            self.pending.append(line)
+            self.quotes += line.count('"')
+            if self.quotes % 2 == 0:
+                self.queue.lines.extend(self.pending)
+                self.pending, self.quotes = [], 0
+        if final:
+            # Незакрытая кавычка в конце данных - последняя запись как есть
+            self.queue.lines.extend(self.pending)
+            self.pending = []
+        return self._read_csv()
+
+    def finish(self) -> list:
+        return self.feed(b"", final=True)
+
+    def _read_csv(self) -> list:
+        items = []
+        while self.queue.lines:
+            try:
+                row = next(self.reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                items.append(self._number(f"Некорректная строка: {e}"))
+                continue
+            items.append(self._number(_csv_record(row)))
+        return items
+
+    def _number(self, record) -> tuple:
+        self.row += 1
+        return self.row, record
+
+
+def detect_format(content_type: str) -> str:
+    """Формат по Content-Type запроса"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        return "ndjson"
+    return "json"
+
+
+def iter_chunks(records, chunk_size: int = CHUNK_SIZE):
+    """Сгруппировать (номер строки, запись) в пачки"""
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_json_array(data):
+    """Записи JSON-массива с номерами строк"""
+    if not isinstance(data, list):
+        raise ValueError("Ожидался JSON-массив записей")
+    for row, record in enumerate(data, start=1):
+        yield row, record if isinstance(record, dict) else "Ожидался JSON-объект"
+
+
+def iter_file_records(path: str, fmt: str):
+    """Записи файла: NDJSON построчно, CSV - одним csv.DictReader по файлу"""
+    if fmt == "json":
+        with open(path, encoding="utf-8") as f:
+            yield from iter_json_array(json.load(f))
+        return
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "ndjson":
+            lines = (line for line in f if line.strip())
+            yield from enumerate(map(_ndjson_record, lines), start=1)
+            return
+        reader = csv.DictReader(f)
+        row = 0
+        while True:
+            row += 1
+            try:
+                yield row, _csv_record(next(reader))
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield row, f"Некорректная строка: {e}"
+
+
+async def aiter_request_chunks(request, fmt: str, chunk_size: int = CHUNK_SIZE):
+    """Пачки записей из тела запроса без чтения его целиком (кроме JSON-массива)"""
+    if fmt == "json":
+        for chunk in iter_chunks(iter_json_array(json.loads(await request.body())), chunk_size):
+            yield chunk
+        return
+
+    parser = RecordParser(fmt)
+    chunk = []
+    async for data in request.stream():
+        chunk.extend(parser.feed(data))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    chunk.extend(parser.finish())
+    if chunk:
+        yield chunk
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+    )
+
+
+def import_chunk(db, chunk: list, report: BatchReport):
+    """Проверить и записать пачку инвестиций в одной транзакции"""
+    report.total += len(chunk)
+
+    valid = []
+    for row, record in chunk:
+        if isinstance(record, str):
+            report.fail(row, record)
+            continue
+        try:
+            valid.append((row, InvestmentCreate(**record)))
+        except ValidationError as e:
+            report.fail(row, _format_validation_error(e))
+    if not valid:
+        return
+
+    # Проекты и пользователи пачки - двумя запросами
+    projects = {
+        row.id: row
+        for row in db.query(
+            Project.id, Project.status, Project.deadline, Project.category_id, Project.pledge_velocity,
+            Project.velocity_updated_at, Project.raised_amount, Project.goal
+        ).filter(Project.id.in_({inv.project_id for _, inv in valid}))
+    }
+    users = {
+        user_id for (user_id,) in db.query(User.id).filter(
+            User.id.in_({inv.user_id for _, inv in valid})
+        )
+    }
+
+    now = datetime.utcnow()
+    rows = []
+    accepted = []
+    for row, inv in valid:
+        project = projects.get(inv.project_id)
+        if not project:
+            report.fail(row, "Проект не найден")
+        elif not lifecycle.accepts_pledges(project.status, project.deadline, now):
+            report.fail(row, "Проект завершён")
+        elif inv.user_id not in users:
+            report.fail(row, "Пользователь не найден")
+        else:
+            rows.append({
+                "amount": inv.amount,
+                "message": inv.message,
+                "project_id": inv.project_id,
+                "user_id": inv.user_id,
+                "created_at": now,
+            })
+            accepted.append(row)
+    if not rows:
+        return
+
+    project_deltas = defaultdict(lambda: [0.0, 0])
+    project_pledges = defaultdict(list)
+    for values in rows:
+        delta = project_deltas[values["project_id"]]
+        delta[0] += values["amount"]
+        delta[1] += 1
+        project_pledges[values["project_id"]].append((values["user_id"], values["amount"]))
+
+    category_deltas = defaultdict(lambda: [0.0, 0])
+    for project_id, (amount, backers) in project_deltas.items():
+        delta = category_deltas[projects[project_id].category_id]
+        delta[0] += amount
+        delta[1] += backers
+
+    project_updates = []
+    for project_id, (amount, backers) in project_deltas.items():
+        project = projects[project_id]
+        factor, score = ranking.pledge_effect(
+            project.pledge_velocity, project.velocity_updated_at, project.raised_amount,
+            project.goal, project.deadline, backers, amount, now,
+        )
+        project_updates.append({
+            "project_id_": project_id, "amount_": amount, "backers_": backers,
+            "decay_": factor, "score_": score,
+        })
+
+    # Предыдущие инвестиции тех же пользователей за сутки - для уникальных инвесторов
+    last_pledges = rollups.last_pledges_today(
+        db, set(project_deltas), {values["user_id"] for values in rows}, now
+    )
+    rollup_rows = [
+        rollup
+        for project_id, pledges in project_pledges.items()
+        for rollup in rollups.pledge_deltas(project_id, pledges, {
+            user_id: last_pledges.get((project_id, user_id)) for user_id, _ in pledges
+        }, now)
+    ]
+
+    projects_table = Project.__table__
+    try:
+        db.execute(insert(Investment), rows)
+        db.execute(
+            update(projects_table)
+            .where(projects_table.c.id == bindparam("project_id_"))
+            .values(
+                raised_amount=projects_table.c.raised_amount + bindparam("amount_"),
+                backers_count=projects_table.c.backers_count + bindparam("backers_"),
+                pledge_velocity=projects_table.c.pledge_velocity * bindparam("decay_")
+                + bindparam("backers_"),
+                velocity_updated_at=now,
+                hot_score=bindparam("score_"),
+            ),
+            project_updates,
+        )
+        # Число инвестиций проектов после записи - для пропуска событий, учтённых в снимке потока
+        backers_counts = dict(db.query(Project.id, Project.backers_count).filter(
+            Project.id.in_(project_deltas)
+        ))
+        for category_id, (amount, backers) in category_deltas.items():
+            platform_stats.record_investment(db, category_id, amount, backers=backers)
+        rollups.record(db, rollup_rows)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        for row in accepted:
+            report.fail(row, f"Ошибка записи: {e.__class__.__name__}")
+        return
+
+    report.imported += len(rows)
+    report.project_ids.update(project_deltas)
+    for project_id, (amount, backers) in project_deltas.items():
+        events.publish_funding(project_id, amount, backers, backers_counts[project_id])
@@ -0,0 +1,196 @@
+"""Кэш ответов читающих эндпоинтов
+
+Записи кэша привязаны к тегам (например, "project:5", "categories").
+Каждый тег имеет счётчик поколения, который входит в ключ записи:
+инвалидация тега увеличивает счётчик, и старые записи больше не
+находятся, а затем вытесняются по LRU/TTL. Так инвалидация работает
+одинаково для локального кэша и для общего хранилища нескольких воркеров.
+"""
+
+import abc
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# TTL маршрутов в секундах (0 - не кэшировать), переопределяются CACHE_TTL_<ROUTE>
+DEFAULT_TTLS = {
+    "featured": 30,
+    "categories": 300,
+    "project": 30,
+    "statistics": 10,
+}
+
+ROUTE_TTLS = {
+    route: float(os.getenv(f"CACHE_TTL_{route.upper()}", ttl))
+    for route, ttl in DEFAULT_TTLS.items()
+}
+
+
+class CacheBackend(abc.ABC):
+    """Интерфейс хранилища кэша"""
+
+    # Хранилище общее для процессов (инвалидация из CLI доходит до воркеров)
+    shared = False
+
+    @abc.abstractmethod
+    def get(self, key: str):
+        """Значение по ключу или None"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value, ttl: float):
+        """Сохранить значение на ttl секунд"""
+
+    @abc.abstractmethod
+    def generation(self, tag: str) -> int:
+        """Текущее поколение тега"""
+
+    @abc.abstractmethod
+    def bump(self, tag: str):
+        """Увеличить поколение тега (инвалидировать его записи)"""
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        """Счётчики для GET /api/cache/stats"""
+
+
+class LocalCache(CacheBackend):
+    """LRU-кэш с TTL в памяти процесса"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Поколения тегов хранятся отдельно и не вытесняются
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def generation(self, tag: str) -> int:
+        return self._generations.get(tag, 0)
+
+    def bump(self, tag: str):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": "local",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class RedisCache(CacheBackend):
+    """Общий для всех воркеров кэш в Redis (нужен пакет redis)"""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "mdk:cache:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "CACHE_URL указывает на Redis, но пакет redis не установлен: pip install redis"
+            ) from None
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def generation(self, tag: str) -> int:
+        return int(self.client.get(self.prefix + "gen:" + tag) or 0)
+
+    def bump(self, tag: str):
+        self.client.incr(self.prefix + "gen:" + tag)
+
+    def stats(self) -> dict:
+        # Вытеснение выполняет сам Redis (maxmemory-policy allkeys-lru)
+        info = self.client.info("stats")
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": info.get("evicted_keys", 0),
+        }
+
+
+class ResponseCache:
+    """Кэширование результатов обработчиков с инвалидацией по тегам"""
+
+    def __init__(self, backend: CacheBackend, ttls: dict = None):
+        self.backend = backend
+        self.ttls = ROUTE_TTLS if ttls is None else ttls
+
+    def get_or_load(self, route: str, args: tuple, tags: list, loader):
+        """Вернуть закэшированный ответ или вызвать loader и сохранить результат
+
+        loader должен возвращать JSON-совместимые данные.
+        """
+        ttl = self.ttls.get(route, 0)
+        if not ttl:
+            return loader()
+
+        versions = ",".join(f"{tag}@{self.backend.generation(tag)}" for tag in tags)
+        key = f"{route}:{':'.join(map(str, args))}|{versions}"
+        value = self.backend.get(key)
+        if value is None:
+            value = loader()
+            self.backend.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            self.backend.bump(tag)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+def create_backend() -> CacheBackend:
+    """Выбрать хранилище по CACHE_URL (пусто - локальный кэш процесса)"""
+    url = os.getenv("CACHE_URL", "")
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisCache(url)
+    return LocalCache(int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+
+
+response_cache = ResponseCache(create_backend())
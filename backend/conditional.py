@@ -0,0 +1,100 @@
+"""Условные GET-запросы: ETag, Last-Modified, 304 и Cache-Control
+
+ETag проекта строится из версии строки (id и updated_at), ETag списка -
+из версий всех строк страницы. При условном запросе обработчики
+сначала читают только версии (id, updated_at) и, если ETag совпал,
+отвечают 304 без загрузки и сериализации строк.
+
+Cache-Control задаётся для каждого маршрута и переопределяется
+переменной HTTP_CACHE_CONTROL_<МАРШРУТ>: по умолчанию браузер
+перепроверяет ответ каждый раз (дешёвый 304), а CDN может отдавать его
+из своего кэша s-maxage секунд.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+DEFAULT_CACHE_CONTROL = {
+    "project": "public, max-age=0, s-maxage=5",
+    "projects": "public, max-age=0, s-maxage=5",
+    "categories": "public, max-age=60, s-maxage=300",
+}
+
+CACHE_CONTROL = {
+    route: os.getenv(f"HTTP_CACHE_CONTROL_{route.upper()}", value)
+    for route, value in DEFAULT_CACHE_CONTROL.items()
+}
+
+
+def _version(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из частей версии"""
+    digest = hashlib.blake2b(
+        "|".join(map(_version, parts)).encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def project_etag(project_id: int, updated_at) -> str:
+    """ETag проекта; updated_at - datetime из БД или строка из ответа"""
+    return make_etag("project", project_id, updated_at)
+
+
+def rows_etag(kind: str, rows) -> str:
+    """ETag списка по (id, updated_at) его строк в порядке выдачи"""
+    return make_etag(kind, *(f"{row.id}@{_version(row.updated_at)}" for row in rows))
+
+
+def content_etag(body: bytes) -> str:
+    """ETag по содержимому ответа (для данных без версии строк)"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """Дата для Last-Modified (updated_at хранится в UTC без зоны)"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def has_validators(request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request, etag: str, last_modified: datetime = None) -> bool:
+    """Проверка If-None-Match, а без него - If-Modified-Since (RFC 9110)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Для If-None-Match ETag сравниваются слабо: префикс W/ не учитывается
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def validator_headers(route: str, etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL[route]}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(route: str, etag: str, last_modified: datetime = None) -> Response:
+    """Ответ 304 без тела с теми же валидаторами"""
+    return Response(status_code=304, headers=validator_headers(route, etag, last_modified))
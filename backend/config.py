@@ -0,0 +1,7 @@
+"""Чтение настроек из переменных окружения"""
+
+import os
+
+
+def env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
@@ -1,41 +1,303 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
+import functools
 import os
+import threading
 
 load_dotenv()
 
+from pool import engine_options, install_sqlite_pragmas, pool_status
+from metrics import install_query_metrics, install_row_metrics, track_handler
+import replicas
+
 # УRL базы данных (SQLite для разработки, PostgreSQL для production)
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "sqlite:///./crowdfunding.db"
 )
 
-# Создание engine
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL)
+# Асинхронный режим включается асинхронным драйвером в DATABASE_URL:
+# sqlite+aiosqlite:///./crowdfunding.db или postgresql+asyncpg://...
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql",
+}
+ASYNC_MODE = DATABASE_URL.split("://", 1)[0] in ASYNC_DRIVERS
+
+
+def _sync_url(url: str) -> str:
+    scheme = url.split("://", 1)[0]
+    return ASYNC_DRIVERS[scheme] + url[len(scheme):] if scheme in ASYNC_DRIVERS else url
+
+
+# Синхронный URL нужен для создания схемы, фоновых задач, выгрузок и CLI
+SYNC_DATABASE_URL = _sync_url(DATABASE_URL)
+
+# Engine создаются при первом обращении (get_engine, SessionLocal, get_db),
+# а не при импорте: импорт модуля не обращается к БД
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _lazy(name: str, factory):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = factory()
+    return engine
+
+
+def _create_engine():
+    # Размеры пула и PRAGMA SQLite настраиваются в pool.py
+    engine = create_engine(SYNC_DATABASE_URL, **engine_options(SYNC_DATABASE_URL))
+    install_sqlite_pragmas(engine)
+    install_query_metrics(engine)
+    _session_factory.configure(bind=engine)
+    return engine
+
+
+def _create_async_engine():
+    engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL, is_async=True))
+    install_sqlite_pragmas(engine.sync_engine)
+    install_query_metrics(engine.sync_engine)
+    _async_session_factory.configure(bind=engine)
+    return engine
+
+
+def get_engine():
+    """Синхронный engine основной БД (схема, фоновые задачи, CLI)"""
+    return _lazy("sync", _create_engine)
+
+
+def get_async_engine():
+    """Асинхронный engine основной БД (только в асинхронном режиме)"""
+    return _lazy("async", _create_async_engine)
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+_async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def SessionLocal() -> Session:
+    """Новая синхронная сессия основной БД"""
+    get_engine()
+    return _session_factory()
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Новая асинхронная сессия основной БД"""
+    get_async_engine()
+    return _async_session_factory()
+
+
+def _create_replica(index: int, url: str) -> replicas.Replica:
+    name = f"replica{index}"
+    if ASYNC_MODE:
+        replica_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        sync_engine = replica_engine.sync_engine
+        factory = async_sessionmaker(
+            replica_engine, autoflush=False, expire_on_commit=False, info={"replica": name}
+        )
+        # Выгрузки читают синхронным курсором (соединения создаются при первой выгрузке)
+        stream_engine = create_engine(_sync_url(url), **engine_options(_sync_url(url)))
+        install_sqlite_pragmas(stream_engine)
+        install_query_metrics(stream_engine)
+    else:
+        stream_engine = sync_engine = replica_engine = create_engine(url, **engine_options(url))
+        factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=replica_engine, info={"replica": name}
+        )
+    install_sqlite_pragmas(sync_engine)
+    install_query_metrics(sync_engine)
+    return replicas.Replica(name, sync_engine, factory, stream_engine)
+
+
+def get_replica_set() -> replicas.ReplicaSet:
+    """Реплики для читающих обработчиков (см. replicas.py)"""
+    return _lazy("replicas", lambda: replicas.ReplicaSet([
+        _create_replica(i, url) for i, url in enumerate(replicas.REPLICA_URLS, start=1)
+    ]))
+
+
+def __getattr__(name: str):
+    # from database import engine (CLI, миграции) создаёт engine при обращении к имени
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def dispose_engines():
+    """Закрыть пулы созданных engine (при остановке приложения)"""
+    engines = list(_engines.items())
+    _engines.clear()
+    for name, engine in engines:
+        if name == "replicas":
+            # Engine реплики, к которому привязана фабрика сессий (в асинхронном режиме - AsyncEngine)
+            for replica in engine.replicas:
+                bind = replica.sessionmaker.kw["bind"]
+                await bind.dispose() if ASYNC_MODE else bind.dispose()
+                if replica.stream_engine is not replica.engine:
+                    replica.stream_engine.dispose()
+        elif name == "async":
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+def _reset_after_fork():
+    # Воркер serve.py создаёт свои engine: соединения мастер-процесса
+    # остаются ему и не закрываются из дочернего процесса
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for name, engine in _engines.items():
+        if name == "replicas":
+            for replica in engine.replicas:
+                replica.engine.dispose(close=False)
+                if replica.stream_engine is not replica.engine:
+                    replica.stream_engine.dispose(close=False)
+        elif name == "async":
+            engine.sync_engine.dispose(close=False)
+        else:
+            engine.dispose(close=False)
+    _engines.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-# Создание SessionLocal
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
 
 # Base класс для моделей
 Base = declarative_base()
+install_row_metrics(Base)
+
+
+if ASYNC_MODE:
+    async def get_db():
+        """Dependency для получения асинхронной сессии БД"""
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        """Dependency для получения сессии БД"""
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def _choose_replica(request: Request):
+    if not replicas.REPLICA_URLS or replicas.is_pinned(request):
+        return None
+    return get_replica_set().choose()
+
+
+if ASYNC_MODE:
+    async def get_read_db(request: Request):
+        """Dependency для читающих обработчиков: сессия реплики или основной БД"""
+        db = None
+        replica = _choose_replica(request)
+        if replica is not None:
+            db = replica.sessionmaker()
+            try:
+                await db.connection()
+            except DBAPIError as e:
+                await db.close()
+                get_replica_set().mark_failed(replica, e)
+                db = None
+        if db is None:
+            db = AsyncSessionLocal()
+        async with db:
+            yield db
+else:
+    def get_read_db(request: Request):
+        """Dependency для читающих обработчиков: сессия реплики или основной БД"""
+        db = None
+        replica = _choose_replica(request)
+        if replica is not None:
+            db = replica.sessionmaker()
+            try:
+                db.connection()
+            except DBAPIError as e:
+                db.close()
+                get_replica_set().mark_failed(replica, e)
+                db = None
+        if db is None:
+            db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def read_connection(request: Request):
+    """Синхронное соединение для длинного чтения (выгрузки)
+
+    Реплика выбирается как в get_read_db; если реплик нет, клиент читает
+    свои записи или реплика недоступна - основная БД.
+    """
+    replica = _choose_replica(request)
+    if replica is not None:
+        try:
+            return replica.stream_engine.connect()
+        except DBAPIError as e:
+            get_replica_set().mark_failed(replica, e)
+    return get_engine().connect()
+
+
+def lock_rows(db, table, first_id: int, last_id: int):
+    """Заблокировать строки table с id от first_id до last_id до конца транзакции
+
+    UPDATE без изменений: в PostgreSQL блокирует строки, как SELECT ...
+    FOR UPDATE, в SQLite берёт блокировку записи БД. Запись, обновляющая
+    эти строки, ждёт конца транзакции.
+    """
+    # Колонки с onupdate (updated_at) присваиваются сами себе, чтобы не измениться
+    unchanged = [column for column in table.c if column.onupdate is not None] or list(table.primary_key)
+    db.execute(
+        update(table)
+        .where(table.c.id.between(first_id, last_id))
+        .values({column: column for column in unchanged})
+    )
+
+
+def pool_statistics() -> dict:
+    """Состояние пулов соединений всех engine"""
+    stats = {"sync": pool_status(get_engine())}
+    if ASYNC_MODE:
+        stats["async"] = pool_status(get_async_engine().sync_engine)
+    for replica in get_replica_set().replicas:
+        stats[replica.name] = {**pool_status(replica.engine), "healthy": replica.healthy}
+    return stats
+
+
+async def run_db(db, fn, *args):
+    """Выполнить синхронную функцию fn(session, *args) с сессией db
+
+    В асинхронном режиме - через AsyncSession.run_sync (без потока из
+    пула), иначе - в пуле потоков.
+    """
+    with track_handler():
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args)
+        return await run_in_threadpool(fn, db, *args)
 
 
-def get_db():
-    """Dependency для получения сессии БД"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def db_handler(fn):
+    """Сделать обработчик с сессией db асинхронным (см. run_db)"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_db(
+            kwargs["db"], lambda session: fn(*args, **{**kwargs, "db": session})
+        )
+    return wrapper
@@ -0,0 +1,204 @@
+"""Поток событий о сборе средств по проектам (Server-Sent Events)
+
+Обработчики публикуют события через брокер. Локальный брокер сразу
+передаёт их в хаб процесса; RedisBroker (EVENTS_URL=redis://...)
+рассылает их через pub/sub всем воркерам, и каждый воркер доставляет
+события своим подписчикам.
+
+У каждого подписчика ограниченная очередь. Если клиент не успевает
+читать и очередь переполнена, он отключается, поэтому память на
+подписчика ограничена.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Максимум подписчиков на воркер
+MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "10000"))
+# Размер очереди подписчика; при переполнении подписчик отключается
+QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "16"))
+# Интервал комментария-пинга, чтобы прокси не закрывали соединение
+HEARTBEAT_INTERVAL = float(os.getenv("EVENTS_HEARTBEAT_INTERVAL", "15"))
+
+# Маркер отключения медленного подписчика
+EVICTED = object()
+
+
+class Subscription:
+    """Подписка клиента на события проекта"""
+
+    __slots__ = ("project_id", "queue", "evicted")
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.evicted = False
+
+
+class EventHub:
+    """Рассылка событий подписчикам внутри процесса"""
+
+    def __init__(self):
+        self.loop = None
+        self.subscriptions = {}
+        self.count = 0
+        self.evictions = 0
+        self.delivered = 0
+
+    def subscribe(self, project_id: int):
+        """Создать подписку; None, если достигнут предел подписчиков"""
+        if self.count >= MAX_SUBSCRIBERS:
+            return None
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(project_id)
+        self.subscriptions.setdefault(project_id, set()).add(subscription)
+        self.count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.subscriptions.get(subscription.project_id)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            self.count -= 1
+            if not subscribers:
+                del self.subscriptions[subscription.project_id]
+
+    def dispatch(self, event: dict):
+        """Доставить событие подписчикам проекта (в потоке event loop)"""
+        for subscription in list(self.subscriptions.get(event["project_id"], ())):
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._evict(subscription)
+
+    def dispatch_threadsafe(self, event: dict):
+        """Доставить событие из любого потока"""
+        if self.loop is None or event["project_id"] not in self.subscriptions:
+            return
+        self.loop.call_soon_threadsafe(self.dispatch, event)
+
+    def _evict(self, subscription: Subscription):
+        subscription.evicted = True
+        self.unsubscribe(subscription)
+        self.evictions += 1
+        # Освобождаем место под маркер, чтобы поток клиента завершился
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(EVICTED)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.count,
+            "projects": len(self.subscriptions),
+            "delivered": self.delivered,
+            "evictions": self.evictions,
+        }
+
+
+class LocalBroker:
+    """Брокер одного процесса"""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    def publish(self, event: dict):
+        self.hub.dispatch_threadsafe(event)
+
+    async def run(self):
+        pass
+
+
+class RedisBroker:
+    """Брокер через Redis pub/sub для нескольких воркеров (нужен пакет redis)"""
+
+    channel = "mdk:funding"
+
+    def __init__(self, hub: EventHub, url: str):
+        import redis
+
+        self.hub = hub
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, event: dict):
+        self.client.publish(self.channel, json.dumps(event))
+
+    async def run(self):
+        """Получать события всех воркеров и раздавать их локальным подписчикам"""
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self.hub.dispatch(json.loads(message["data"]))
+        finally:
+            await pubsub.close()
+            await client.close()
+
+
+def create_broker(hub: EventHub):
+    """Выбрать брокер по EVENTS_URL (пусто - события только внутри процесса)"""
+    url = os.getenv("EVENTS_URL", "")
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBroker(hub, url)
+    return LocalBroker(hub)
+
+
+hub = EventHub()
+broker = create_broker(hub)
+
+
+def publish_funding(project_id: int, amount: float, backers: int = 1, backers_count: int = None):
+    """Опубликовать прирост сбора проекта (вызывается после commit)
+
+    backers_count - число инвестиций проекта после этого прироста. Каждая
+    инвестиция увеличивает его на 1, поэтому оно служит номером события.
+    """
+    try:
+        broker.publish({
+            "type": "funding",
+            "project_id": project_id,
+            "amount": amount,
+            "backers": backers,
+            "backers_count": backers_count,
+        })
+    except Exception:
+        # Поток событий не должен ломать запись инвестиции
+        logger.exception("Не удалось опубликовать событие")
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _in_snapshot(event: dict, snapshot: dict) -> bool:
+    # Подписка создаётся до чтения снимка: прирост мог уже войти в снимок
+    sequence = event.get("backers_count")
+    return event["type"] == "funding" and sequence is not None and sequence <= (snapshot["backers_count"] or 0)
+
+
+async def stream(subscription: Subscription, snapshot: dict):
+    """Поток SSE: снимок текущего состояния, затем приросты"""
+    try:
+        yield format_sse("snapshot", snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event is EVICTED:
+                yield format_sse("evicted", {"project_id": subscription.project_id})
+                return
+            if not _in_snapshot(event, snapshot):
+                yield format_sse(event["type"], event)
+    finally:
+        hub.unsubscribe(subscription)
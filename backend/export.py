@@ -0,0 +1,213 @@
+"""Потоковая выгрузка инвестиций и проектов (CSV / NDJSON) для отчётности
+
+Строки читаются одним запросом через серверный курсор (stream_results,
+yield_per: в PostgreSQL - именованный курсор, в SQLite курсор и так
+читает по мере выборки) пачками по EXPORT_CHUNK_SIZE и сразу
+сериализуются: выбираются колонки, а не ORM-объекты, поэтому identity
+map не растёт и память не зависит от числа строк. Каждая пачка - один
+фрагмент ответа; с gzip фрагменты сжимаются по ходу выгрузки.
+
+Инвестиции упорядочены по (created_at, id) - как в списке инвестиций
+проекта, по индексам с project_id или created_at. Проекты - по id.
+
+    python export.py investments --format csv --project-id 5 -o pledges.csv
+    python export.py projects --category Технологии --from 2026-01-01 --gzip -o projects.ndjson.gz
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import threading
+import zlib
+from datetime import datetime
+
+from sqlalchemy import Float, select
+
+from database import get_engine
+from models import Project, Investment, Category
+from schemas import naive_utc
+import fast_json
+
+# Строк в пачке серверного курсора и во фрагменте ответа
+CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+GZIP_LEVEL = 6
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+INVESTMENT_COLUMNS = (
+    Investment.id, Investment.project_id, Investment.user_id,
+    Investment.amount, Investment.message, Investment.created_at,
+)
+PROJECT_COLUMNS = (
+    Project.id, Project.title, Category.name.label("category"), Project.creator_id,
+    Project.goal, Project.raised_amount, Project.backers_count, Project.status,
+    Project.deadline, Project.created_at,
+)
+
+
+def _category_id(name: str):
+    return select(Category.id).where(Category.name == name).scalar_subquery()
+
+
+def investments_query(project_id: int = None, category: str = None,
+                      created_from: datetime = None, created_to: datetime = None):
+    created_from, created_to = naive_utc(created_from), naive_utc(created_to)
+    query = select(*INVESTMENT_COLUMNS)
+    if project_id is not None:
+        query = query.where(Investment.project_id == project_id)
+    if category is not None:
+        query = query.where(Investment.project_id.in_(
+            select(Project.id).where(Project.category_id == _category_id(category))
+        ))
+    if created_from is not None:
+        query = query.where(Investment.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Investment.created_at < created_to)
+    return query.order_by(Investment.created_at, Investment.id)
+
+
+def projects_query(project_id: int = None, category: str = None,
+                   created_from: datetime = None, created_to: datetime = None):
+    created_from, created_to = naive_utc(created_from), naive_utc(created_to)
+    query = select(*PROJECT_COLUMNS).outerjoin(Category, Project.category_id == Category.id)
+    if project_id is not None:
+        query = query.where(Project.id == project_id)
+    if category is not None:
+        query = query.where(Project.category_id == _category_id(category))
+    if created_from is not None:
+        query = query.where(Project.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Project.created_at < created_to)
+    return query.order_by(Project.id)
+
+
+EXPORTS = {"investments": investments_query, "projects": projects_query}
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value for value in row
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunk(fields, rows) -> bytes:
+    return b"".join(fast_json.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def iter_rows(query, fmt: str, chunk_size: int = CHUNK_SIZE, connect=None):
+    """Фрагменты выгрузки (bytes): заголовок CSV и по фрагменту на пачку строк
+
+    connect() возвращает синхронное соединение (по умолчанию - основной
+    БД; API читает с реплики, см. database.read_connection). Соединение
+    берётся из пула на время выгрузки и возвращается в конце или при
+    закрытии генератора (close() после разрыва соединения клиентом).
+    """
+    fields = [column.name for column in query.selected_columns]
+    # В SQLite целое значение Float-колонки возвращается как int
+    floats = [i for i, column in enumerate(query.selected_columns) if isinstance(column.type, Float)]
+    if fmt == "csv":
+        yield _csv_chunk([fields])
+    with (connect or get_engine().connect)() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            rows = []
+            for row in partition:
+                row = list(row)
+                for i in floats:
+                    if row[i] is not None:
+                        row[i] = float(row[i])
+                rows.append(row)
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(fields, rows)
+
+
+def gzip_chunks(chunks):
+    """Сжать фрагменты в один gzip-поток по ходу выгрузки"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        chunks.close()
+
+
+class ClosingIterator:
+    """Итератор фрагментов, который можно закрыть из другого потока
+
+    StreamingResponse читает фрагменты в пуле потоков; после разрыва
+    соединения close() (BackgroundTask) может прийти, пока next() ещё
+    выполняется. Закрытие ждёт его окончания под блокировкой, а не падает
+    с ValueError: generator already executing, оставив соединение занятым.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        with self.lock:
+            if self.closed:
+                raise StopIteration
+            return next(self.chunks)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.chunks.close()
+
+
+def export(kind: str, fmt: str, gzip: bool = False, connect=None, **filters):
+    """Фрагменты выгрузки kind (investments, projects) в формате fmt"""
+    chunks = iter_rows(EXPORTS[kind](**filters), fmt, connect=connect)
+    return ClosingIterator(gzip_chunks(chunks) if gzip else chunks)
+
+
+def filename(kind: str, fmt: str, gzip: bool = False) -> str:
+    return f"{kind}.{fmt}" + (".gz" if gzip else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выгрузка инвестиций и проектов")
+    parser.add_argument("kind", choices=EXPORTS)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--category", help="Название категории")
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat,
+                        help="created_at не раньше (ISO 8601, UTC)")
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat,
+                        help="created_at раньше (ISO 8601, UTC)")
+    parser.add_argument("--gzip", action="store_true", help="Сжать выгрузку gzip")
+    parser.add_argument("-o", "--output", help="Файл выгрузки (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    chunks = export(
+        args.kind, args.format, args.gzip, project_id=args.project_id, category=args.category,
+        created_from=args.created_from, created_to=args.created_to,
+    )
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        size = 0
+        for chunk in chunks:
+            output.write(chunk)
+            size += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+    if args.output:
+        print(f"✓ Выгружено в {args.output}: {size} байт", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
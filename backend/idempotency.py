@@ -0,0 +1,146 @@
+"""Идемпотентные POST-запросы по заголовку Idempotency-Key
+
+Запрос с ключом сначала вставляет строку ключа (claim), затем выполняет
+обработчик и записывает в эту строку свой ответ (commit) - всё в одной
+транзакции, поэтому ключ становится виден вместе с изменениями данных.
+Повтор с тем же ключом и телом возвращает сохранённый ответ без
+повторного выполнения (заголовок Idempotent-Replayed: true), тот же
+ключ с другим телом - ошибку 422.
+
+Параллельный дубликат ждёт на вставке ключа (блокировка первичного
+ключа в PostgreSQL, блокировка записи в SQLite), пока первый запрос не
+завершит транзакцию: после фиксации он отдаёт ответ первого, после
+отката выполняется сам. Обработчик выполняется один раз. Запросы без
+ключа не делают лишних запросов к БД.
+
+Ошибки (4xx) не сохраняются: транзакция с ключом откатывается, повтор
+выполняется заново. Ключи хранятся IDEMPOTENCY_TTL секунд.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from sqlalchemy.exc import IntegrityError
+
+import background
+from database import SessionLocal
+from models import IdempotencyKey
+import fast_json
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Время хранения ключа в секундах
+TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Период удаления устаревших ключей в секундах (0 - отключено)
+PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
+PURGE_CHUNK_SIZE = 10000
+
+# status_code ключа, ответ на который ещё не записан
+PENDING_STATUS = 0
+
+
+def request_hash(payload) -> str:
+    """Отпечаток тела запроса (Pydantic-модели)"""
+    return hashlib.blake2b(payload.model_dump_json().encode(), digest_size=16).hexdigest()
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return fast_json.RawJSONResponse(
+        record.body, status_code=record.status_code, headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def lookup(db, scope: str, key: str, payload) -> Response:
+    """Сохранённый ответ для ключа или None, если запрос выполняется впервые"""
+    record = db.get(IdempotencyKey, (scope, key))
+    if record is None:
+        return None
+    if record.created_at < datetime.utcnow() - timedelta(seconds=TTL):
+        # Ключ устарел, но ещё не удалён фоновой задачей
+        db.delete(record)
+        db.flush()
+        return None
+    if record.request_hash != request_hash(payload):
+        raise HTTPException(
+            status_code=422, detail=f"{HEADER} уже использован с другим телом запроса"
+        )
+    if record.status_code == PENDING_STATUS:
+        raise HTTPException(status_code=409, detail=f"Запрос с этим {HEADER} ещё выполняется")
+    return _replay(record)
+
+
+def claim(db, scope: str, key: str, payload) -> Response:
+    """Занять ключ до выполнения обработчика
+
+    Возвращает ответ для повтора или None, если ключ занят этим запросом
+    (строка ключа вставлена в текущую транзакцию).
+    """
+    replay = lookup(db, scope, key, payload)
+    if replay is not None:
+        return replay
+    db.add(IdempotencyKey(
+        scope=scope,
+        key=key,
+        request_hash=request_hash(payload),
+        status_code=PENDING_STATUS,
+        body="",
+        created_at=datetime.utcnow(),
+    ))
+    try:
+        db.flush()
+    except IntegrityError:
+        # Параллельный дубликат зафиксировал ключ, пока этот ждал вставки
+        db.rollback()
+        replay = lookup(db, scope, key, payload)
+        if replay is None:
+            raise HTTPException(status_code=409, detail=f"Запрос с этим {HEADER} ещё выполняется")
+        return replay
+    return None
+
+
+def commit(db, scope: str, key: str, response_model, result):
+    """Зафиксировать транзакцию вместе с ответом для ключа, занятого claim"""
+    if key is not None:
+        db.flush()
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope, IdempotencyKey.key == key
+        ).update({
+            IdempotencyKey.status_code: 200,
+            IdempotencyKey.body: fast_json.dumps(response_model.model_validate(result).model_dump()).decode(),
+        }, synchronize_session=False)
+    db.commit()
+
+
+def purge(db) -> int:
+    """Удалить устаревшие ключи пачками по PURGE_CHUNK_SIZE (по индексу created_at)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=TTL)
+    deleted = 0
+    while True:
+        expired = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff)
+        # Граница пачки - created_at ключа с номером PURGE_CHUNK_SIZE
+        bound = db.query(IdempotencyKey.created_at).filter(
+            IdempotencyKey.created_at < cutoff
+        ).order_by(IdempotencyKey.created_at).offset(PURGE_CHUNK_SIZE - 1).limit(1).scalar()
+        if bound is not None:
+            expired = expired.filter(IdempotencyKey.created_at <= bound)
+        deleted += expired.delete(synchronize_session=False)
+        db.commit()
+        if bound is None:
+            return deleted
+
+
+def purge_once() -> int:
+    db = SessionLocal()
+    try:
+        return purge(db)
+    finally:
+        db.close()
+
+
+async def purge_periodically():
+    """Фоновая задача удаления устаревших ключей"""
+    await background.run_periodically(PURGE_INTERVAL, purge_once, "Ошибка удаления ключей идемпотентности")
@@ -0,0 +1,61 @@
+"""Импорт выгрузки инвестиций платёжного провайдера
+
+Кэш ответов сбрасывается, только если он общий (CACHE_URL=redis://...):
+локальный кэш воркеров API из другого процесса недоступен, и до истечения
+CACHE_TTL_PROJECT, CACHE_TTL_FEATURED и CACHE_TTL_STATISTICS воркеры
+могут отдавать суммы проектов и статистику без импортированных инвестиций.
+
+Использование:
+    python import_investments.py settlement.csv
+    python import_investments.py pledges.ndjson --chunk-size 5000
+"""
+
+import argparse
+import os
+import sys
+
+from database import SessionLocal
+from bulk_investments import (
+    BatchReport, CHUNK_SIZE, FORMATS, import_chunk, iter_chunks, iter_file_records
+)
+from cache import response_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный импорт инвестиций")
+    parser.add_argument("path", help="Файл JSON, NDJSON или CSV с записями InvestmentCreate")
+    parser.add_argument("--format", choices=FORMATS, help="Формат файла (по умолчанию по расширению)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format
+    if not fmt:
+        extension = os.path.splitext(args.path)[1].lower().lstrip(".")
+        fmt = {"jsonl": "ndjson"}.get(extension, extension)
+    if fmt not in FORMATS:
+        parser.error("Не удалось определить формат файла, укажите --format")
+
+    report = BatchReport()
+    db = SessionLocal()
+    try:
+        for chunk in iter_chunks(iter_file_records(args.path, fmt), args.chunk_size):
+            import_chunk(db, chunk, report)
+            print(f"… обработано {report.total}, импортировано {report.imported}", file=sys.stderr)
+    finally:
+        db.close()
+        if response_cache.backend.shared:
+            response_cache.invalidate(
+                *(f"project:{project_id}" for project_id in report.project_ids),
+                "featured", "statistics"
+            )
+
+    print(f"✓ Импортировано {report.imported} из {report.total}")
+    if report.failed:
+        print(f"❌ Ошибок: {report.failed}")
+        for error in report.errors:
+            print(f"  строка {error['row']}: {error['error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
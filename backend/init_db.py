@@ -1,11 +1,14 @@
 """Инициализация базы данных с демо данными"""
 
 from datetime import datetime, timedelta
-from database import SessionLocal, engine, Base
+from database import SessionLocal
 from models import User, Category, Project
+import migrate
+import platform_stats
+import ranking
 
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
+# Схема и поисковый индекс (python migrate.py)
+migrate.upgrade()
 
 db = SessionLocal()
 
@@ -124,6 +127,10 @@ try:
     db.commit()
     print(f"✓ Создано {projects_created} проектов")
 
+    # Демо данные вставлены с готовыми суммами - пересчитываем статистику и рейтинги
+    platform_stats.reconcile(db)
+    ranking.rebuild(db)
+
     print("\n✅ База данных успешно инициализирована!")
     print("\nТестовые данные:")
     print("- Пользователь-создатель 1: creator1@example.com")
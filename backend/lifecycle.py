@@ -0,0 +1,184 @@
+"""Жизненный цикл кампаний: active -> funded | expired
+
+Статус хранится в projects.status. В дедлайн проект становится funded,
+если собрал цель, иначе expired. Списки по умолчанию показывают только
+активные кампании и читают индексы (status, ключ сортировки, id), не
+касаясь завершённых.
+
+Переходы выполняет фоновый планировщик каждого воркера. Раз в
+LIFECYCLE_REFRESH_INTERVAL секунд он читает по индексу (status, deadline)
+активные проекты с дедлайном до следующего чтения и держит их в
+min-heap по дедлайну; новые и изменённые проекты добавляются в heap
+обработчиками. Планировщик спит до ближайшего дедлайна, поэтому
+переход происходит в срок, а не при следующем запросе.
+
+Переход - условный UPDATE ... WHERE status = 'active': при нескольких
+воркерах проект переводит ровно один, и только он публикует событие
+status в поток проекта (events.py). Инвестиции проверяют и статус, и
+дедлайн: запоздавший переход не откроет завершённую кампанию.
+
+`python lifecycle.py` переводит все просроченные проекты сразу.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, update
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import Project
+from cache import response_cache
+import events
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "active"
+FUNDED = "funded"
+EXPIRED = "expired"
+STATUSES = (ACTIVE, FUNDED, EXPIRED)
+
+# Период чтения ближайших дедлайнов из БД в секундах (0 - планировщик отключён)
+REFRESH_INTERVAL = float(os.getenv("LIFECYCLE_REFRESH_INTERVAL", "60"))
+TRANSITION_CHUNK_SIZE = 1000
+
+
+def status_for(deadline: datetime, raised: float, goal: float, now: datetime) -> str:
+    """Статус кампании на момент now"""
+    if deadline > now:
+        return ACTIVE
+    return FUNDED if (raised or 0) >= goal else EXPIRED
+
+
+def accepts_pledges(status: str, deadline: datetime, now: datetime) -> bool:
+    return status == ACTIVE and deadline > now
+
+
+def transition_due(db, now: datetime) -> list:
+    """Перевести активные проекты с наступившим дедлайном
+
+    Возвращает [(project_id, status)] переведённых этим вызовом.
+    Пачки по TRANSITION_CHUNK_SIZE, каждая в своей транзакции.
+    """
+    table = Project.__table__
+    final_status = case((table.c.raised_amount >= table.c.goal, FUNDED), else_=EXPIRED)
+    transitioned = []
+    while True:
+        due = [
+            project_id for (project_id,) in db.query(Project.id).filter(
+                Project.status == ACTIVE, Project.deadline <= now
+            ).order_by(Project.deadline, Project.id).limit(TRANSITION_CHUNK_SIZE)
+        ]
+        if not due:
+            return transitioned
+        # Условие на статус повторяется: проект мог перевести другой воркер
+        rows = db.execute(
+            update(table)
+            .where(table.c.id.in_(due), table.c.status == ACTIVE, table.c.deadline <= now)
+            .values(status=final_status, updated_at=now)
+            .returning(table.c.id, table.c.status)
+        ).all()
+        db.commit()
+        transitioned.extend((row.id, row.status) for row in rows)
+        if len(due) < TRANSITION_CHUNK_SIZE:
+            return transitioned
+
+
+def publish(transitions: list, previous: str = ACTIVE):
+    """Сбросить кэш и опубликовать события переходов (после commit)"""
+    if not transitions:
+        return
+    response_cache.invalidate(
+        "featured", "statistics", *(f"project:{project_id}" for project_id, _ in transitions)
+    )
+    for project_id, status in transitions:
+        try:
+            events.broker.publish({
+                "type": "status",
+                "project_id": project_id,
+                "status": status,
+                "previous": previous,
+            })
+        except Exception:
+            logger.exception("Не удалось опубликовать событие")
+
+
+class Scheduler:
+    """Min-heap ближайших дедлайнов воркера"""
+
+    def __init__(self):
+        self.heap = []
+        self.loop = None
+        self.wakeup = None
+
+    def schedule(self, project_id: int, deadline: datetime):
+        """Учесть дедлайн нового или изменённого проекта (из потока обработчика)
+
+        Дальние дедлайны не добавляются: их прочитает следующее обновление heap.
+        """
+        if self.loop is None or deadline > datetime.utcnow() + timedelta(seconds=REFRESH_INTERVAL):
+            return
+        self.loop.call_soon_threadsafe(self._push, deadline, project_id)
+
+    def _push(self, deadline: datetime, project_id: int):
+        heapq.heappush(self.heap, (deadline, project_id))
+        self.wakeup.set()
+
+    def _load(self, horizon: datetime):
+        db = SessionLocal()
+        try:
+            return db.query(Project.deadline, Project.id).filter(
+                Project.status == ACTIVE, Project.deadline <= horizon
+            ).order_by(Project.deadline, Project.id).all()
+        finally:
+            db.close()
+
+    def _transition(self):
+        db = SessionLocal()
+        try:
+            return transition_due(db, datetime.utcnow())
+        finally:
+            db.close()
+
+    async def run(self):
+        """Фоновая задача: переходы в дедлайн"""
+        if REFRESH_INTERVAL <= 0:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        refresh_at = datetime.min
+        while True:
+            try:
+                now = datetime.utcnow()
+                if now >= refresh_at:
+                    refresh_at = now + timedelta(seconds=REFRESH_INTERVAL)
+                    self.heap = [tuple(row) for row in await run_in_threadpool(self._load, refresh_at)]
+                    heapq.heapify(self.heap)
+                if self.heap and self.heap[0][0] <= now:
+                    while self.heap and self.heap[0][0] <= now:
+                        heapq.heappop(self.heap)
+                    publish(await run_in_threadpool(self._transition))
+            except Exception:
+                logger.exception("Ошибка перевода статусов проектов")
+            wake_at = min(self.heap[0][0], refresh_at) if self.heap else refresh_at
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self.wakeup.wait(), max(0.0, (wake_at - datetime.utcnow()).total_seconds())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+scheduler = Scheduler()
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"✓ Переведено проектов: {len(transition_due(db, datetime.utcnow()))}")
+    finally:
+        db.close()
@@ -1,87 +1,325 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+import asyncio
+import contextlib
+import logging
+import os
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_, func
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from typing import List, Optional
 
-from database import engine, get_db, Base
+from database import (
+    get_db, get_read_db, read_connection, db_handler, run_db, pool_statistics, dispose_engines
+)
 from models import (
     Project, User, Investment, Review, Category
 )
 from schemas import (
     ProjectCreate, ProjectUpdate, ProjectResponse,
-    InvestmentCreate, InvestmentResponse,
+    InvestmentCreate, InvestmentResponse, FundingHistoryResponse,
     ReviewCreate, ReviewResponse,
     UserCreate, UserResponse,
-    CategoryResponse, SearchResponse
+    CategoryResponse, SearchResponse, SuggestResponse,
+    ProjectDetailResponse
 )
+from search_index import apply_search
+from pagination import paginate, NEXT_CURSOR_HEADER
+import platform_stats
+import bulk_investments
+import events
+from cache import response_cache
+import metrics
+import fast_json
+import conditional
+import ranking
+import rollups
+import ratings
+import idempotency
+import replicas
+import migrate
+import backpressure
+import lifecycle
+import suggest
+import export
+
+logger = logging.getLogger(__name__)
+
+# Применять миграции при старте воркера (для разработки с одним процессом);
+# в production схему обновляет `python migrate.py` перед запуском воркеров
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+# Адреса фронтенда через запятую. Запросы идут с cookie (чтение своих записей,
+# см. replicas.py), поэтому CORS отвечает точным адресом, а не "*"
+FRONTEND_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("FRONTEND_URL", "http://localhost:3000,http://127.0.0.1:3000").split(",")
+    if origin.strip()
+]
+
+
+async def check_schema() -> str:
+    """Ревизия схемы, если БД доступна и миграции применены, иначе None"""
+    try:
+        return await run_in_threadpool(migrate.check)
+    except Exception as e:
+        logger.warning("БД не готова: %s", e)
+        return None
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Старт воркера: проверка схемы и фоновые задачи; остановка: пулы соединений
+
+    Импорт main не обращается к БД: engine создаётся при первом запросе.
+    """
+    if AUTO_MIGRATE:
+        await run_in_threadpool(migrate.upgrade)
+    if await check_schema() is None:
+        logger.warning("Схема БД не совпадает с миграциями, выполните python migrate.py")
+    tasks = [
+        asyncio.create_task(platform_stats.reconcile_periodically()),
+        asyncio.create_task(ranking.rebuild_periodically()),
+        asyncio.create_task(idempotency.purge_periodically()),
+        asyncio.create_task(events.broker.run()),
+        asyncio.create_task(lifecycle.scheduler.run()),
+        asyncio.create_task(suggest.refresh_periodically()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await dispose_engines()
 
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="MDK Crowdfunding Platform",
     description="Платформа для краудфандинга проектов",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# CORS middleware
+# Ограничение одновременных запросов воркера, 503 при перегрузке (см. backpressure.py)
+app.add_middleware(backpressure.ConcurrencyLimitMiddleware)
+# CORS middleware (в том числе для ответов 503 при перегрузке)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, idempotency.REPLAYED_HEADER],
 )
+# Чтение своих записей из основной БД при репликах (см. replicas.py)
+if replicas.REPLICA_URLS:
+    app.add_middleware(replicas.PrimaryPinMiddleware)
+# Метрики запросов и Server-Timing (см. metrics.py)
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+# Ключи сортировки списка проектов: (колонки, по убыванию)
+PROJECT_SORTS = {
+    # Рейтинг с учётом скорости инвестиций, прогресса и дедлайна (ranking.py)
+    "popular": ([Project.hot_score, Project.id], True),
+    "new": ([Project.created_at, Project.id], True),
+    "ending": ([Project.deadline, Project.id], False),
+    # Средняя оценка из отзывов (ratings.py)
+    "rating": ([Project.rating_average, Project.id], True),
+}
+
+
+def cache_args(db: Session, *args) -> tuple:
+    """Аргументы ключа кэша ответа читающего обработчика
+
+    Ответ, прочитанный с реплики, кэшируется под отдельным ключом: клиент,
+    читающий из основной БД после своей записи, не получит из общего
+    кэша отстающие данные реплики.
+    """
+    return (*args, "replica") if "replica" in db.info else args
+
 
 # ==================== PROJECTS ====================
 
 @app.get("/api/projects", response_model=List[ProjectResponse])
+@db_handler
 def get_projects(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     category: Optional[str] = None,
     search: Optional[str] = None,
-    sort_by: Optional[str] = Query("popular", regex="^(popular|new|ending)$"),
-    db: Session = Depends(get_db)
+    sort_by: Optional[str] = Query("popular", pattern="^(popular|new|ending|rating)$"),
+    status: str = Query(lifecycle.ACTIVE, pattern="^(active|funded|expired|all)$"),
+    cursor: Optional[str] = None,
+    request: Request = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Получить список всех проектов с фильтрацией и сортировкой"""
-    query = db.query(Project)
+    """Получить список проектов с фильтрацией и сортировкой
+
+    По умолчанию - только активные кампании (status=all - все).
+    Для постраничного обхода без OFFSET передайте курсор из заголовка X-Next-Cursor.
+    Выбираются только колонки ответа, сериализация - fast_json.
+    ETag страницы строится из версий её строк (см. conditional.py).
+    """
+    def filtered(query):
+        # Статус - первая колонка индексов сортировки (для all - все три диапазона)
+        if status == "all":
+            query = query.filter(Project.status.in_(lifecycle.STATUSES))
+        else:
+            query = query.filter(Project.status == status)
+
+        # Фильтр по категории
+        if category:
+            query = query.join(Category, Project.category_id == Category.id).filter(Category.name == category)
+        
+        # Поиск по названию и описанию
+        if search:
+            query = apply_search(query, search)
+        return query
     
-    # Фильтр по категории
-    if category:
-        query = query.join(Category).filter(Category.name == category)
+    # Сортировка и пагинация
+    columns, descending = PROJECT_SORTS[sort_by]
+
+    # Для If-None-Match сначала выбираются только версии строк страницы
+    if "if-none-match" in request.headers:
+        versions = paginate(
+            filtered(db.query(Project.id, Project.updated_at)),
+            sort_by, columns, descending, skip, limit, cursor
+        )
+        etag = conditional.rows_etag("projects", versions)
+        if conditional.is_not_modified(request, etag):
+            return conditional.not_modified("projects", etag)
+
+    # Ключ сортировки нужен для курсора, даже если его нет в ответе (hot_score)
+    sort_columns = [c for c in columns if c.key not in fast_json.PROJECT_FIELDS]
+    rows = paginate(
+        filtered(db.query(*fast_json.PROJECT_COLUMNS, *sort_columns)),
+        sort_by, columns, descending, skip, limit, cursor, response
+    )
+    response.headers.update(
+        conditional.validator_headers("projects", conditional.rows_etag("projects", rows))
+    )
+    return fast_json.project_list_response(rows, response)
+
+
+@app.get("/api/projects/{project_id}", response_model=ProjectResponse)
+@db_handler
+def get_project(
+    project_id: int,
+    request: Request = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db)
+):
+    """Получить детали проекта по ID
+
+    Поддерживает If-None-Match и If-Modified-Since: для проверки читается
+    только updated_at (на PostgreSQL - index-only scan по ix_projects_id_updated_at).
+    """
+    if conditional.has_validators(request):
+        version = db.query(Project.updated_at).filter(Project.id == project_id).first()
+        if not version:
+            raise HTTPException(status_code=404, detail="Проект не найден")
+        etag = conditional.project_etag(project_id, version.updated_at)
+        if conditional.is_not_modified(request, etag, version.updated_at):
+            return conditional.not_modified("project", etag, version.updated_at)
+
+    def load():
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Проект не найден")
+        return ProjectResponse.model_validate(project).model_dump(mode="json")
     
-    # Поиск по названию и описанию
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(or_(
-            Project.title.ilike(search_term),
-            Project.description.ilike(search_term)
-        ))
+    project = response_cache.get_or_load(
+        "project", cache_args(db, project_id), [f"project:{project_id}"], load
+    )
+    # Валидаторы - по версии отдаваемого тела, даже если оно из кэша
+    updated_at = datetime.fromisoformat(project["updated_at"])
+    response.headers.update(conditional.validator_headers(
+        "project", conditional.project_etag(project_id, updated_at), updated_at
+    ))
+    return project
+
+
+@app.get("/api/projects/{project_id}/details", response_model=ProjectDetailResponse)
+@db_handler
+def get_project_details(
+    project_id: int,
+    investments_limit: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Получить проект с категорией, автором, последними инвестициями и рейтингом
+
+    Всегда два запроса: проект вместе с категорией и автором (JOIN) и
+    последние инвестиции; оценки берутся из агрегатов проекта.
+    """
+    project = db.query(Project).options(
+        joinedload(Project.category), joinedload(Project.creator)
+    ).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Проект не найден")
     
-    # Сортировка
-    if sort_by == "popular":
-        query = query.order_by(desc(Project.backers_count))
-    elif sort_by == "new":
-        query = query.order_by(desc(Project.created_at))
-    elif sort_by == "ending":
-        query = query.order_by(Project.deadline)
+    investments = db.query(Investment).filter(
+        Investment.project_id == project_id
+    ).order_by(desc(Investment.created_at), desc(Investment.id)).limit(investments_limit).all()
     
-    return query.offset(skip).limit(limit).all()
+    return {
+        **ProjectResponse.model_validate(project).model_dump(),
+        "category": project.category,
+        "creator": project.creator,
+        "recent_investments": investments,
+        "rating": ratings.summary(project),
+    }
 
 
-@app.get("/api/projects/{project_id}", response_model=ProjectResponse)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    """Получить детали проекта по ID"""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+@app.get("/api/projects/{project_id}/stream")
+async def stream_project_funding(project_id: int, db: Session = Depends(get_db)):
+    """Поток SSE со сбором средств проекта
+
+    Первое событие snapshot содержит текущие raised_amount, backers_count и status,
+    далее после каждой инвестиции приходят события funding с приростом,
+    а при завершении кампании - событие status (см. lifecycle.py).
+    Подписка создаётся до чтения снимка, поэтому инвестиция между ними
+    не теряется; события, уже учтённые в снимке, пропускаются (events.stream).
+    """
+    def load(session):
+        row = session.query(
+            Project.raised_amount, Project.backers_count, Project.goal, Project.status
+        ).filter(Project.id == project_id).first()
+        # Соединение возвращается в пул до начала долгого потока
+        session.close()
+        return row
+    
+    subscription = events.hub.subscribe(project_id)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Слишком много подписчиков")
+    try:
+        row = await run_db(db, load)
+    except BaseException:
+        events.hub.unsubscribe(subscription)
+        raise
+    if not row:
+        events.hub.unsubscribe(subscription)
         raise HTTPException(status_code=404, detail="Проект не найден")
-    return project
+    
+    snapshot = {
+        "project_id": project_id,
+        "raised_amount": row.raised_amount,
+        "backers_count": row.backers_count,
+        "goal": row.goal,
+        "status": row.status,
+    }
+    return StreamingResponse(
+        events.stream(subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.post("/api/projects", response_model=ProjectResponse)
+@db_handler
 def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
     """Создать новый проект"""
     # Проверка категории
@@ -91,6 +329,8 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         db.add(category)
         db.commit()
         db.refresh(category)
+        platform_stats.register_category(db, category.id)
+        suggest.categories.add(category.id, category.name)
     
     db_project = Project(
         title=project.title,
@@ -98,16 +338,23 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         image_url=project.image_url,
         goal=project.goal,
         deadline=project.deadline,
+        status=lifecycle.status_for(project.deadline, 0, project.goal, datetime.utcnow()),
         category_id=category.id,
         creator_id=project.creator_id
     )
+    db_project.hot_score = ranking.score_new_project(db_project)
     db.add(db_project)
+    platform_stats.record_project(db, category.id)
     db.commit()
     db.refresh(db_project)
+    lifecycle.scheduler.schedule(db_project.id, db_project.deadline)
+    suggest.projects.add(db_project.id, db_project.title)
+    response_cache.invalidate("featured", "categories", "statistics")
     return db_project
 
 
 @app.put("/api/projects/{project_id}", response_model=ProjectResponse)
+@db_handler
 def update_project(
     project_id: int,
     project: ProjectUpdate,
@@ -126,83 +373,187 @@ def update_project(
                 category = Category(name=value)
                 db.add(category)
                 db.commit()
+                platform_stats.register_category(db, category.id)
+                suggest.categories.add(category.id, category.name)
+            if category.id != db_project.category_id:
+                platform_stats.move_project(
+                    db, db_project.category_id, category.id,
+                    db_project.raised_amount, db_project.backers_count
+                )
             db_project.category_id = category.id
         else:
             setattr(db_project, field, value)
     
+    # Цель и срок входят в рейтинг и определяют статус (продление срока открывает кампанию)
+    previous = db_project.status
+    if "goal" in update_data or "deadline" in update_data:
+        ranking.refresh_project(db_project)
+        db_project.status = lifecycle.status_for(
+            db_project.deadline, db_project.raised_amount, db_project.goal, datetime.utcnow()
+        )
+    
     db.commit()
     db.refresh(db_project)
+    response_cache.invalidate(
+        f"project:{project_id}", "featured", "categories", "statistics"
+    )
+    if db_project.status != previous:
+        lifecycle.publish([(project_id, db_project.status)], previous)
+    if db_project.status == lifecycle.ACTIVE:
+        lifecycle.scheduler.schedule(project_id, db_project.deadline)
+    if "title" in update_data:
+        suggest.projects.add(project_id, db_project.title)
     return db_project
 
 
 # ==================== INVESTMENTS ====================
 
 @app.post("/api/investments", response_model=InvestmentResponse)
+@db_handler
 def create_investment(
     investment: InvestmentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency.MAX_KEY_LENGTH),
     db: Session = Depends(get_db)
 ):
-    """Создать инвестицию (поддержать проект)"""
-    # Проверка проекта
-    project = db.query(Project).filter(Project.id == investment.project_id).first()
-    if not project:
+    """Создать инвестицию (поддержать проект)
+
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает
+    сохранённый ответ и не создаёт вторую инвестицию.
+    """
+    if idempotency_key:
+        replay = idempotency.claim(db, "investments", idempotency_key, investment)
+        if replay is not None:
+            return replay
+    
+    # Проверка проекта, статуса и пользователя одним запросом
+    now = datetime.utcnow()
+    row = db.query(
+        Project.status, Project.deadline, Project.category_id, User.id,
+        Project.pledge_velocity, Project.velocity_updated_at, Project.raised_amount, Project.goal,
+        rollups.last_pledge_today(investment.project_id, investment.user_id, now)
+    ).select_from(Project).outerjoin(
+        User, User.id == investment.user_id
+    ).filter(Project.id == investment.project_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Проект не найден")
     
-    # Проверка срока проекта
-    if project.deadline < datetime.utcnow():
+    status, deadline, category_id, user_id, velocity, velocity_at, raised, goal, last_pledge = row
+    if not lifecycle.accepts_pledges(status, deadline, now):
         raise HTTPException(status_code=400, detail="Проект завершён")
     
-    # Проверка пользователя
-    user = db.query(User).filter(User.id == investment.user_id).first()
-    if not user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
     db_investment = Investment(
         amount=investment.amount,
         project_id=investment.project_id,
         user_id=investment.user_id,
-        message=investment.message
+        message=investment.message,
+        created_at=now
     )
+    db.add(db_investment)
     
-    # Обновление статистики проекта
-    project.raised_amount += investment.amount
-    project.backers_count += 1
+    # Атомарное обновление статистики и рейтинга проекта (UPDATE ... SET x = x + :delta),
+    # чтобы параллельные инвестиции не теряли обновления
+    factor, score = ranking.pledge_effect(
+        velocity, velocity_at, raised, goal, deadline, 1, investment.amount, now
+    )
+    db.query(Project).filter(Project.id == investment.project_id).update({
+        Project.raised_amount: Project.raised_amount + investment.amount,
+        Project.backers_count: Project.backers_count + 1,
+        **ranking.pledge_columns(factor, score, 1, now)
+    }, synchronize_session=False)
+    # Номер инвестиции проекта для потока событий: строка заблокирована UPDATE до commit
+    backers_count = db.query(Project.backers_count).filter(Project.id == investment.project_id).scalar()
+    platform_stats.record_investment(db, category_id, investment.amount)
+    rollups.record(db, rollups.pledge_deltas(
+        investment.project_id, [(investment.user_id, investment.amount)],
+        {investment.user_id: last_pledge}, now
+    ))
     
-    db.add(db_investment)
-    db.commit()
+    idempotency.commit(db, "investments", idempotency_key, InvestmentResponse, db_investment)
     db.refresh(db_investment)
+    response_cache.invalidate(
+        f"project:{investment.project_id}", "featured", "statistics"
+    )
+    events.publish_funding(investment.project_id, investment.amount, backers_count=backers_count)
     return db_investment
 
 
+@app.post("/api/investments/batch")
+async def create_investments_batch(request: Request, db: Session = Depends(get_db)):
+    """Пакетный импорт инвестиций (JSON-массив, NDJSON или CSV)
+
+    Формат определяется по Content-Type. Ошибочные строки возвращаются
+    в отчёте и не прерывают импорт остальных.
+    """
+    fmt = bulk_investments.detect_format(request.headers.get("content-type"))
+    report = bulk_investments.BatchReport()
+    try:
+        async for chunk in bulk_investments.aiter_request_chunks(request, fmt):
+            await run_db(db, bulk_investments.import_chunk, chunk, report)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Некорректные данные: {e}")
+    finally:
+        response_cache.invalidate(
+            *(f"project:{project_id}" for project_id in report.project_ids),
+            "featured", "statistics"
+        )
+    return report.as_dict()
+
+
 @app.get("/api/investments/project/{project_id}", response_model=List[InvestmentResponse])
+@db_handler
 def get_project_investments(
     project_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db)
 ):
     """Получить инвестиции проекта"""
-    return db.query(Investment).filter(
-        Investment.project_id == project_id
-    ).offset(skip).limit(limit).all()
+    query = db.query(Investment).filter(Investment.project_id == project_id)
+    return paginate(
+        query, "created", [Investment.created_at, Investment.id], False,
+        skip, limit, cursor, response
+    )
+
+
+@app.get("/api/projects/{project_id}/funding-history", response_model=FundingHistoryResponse)
+@db_handler
+def get_funding_history(
+    project_id: int,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """История сбора проекта: итоги инвестиций по часам или дням (UTC)"""
+    return {
+        "project_id": project_id,
+        "granularity": granularity,
+        "buckets": rollups.read_series(db, project_id, granularity, start, end),
+    }
 
 
 # ==================== REVIEWS ====================
 
 @app.post("/api/reviews", response_model=ReviewResponse)
+@db_handler
 def create_review(
     review: ReviewCreate,
     db: Session = Depends(get_db)
 ):
     """Создать отзыв о проекте"""
-    # Проверка проекта
-    project = db.query(Project).filter(Project.id == review.project_id).first()
-    if not project:
+    # Проверка проекта и пользователя одним запросом
+    row = db.query(Project.id, User.id).select_from(Project).outerjoin(
+        User, User.id == review.user_id
+    ).filter(Project.id == review.project_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Проект не найден")
     
-    # Проверка пользователя
-    user = db.query(User).filter(User.id == review.user_id).first()
-    if not user:
+    if row[1] is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
     db_review = Review(
@@ -212,29 +563,50 @@ def create_review(
         user_id=review.user_id
     )
     db.add(db_review)
+    ratings.record_review(db, review.project_id, review.rating)
     db.commit()
     db.refresh(db_review)
+    response_cache.invalidate(f"project:{review.project_id}", "featured")
     return db_review
 
 
 @app.get("/api/reviews/project/{project_id}", response_model=List[ReviewResponse])
+@db_handler
 def get_project_reviews(
     project_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db)
 ):
     """Получить отзывы проекта"""
-    return db.query(Review).filter(
-        Review.project_id == project_id
-    ).order_by(desc(Review.created_at)).offset(skip).limit(limit).all()
+    query = db.query(Review).filter(Review.project_id == project_id)
+    return paginate(
+        query, "created", [Review.created_at, Review.id], True,
+        skip, limit, cursor, response
+    )
 
 
 # ==================== USERS ====================
 
 @app.post("/api/users", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Создать нового пользователя"""
+@db_handler
+def create_user(
+    user: UserCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=idempotency.MAX_KEY_LENGTH),
+    db: Session = Depends(get_db)
+):
+    """Создать нового пользователя
+
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает
+    сохранённый ответ.
+    """
+    if idempotency_key:
+        replay = idempotency.claim(db, "users", idempotency_key, user)
+        if replay is not None:
+            return replay
+    
     # Проверка на уникальность email
     existing_user = db.query(User).filter(User.email == user.email).first()
     if existing_user:
@@ -246,13 +618,21 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         full_name=user.full_name
     )
     db.add(db_user)
-    db.commit()
+    platform_stats.record_user(db)
+    try:
+        idempotency.commit(db, "users", idempotency_key, UserResponse, db_user)
+    except IntegrityError:
+        # Параллельная регистрация с тем же email или именем прошла раньше
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email или имя пользователя уже зарегистрированы")
     db.refresh(db_user)
+    response_cache.invalidate("statistics")
     return db_user
 
 
 @app.get("/api/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+@db_handler
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     """Получить пользователя по ID"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -263,12 +643,25 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 # ==================== CATEGORIES ====================
 
 @app.get("/api/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
-    """Получить все категории"""
-    return db.query(Category).all()
+@db_handler
+def get_categories(request: Request = None, db: Session = Depends(get_read_db)):
+    """Получить все категории
+
+    У категорий нет версии строк, поэтому ETag строится по содержимому
+    закэшированного ответа.
+    """
+    content = response_cache.get_or_load("categories", cache_args(db), ["categories"], lambda: fast_json.dumps([
+        {"id": category_id, "name": name}
+        for category_id, name in db.query(Category.id, Category.name)
+    ]).decode())
+    etag = conditional.content_etag(content.encode())
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified("categories", etag)
+    return fast_json.RawJSONResponse(content, headers=conditional.validator_headers("categories", etag))
 
 
 @app.post("/api/categories", response_model=CategoryResponse)
+@db_handler
 def create_category(name: str, db: Session = Depends(get_db)):
     """Создать новую категорию"""
     existing = db.query(Category).filter(Category.name == name).first()
@@ -277,67 +670,152 @@ def create_category(name: str, db: Session = Depends(get_db)):
     
     category = Category(name=name)
     db.add(category)
+    db.flush()
+    platform_stats.register_category(db, category.id)
     db.commit()
     db.refresh(category)
+    suggest.categories.add(category.id, category.name)
+    response_cache.invalidate("categories", "statistics")
     return category
 
 
+# ==================== EXPORT ====================
+
+@app.get("/api/export/{kind}")
+async def export_rows(
+    kind: str,
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    project_id: Optional[int] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = Query(None, alias="from"),
+    created_to: Optional[datetime] = Query(None, alias="to"),
+    gzip: bool = False
+):
+    """Потоковая выгрузка инвестиций или проектов (CSV или NDJSON, см. export.py)
+
+    Фильтры: проект, категория и created_at в [from, to). С gzip=true
+    ответ - сжатый файл выгрузки. Читается с реплики, как get_read_db.
+    """
+    if kind not in export.EXPORTS:
+        raise HTTPException(status_code=404, detail="Неизвестная выгрузка")
+    chunks = export.export(
+        kind, format, gzip, connect=lambda: read_connection(request),
+        project_id=project_id, category=category,
+        created_from=created_from, created_to=created_to,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{export.filename(kind, format, gzip)}"'},
+        # Выполняется и после разрыва соединения: курсор закрывается, соединение возвращается в пул
+        background=BackgroundTask(chunks.close)
+    )
+
+
 # ==================== SEARCH & STATISTICS ====================
 
 @app.get("/api/search", response_model=SearchResponse)
+@db_handler
 def search(
     q: str = Query(..., min_length=1),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Поиск проектов"""
-    search_term = f"%{q}%"
-    projects = db.query(Project).filter(or_(
-        Project.title.ilike(search_term),
-        Project.description.ilike(search_term)
-    )).limit(20).all()
+    rows = apply_search(db.query(*fast_json.PROJECT_COLUMNS), q, ranked=True).limit(20).all()
     
-    return SearchResponse(
-        query=q,
-        results=projects,
-        total=len(projects)
-    )
+    return fast_json.RawJSONResponse(fast_json.dumps({
+        "query": q,
+        "results": fast_json.project_rows(rows),
+        "total": len(rows)
+    }))
+
+
+@app.get("/api/suggest", response_model=SuggestResponse)
+async def get_suggestions(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(suggest.DEFAULT_LIMIT, ge=1, le=suggest.MAX_LIMIT)
+):
+    """Подсказки для строки поиска: id и названия проектов и категорий
+
+    Отвечает из индекса в памяти воркера, без обращения к БД (suggest.py).
+    """
+    if not suggest.ready:
+        raise HTTPException(
+            status_code=503, detail="Индекс подсказок загружается",
+            headers={"Retry-After": str(suggest.RETRY_INTERVAL)}
+        )
+    return fast_json.RawJSONResponse(fast_json.dumps(suggest.suggest(q, limit)))
 
 
 @app.get("/api/statistics")
-def get_statistics(db: Session = Depends(get_db)):
-    """Получить статистику платформы"""
-    total_projects = db.query(func.count(Project.id)).scalar()
-    total_raised = db.query(func.sum(Project.raised_amount)).scalar() or 0
-    total_backers = db.query(func.sum(Project.backers_count)).scalar() or 0
-    total_users = db.query(func.count(User.id)).scalar()
-    
-    return {
-        "total_projects": total_projects,
-        "total_raised": total_raised,
-        "total_backers": total_backers,
-        "total_users": total_users
-    }
+@db_handler
+def get_statistics(db: Session = Depends(get_read_db)):
+    """Получить статистику платформы с разбивкой по категориям"""
+    return response_cache.get_or_load(
+        "statistics", cache_args(db), ["statistics"], lambda: platform_stats.read_statistics(db)
+    )
 
 
 @app.get("/api/featured-projects", response_model=List[ProjectResponse])
+@db_handler
 def get_featured_projects(
     limit: int = Query(6, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получить избранные проекты"""
-    return db.query(Project).order_by(
-        desc(Project.raised_amount)
-    ).limit(limit).all()
+    # В кэше - готовый JSON-текст списка
+    content = response_cache.get_or_load("featured", cache_args(db, limit), ["featured"], lambda: fast_json.dumps(
+        fast_json.project_rows(
+            db.query(*fast_json.PROJECT_COLUMNS).filter(Project.status == lifecycle.ACTIVE)
+            .order_by(desc(Project.hot_score), desc(Project.id)).limit(limit)
+        )
+    ).decode())
+    return fast_json.RawJSONResponse(content)
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Счётчики кэша ответов (попадания, промахи, вытеснения)"""
+    return response_cache.stats()
+
+
+@app.get("/api/events/stats")
+async def get_events_stats():
+    """Подписчики потока событий и отключения медленных клиентов"""
+    return events.hub.stats()
+
+
+@app.get("/api/pool/stats")
+async def get_pool_stats():
+    """Состояние пула соединений БД (занятые, overflow, время ожидания)"""
+    return pool_statistics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Метрики маршрутов в формате Prometheus"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # ==================== HEALTH CHECK ====================
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Проверка здоровья"""
     return {"status": "ok", "message": "MDK Crowdfunding is running"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Готовность воркера: БД доступна и схема обновлена до последней миграции"""
+    revision = await check_schema()
+    if revision is None:
+        raise HTTPException(status_code=503, detail="База данных недоступна или миграции не применены")
+    return {"status": "ready", "revision": revision}
+
+
 if __name__ == "__main__":
+    # Один процесс для разработки; production - python serve.py (несколько воркеров)
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
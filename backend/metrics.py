@@ -0,0 +1,278 @@
+"""Метрики запросов API и SQL в формате Prometheus
+
+RequestMetricsMiddleware замеряет каждый HTTP-запрос, а обработчики
+событий engine считают SQL-запросы этого запроса: их число, время в
+БД и загруженные строки (ORM-объекты и строки, изменённые DML).
+По шаблону маршрута строятся гистограммы задержки, числа запросов,
+строк и размера ответа; GET /metrics отдаёт их в текстовом формате
+Prometheus. Медленные SQL-запросы пишутся в лог.
+
+Заголовок Server-Timing показывает время в БД (db), в обработчике
+(handler) и остальное время до начала ответа - валидацию и
+сериализацию (serialize).
+
+Метрики считаются в памяти процесса: при нескольких воркерах каждый
+отдаёт свои.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from config import env_bool
+
+logger = logging.getLogger(__name__)
+
+
+# Порог медленного SQL-запроса в миллисекундах (0 - не логировать)
+SLOW_QUERY_MS = float(os.getenv("METRICS_SLOW_QUERY_MS", "200"))
+# Добавлять заголовок Server-Timing к ответам
+SERVER_TIMING = env_bool("METRICS_SERVER_TIMING", "true")
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# Маршрут запросов, не совпавших ни с одним обработчиком
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """Счётчики текущего HTTP-запроса"""
+
+    __slots__ = ("scope", "queries", "db_time", "rows", "handler_time")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.handler_time = None
+
+    @property
+    def route(self) -> str:
+        # Маршрутизатор FastAPI записывает найденный маршрут в scope
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+# Контекст копируется в потоки пула и гринлеты AsyncSession, поэтому
+# SQL из обработчика попадает в статистику своего запроса
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class Histogram:
+    """Гистограмма Prometheus с накопительными корзинами"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {round(self.sum, 6)}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Время обработки запроса", LATENCY_BUCKETS),
+    "http_request_db_seconds": ("Время SQL-запросов на один HTTP-запрос", LATENCY_BUCKETS),
+    "http_request_db_queries": ("Число SQL-запросов на один HTTP-запрос", QUERY_BUCKETS),
+    "http_request_db_rows": ("Строк загружено или изменено за HTTP-запрос", ROW_BUCKETS),
+    "http_response_bytes": ("Размер тела ответа", BYTE_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """Гистограммы и счётчики по (метод, маршрут)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+        self.responses = {}
+        self.slow_queries = 0
+
+    def observe(self, method: str, route: str, status: int, duration: float,
+                stats: RequestStats, response_bytes: int):
+        key = (method, route)
+        with self._lock:
+            histograms = self.routes.get(key)
+            if histograms is None:
+                histograms = self.routes[key] = {
+                    name: Histogram(buckets) for name, (_, buckets) in HISTOGRAMS.items()
+                }
+            histograms["http_request_duration_seconds"].observe(duration)
+            histograms["http_request_db_seconds"].observe(stats.db_time)
+            histograms["http_request_db_queries"].observe(stats.queries)
+            histograms["http_request_db_rows"].observe(stats.rows)
+            histograms["http_response_bytes"].observe(response_bytes)
+            status_key = (method, route, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Число HTTP-запросов",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                    f'status="{status}"}} {count}'
+                )
+            for name, (help_text, _) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histograms in sorted(self.routes.items()):
+                    lines.extend(histograms[name].render(
+                        name, f'method="{method}",route="{_escape(route)}"'
+                    ))
+            lines.extend([
+                "# HELP db_slow_queries_total SQL-запросы дольше METRICS_SLOW_QUERY_MS",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries}",
+            ])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def install_query_metrics(engine):
+    """Считать SQL-запросы engine в статистике текущего HTTP-запроса"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            if context.isupdate or context.isdelete or context.isinsert:
+                stats.rows += max(cursor.rowcount, 0)
+        if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+            registry.record_slow_query()
+            logger.warning(
+                "Медленный SQL-запрос (%.1f мс, маршрут %s): %s",
+                elapsed * 1000,
+                stats.route if stats else "-",
+                " ".join(statement.split())[:1000],
+            )
+
+
+def install_row_metrics(base):
+    """Считать ORM-объекты, загруженные из БД, строками текущего запроса"""
+
+    @event.listens_for(base, "load", propagate=True)
+    def on_load(target, context):
+        stats = current_request.get()
+        if stats is not None:
+            stats.rows += 1
+
+
+@contextmanager
+def track_handler():
+    """Замер времени обработчика для Server-Timing (используется в run_db)"""
+    stats = current_request.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.handler_time = (stats.handler_time or 0.0) + time.perf_counter() - started
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    parts = [f"db;dur={stats.db_time * 1000:.2f};desc=\"{stats.queries} queries\""]
+    if stats.handler_time is not None:
+        parts.append(f"handler;dur={stats.handler_time * 1000:.2f}")
+        parts.append(f"serialize;dur={max(total - stats.handler_time, 0) * 1000:.2f}")
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware: метрики запроса и заголовок Server-Timing
+
+    Написан без BaseHTTPMiddleware, чтобы не буферизовать потоковые ответы (SSE).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((
+                        b"server-timing",
+                        server_timing(stats, time.perf_counter() - started).encode(),
+                    ))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            registry.observe(
+                scope["method"], stats.route, status,
+                time.perf_counter() - started, stats, response_bytes,
+            )
@@ -0,0 +1,71 @@
+"""Схема БД: миграции и проверка готовности
+
+Схема создаётся и обновляется отдельной командой перед запуском
+воркеров, а не при импорте main:
+
+    python migrate.py
+
+Команда применяет миграции Alembic до head и создаёт полнотекстовый
+индекс (search_index.py). Воркер при старте и GET /ready только читают
+версию схемы одним запросом: пока миграции не применены, /ready
+отвечает 503. Alembic импортируется при первой проверке, а не с main.
+"""
+
+import os
+
+from database import get_engine
+import search_index
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_head = None
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    # Не перенастраивать логирование процесса (migrations/env.py)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def head_revision() -> str:
+    """Последняя ревизия в migrations/versions (читается один раз)"""
+    global _head
+    if _head is None:
+        from alembic.script import ScriptDirectory
+
+        _head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    return _head
+
+
+def upgrade() -> str:
+    """Применить миграции до head и создать поисковый индекс"""
+    from alembic import command
+
+    command.upgrade(alembic_config(), "head")
+    search_index.setup_search_index(get_engine())
+    return head_revision()
+
+
+def check() -> str:
+    """Текущая ревизия схемы, если она совпадает с head, иначе None
+
+    Заодно определяет, есть ли полнотекстовый индекс. Ошибка подключения
+    к БД пробрасывается.
+    """
+    from alembic.runtime.migration import MigrationContext
+
+    engine = get_engine()
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+        if current != head_revision():
+            return None
+        search_index.detect_search_index(connection)
+    return current
+
+
+if __name__ == "__main__":
+    print(f"✓ Схема БД обновлена до ревизии {upgrade()}")
@@ -0,0 +1,117 @@
+"""Исходная схема
+
+Таблицы, которые раньше создавались через Base.metadata.create_all.
+Существующие таблицы пропускаются, поэтому миграцию можно применять к
+базе, созданной create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(50), nullable=False),
+            sa.Column("email", sa.String(100), nullable=False),
+            sa.Column("full_name", sa.String(100)),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if _missing("categories"):
+        op.create_table(
+            "categories",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(50), nullable=False),
+        )
+        op.create_index("ix_categories_id", "categories", ["id"])
+        op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    if _missing("projects"):
+        op.create_table(
+            "projects",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("image_url", sa.String(500)),
+            sa.Column("goal", sa.Float(), nullable=False),
+            sa.Column("raised_amount", sa.Float()),
+            sa.Column("backers_count", sa.Integer()),
+            sa.Column("deadline", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False),
+            sa.Column("creator_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_projects_id", "projects", ["id"])
+        op.create_index("ix_projects_title", "projects", ["title"])
+
+    if _missing("investments"):
+        op.create_table(
+            "investments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("message", sa.Text()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_investments_id", "investments", ["id"])
+
+    if _missing("reviews"):
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("rating", sa.Integer()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_reviews_id", "reviews", ["id"])
+
+    if _missing("platform_statistics"):
+        op.create_table(
+            "platform_statistics",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("total_projects", sa.Integer(), nullable=False),
+            sa.Column("total_raised", sa.Float(), nullable=False),
+            sa.Column("total_backers", sa.Integer(), nullable=False),
+            sa.Column("total_users", sa.Integer(), nullable=False),
+            sa.Column("reconciled_at", sa.DateTime()),
+        )
+
+    if _missing("category_statistics"):
+        op.create_table(
+            "category_statistics",
+            sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), primary_key=True),
+            sa.Column("total_projects", sa.Integer(), nullable=False),
+            sa.Column("total_raised", sa.Float(), nullable=False),
+            sa.Column("total_backers", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    for table in (
+        "category_statistics", "platform_statistics", "reviews",
+        "investments", "projects", "categories", "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,39 @@
+"""Составные индексы под фильтры и сортировки обработчиков main.py
+
+- projects: сортировки popular/new/ending и featured, те же сортировки
+  внутри категории;
+- investments, reviews: выборка по project_id в порядке created_at.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_projects_backers_count_id", "projects", ["backers_count", "id"]),
+    ("ix_projects_created_at_id", "projects", ["created_at", "id"]),
+    ("ix_projects_deadline_id", "projects", ["deadline", "id"]),
+    ("ix_projects_raised_amount_id", "projects", ["raised_amount", "id"]),
+    ("ix_projects_category_id_backers_count_id", "projects", ["category_id", "backers_count", "id"]),
+    ("ix_projects_category_id_created_at_id", "projects", ["category_id", "created_at", "id"]),
+    ("ix_projects_category_id_deadline_id", "projects", ["category_id", "deadline", "id"]),
+    ("ix_investments_project_id_created_at_id", "investments", ["project_id", "created_at", "id"]),
+    ("ix_reviews_project_id_created_at_id", "reviews", ["project_id", "created_at", "id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,21 @@
+"""Покрывающий индекс версии проекта (id, updated_at) для ETag
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_projects_id_updated_at", "projects", ["id", "updated_at"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_projects_id_updated_at", table_name="projects", if_exists=True)
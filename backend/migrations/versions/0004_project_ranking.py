@@ -0,0 +1,62 @@
+"""Рейтинг проектов (hot score)
+
+- projects: pledge_velocity, velocity_updated_at, hot_score и индексы
+  рейтинга вместо индексов по backers_count и raised_amount, которые
+  больше не используются сортировками (и обновлялись при каждой инвестиции);
+- investments: индекс (created_at, project_id) для пересчёта рейтингов.
+
+После миграции рейтинги заполняются командой `python ranking.py`.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+NEW_INDEXES = [
+    ("ix_projects_hot_score_id", "projects", ["hot_score", "id"]),
+    ("ix_projects_category_id_hot_score_id", "projects", ["category_id", "hot_score", "id"]),
+    ("ix_investments_created_at_project_id", "investments", ["created_at", "project_id"]),
+]
+
+OLD_INDEXES = [
+    ("ix_projects_backers_count_id", "projects", ["backers_count", "id"]),
+    ("ix_projects_raised_amount_id", "projects", ["raised_amount", "id"]),
+    ("ix_projects_category_id_backers_count_id", "projects", ["category_id", "backers_count", "id"]),
+]
+
+
+COLUMNS = [
+    sa.Column("pledge_velocity", sa.Float(), nullable=False, server_default="0"),
+    sa.Column("velocity_updated_at", sa.DateTime(), nullable=True),
+    sa.Column("hot_score", sa.Float(), nullable=False, server_default="0"),
+]
+
+
+def upgrade():
+    # База, созданная create_all по новым моделям, уже содержит колонки
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("projects")}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("projects", column)
+    for name, table, columns in NEW_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, _ in OLD_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade():
+    for name, table, columns in OLD_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, _ in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    with op.batch_alter_table("projects") as batch:
+        for column in reversed(COLUMNS):
+            batch.drop_column(column.name)
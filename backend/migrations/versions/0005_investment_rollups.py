@@ -0,0 +1,44 @@
+"""Итоги инвестиций по часам и дням
+
+- investment_rollups: сумма, число инвестиций и уникальные инвесторы
+  проекта за интервал;
+- investments: индекс (project_id, user_id, created_at) для проверки
+  уникальности инвестора в интервале.
+
+После миграции итоги заполняются командой `python rollups.py`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEX = ("ix_investments_project_id_user_id_created_at", "investments", ["project_id", "user_id", "created_at"])
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("investment_rollups"):
+        op.create_table(
+            "investment_rollups",
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), primary_key=True),
+            sa.Column("granularity", sa.String(4), primary_key=True),
+            sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("backers", sa.Integer(), nullable=False),
+        )
+    name, table, columns = INDEX
+    op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    name, table, _ = INDEX
+    op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_table("investment_rollups")
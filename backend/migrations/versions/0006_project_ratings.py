@@ -0,0 +1,51 @@
+"""Агрегаты оценок проектов
+
+- projects: число, сумма, средняя оценок и число оценок 1-5;
+- индексы для сортировки sort_by=rating (в том числе в категории).
+
+После миграции агрегаты заполняются командой `python ratings.py`.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("rating_average", sa.Float(), nullable=False, server_default="0"),
+] + [
+    sa.Column(f"rating_{rating}", sa.Integer(), nullable=False, server_default="0")
+    for rating in range(1, 6)
+]
+
+INDEXES = [
+    ("ix_projects_rating_average_id", "projects", ["rating_average", "id"]),
+    ("ix_projects_category_id_rating_average_id", "projects", ["category_id", "rating_average", "id"]),
+]
+
+
+def upgrade():
+    # База, созданная create_all по новым моделям, уже содержит колонки
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("projects")}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("projects", column)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    with op.batch_alter_table("projects") as batch:
+        for column in reversed(COLUMNS):
+            batch.drop_column(column.name)
@@ -0,0 +1,35 @@
+"""Ключи идемпотентности POST-запросов
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("scope", sa.String(32), primary_key=True),
+            sa.Column("key", sa.String(255), primary_key=True),
+            sa.Column("request_hash", sa.String(32), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=False),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+    op.create_index(
+        "ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"], if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys", if_exists=True)
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,63 @@
+"""Статус кампании (active, funded, expired)
+
+- projects.status, заполняется по дедлайну и собранной сумме;
+- индексы сортировок списков и поиска ближайших дедлайнов внутри
+  статуса вместо индексов без статуса.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+SORT_KEYS = ["hot_score", "created_at", "deadline", "rating_average"]
+
+OLD_INDEXES = [
+    (f"ix_projects_{key}_id", [key, "id"]) for key in SORT_KEYS
+] + [
+    (f"ix_projects_category_id_{key}_id", ["category_id", key, "id"]) for key in SORT_KEYS
+]
+
+NEW_INDEXES = [
+    (f"ix_projects_status_{key}_id", ["status", key, "id"]) for key in SORT_KEYS
+] + [
+    (f"ix_projects_category_id_status_{key}_id", ["category_id", "status", key, "id"]) for key in SORT_KEYS
+]
+
+
+def upgrade():
+    # База, созданная create_all по новым моделям, уже содержит колонку
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("projects")}
+    if "status" not in existing:
+        op.add_column(
+            "projects", sa.Column("status", sa.String(10), nullable=False, server_default="active")
+        )
+    # Дедлайны хранятся в UTC без часового пояса - сравниваются с utcnow()
+    op.get_bind().execute(sa.text(
+        "UPDATE projects SET status = CASE "
+        "WHEN deadline > :now THEN 'active' "
+        "WHEN raised_amount >= goal THEN 'funded' "
+        "ELSE 'expired' END"
+    ), {"now": datetime.utcnow()})
+    for name, columns in NEW_INDEXES:
+        op.create_index(name, "projects", columns, if_not_exists=True)
+    for name, _ in OLD_INDEXES:
+        op.drop_index(name, table_name="projects", if_exists=True)
+
+
+def downgrade():
+    for name, columns in OLD_INDEXES:
+        op.create_index(name, "projects", columns, if_not_exists=True)
+    for name, _ in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name="projects", if_exists=True)
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("status")
@@ -0,0 +1,28 @@
+"""Аренды периодических задач (одна задача - один воркер)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("job_leases"):
+        op.create_table(
+            "job_leases",
+            sa.Column("name", sa.String(64), primary_key=True),
+            sa.Column("owner", sa.String(128), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("job_leases")
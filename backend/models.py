@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -34,6 +34,24 @@ class Category(Base):
 class Project(Base):
     """Модель проекта"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # Индексы под ключи keyset-пагинации (sort_by=popular|new|ending|rating)
+        # внутри статуса: списки активных кампаний не читают завершённые;
+        # по рейтингу также выбираются избранные проекты, по дедлайну -
+        # ближайшие переходы статуса (lifecycle.py)
+        Index("ix_projects_status_hot_score_id", "status", "hot_score", "id"),
+        Index("ix_projects_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_projects_status_deadline_id", "status", "deadline", "id"),
+        Index("ix_projects_status_rating_average_id", "status", "rating_average", "id"),
+        # Фильтр по категории с теми же сортировками
+        Index("ix_projects_category_id_status_hot_score_id", "category_id", "status", "hot_score", "id"),
+        Index("ix_projects_category_id_status_created_at_id", "category_id", "status", "created_at", "id"),
+        Index("ix_projects_category_id_status_deadline_id", "category_id", "status", "deadline", "id"),
+        Index("ix_projects_category_id_status_rating_average_id",
+              "category_id", "status", "rating_average", "id"),
+        # Версия строки для ETag без чтения самой строки (покрывающий индекс)
+        Index("ix_projects_id_updated_at", "id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
@@ -43,9 +61,26 @@ class Project(Base):
     raised_amount = Column(Float, default=0)  # Собрано денег
     backers_count = Column(Integer, default=0)  # Количество поддерживающих
     deadline = Column(DateTime, nullable=False)  # Срок окончания проекта
+    # active, funded или expired (см. lifecycle.py)
+    status = Column(String(10), nullable=False, default="active", server_default="active")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Рейтинг (см. ranking.py): скорость инвестиций с затуханием и hot score
+    pledge_velocity = Column(Float, nullable=False, default=0, server_default="0")
+    velocity_updated_at = Column(DateTime)
+    hot_score = Column(Float, nullable=False, default=0, server_default="0")
+    
+    # Оценки из отзывов (см. ratings.py): число, сумма, средняя и число оценок 1-5
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_average = Column(Float, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Foreign Keys
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -60,6 +95,13 @@ class Project(Base):
 class Investment(Base):
     """Модель инвестиции (поддержки проекта)"""
     __tablename__ = "investments"
+    __table_args__ = (
+        Index("ix_investments_project_id_created_at_id", "project_id", "created_at", "id"),
+        # Недавние инвестиции всех проектов (пересчёт рейтингов)
+        Index("ix_investments_created_at_project_id", "created_at", "project_id"),
+        # Предыдущая инвестиция пользователя в проект (уникальные инвесторы в итогах)
+        Index("ix_investments_project_id_user_id_created_at", "project_id", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float, nullable=False)  # Сумма инвестиции
@@ -78,6 +120,9 @@ class Investment(Base):
 class Review(Base):
     """Модель отзыва о проекте"""
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_project_id_created_at_id", "project_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
@@ -91,3 +136,63 @@ class Review(Base):
     # Relationships
     project = relationship("Project", back_populates="reviews")
     user = relationship("User", back_populates="reviews")
+
+
+class InvestmentRollup(Base):
+    """Итоги инвестиций проекта за час или день (UTC)"""
+    __tablename__ = "investment_rollups"
+    
+    # Первичный ключ - индекс для чтения ряда проекта по диапазону дат
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    granularity = Column(String(4), primary_key=True)  # hour / day
+    bucket_start = Column(DateTime, primary_key=True)  # Начало интервала
+    amount = Column(Float, nullable=False, default=0)  # Сумма инвестиций
+    count = Column(Integer, nullable=False, default=0)  # Число инвестиций
+    backers = Column(Integer, nullable=False, default=0)  # Уникальные инвесторы
+
+
+class IdempotencyKey(Base):
+    """Сохранённый ответ на запрос с заголовком Idempotency-Key"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Удаление устаревших ключей
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+    
+    scope = Column(String(32), primary_key=True)  # Маршрут: investments / users
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(32), nullable=False)  # Отпечаток тела запроса
+    status_code = Column(Integer, nullable=False)
+    body = Column(Text, nullable=False)  # Тело ответа (JSON)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PlatformStatistics(Base):
+    """Агрегированная статистика платформы (одна строка, id=1)"""
+    __tablename__ = "platform_statistics"
+    
+    id = Column(Integer, primary_key=True)
+    total_projects = Column(Integer, nullable=False, default=0)
+    total_raised = Column(Float, nullable=False, default=0)
+    total_backers = Column(Integer, nullable=False, default=0)
+    total_users = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CategoryStatistics(Base):
+    """Агрегированная статистика по категории"""
+    __tablename__ = "category_statistics"
+    
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total_projects = Column(Integer, nullable=False, default=0)
+    total_raised = Column(Float, nullable=False, default=0)
+    total_backers = Column(Integer, nullable=False, default=0)
+
+
+class JobLease(Base):
+    """Аренда периодической задачи: её выполняет один воркер (см. background.py)"""
+    __tablename__ = "job_leases"
+    
+    name = Column(String(64), primary_key=True)  # Задача: ranking, statistics
+    owner = Column(String(128), nullable=False)  # Воркер: хост:pid:случайный суффикс
+    expires_at = Column(DateTime, nullable=False)
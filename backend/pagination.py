@@ -0,0 +1,72 @@
+"""Keyset (курсорная) пагинация списков"""
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, desc, literal, tuple_
+
+# Заголовок ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: str, values: list) -> str:
+    """Упаковать ключ сортировки и значения последней строки в непрозрачный курсор"""
+    payload = json.dumps(
+        {"k": key, "v": [v.isoformat() if isinstance(v, datetime) else v for v in values]},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str, columns: list) -> list:
+    """Распаковать курсор; ключ сортировки должен совпадать с текущим"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != key or len(payload["v"]) != len(columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, payload["v"])
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def paginate(
+    query,
+    key: str,
+    columns: list,
+    descending: bool,
+    skip: int,
+    limit: int,
+    cursor: str = None,
+    response: Response = None,
+):
+    """Отсортировать запрос по columns и выбрать страницу
+
+    С курсором страница выбирается по условию на кортеж сортировки
+    (индексный поиск вместо OFFSET), иначе - по старому skip/limit.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    """
+    query = query.order_by(*[desc(c) if descending else c for c in columns])
+
+    if cursor:
+        values = decode_cursor(cursor, key, columns)
+        row_key = tuple_(*columns)
+        bound = tuple_(*[literal(v, type_=c.type) for c, v in zip(columns, values)])
+        query = query.filter(row_key < bound if descending else row_key > bound)
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit).all()
+
+    if response is not None and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            key, [getattr(last, c.key) for c in columns]
+        )
+    return rows
@@ -0,0 +1,238 @@
+"""Материализованная статистика платформы
+
+Счётчики в platform_statistics / category_statistics обновляются
+инкрементально в тех же транзакциях, что и изменения данных, и
+периодически сверяются с исходными таблицами (в одном воркере,
+аренда "statistics", см. background.py).
+"""
+
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+import background
+from database import SessionLocal
+from models import Project, User, Category, PlatformStatistics, CategoryStatistics
+
+PLATFORM_ROW_ID = 1
+# Счётчики, общие для платформы и категорий
+COUNTERS = ("total_projects", "total_raised", "total_backers")
+
+# Допустимое устаревание ответа в секундах (0 - каждый запрос читает из БД)
+MAX_STALENESS = float(os.getenv("STATS_MAX_STALENESS", "0"))
+# Период сверки счётчиков с исходными таблицами в секундах (0 - отключено)
+RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "300"))
+
+_snapshot = None
+_snapshot_at = 0.0
+
+
+def _bump_platform(db, **deltas):
+    # Если строки ещё нет, её создаст сверка при первом чтении
+    db.query(PlatformStatistics).filter(
+        PlatformStatistics.id == PLATFORM_ROW_ID
+    ).update({
+        getattr(PlatformStatistics, field): getattr(PlatformStatistics, field) + delta
+        for field, delta in deltas.items()
+    }, synchronize_session=False)
+
+
+def _bump_category(db, category_id: int, **deltas):
+    db.query(CategoryStatistics).filter(
+        CategoryStatistics.category_id == category_id
+    ).update({
+        getattr(CategoryStatistics, field): getattr(CategoryStatistics, field) + delta
+        for field, delta in deltas.items()
+    }, synchronize_session=False)
+
+
+def register_category(db, category_id: int):
+    """Создать пустые счётчики для новой категории"""
+    db.add(CategoryStatistics(
+        category_id=category_id, total_projects=0, total_raised=0, total_backers=0
+    ))
+    db.flush()
+
+
+def record_user(db):
+    _bump_platform(db, total_users=1)
+
+
+def record_project(db, category_id: int):
+    _bump_platform(db, total_projects=1)
+    _bump_category(db, category_id, total_projects=1)
+
+
+def record_investment(db, category_id: int, amount: float, backers: int = 1):
+    _bump_platform(db, total_raised=amount, total_backers=backers)
+    _bump_category(db, category_id, total_raised=amount, total_backers=backers)
+
+
+def move_project(db, old_category_id: int, new_category_id: int, raised: float, backers: int):
+    """Перенести счётчики проекта при смене категории"""
+    _bump_category(
+        db, old_category_id, total_projects=-1, total_raised=-raised, total_backers=-backers
+    )
+    _bump_category(
+        db, new_category_id, total_projects=1, total_raised=raised, total_backers=backers
+    )
+
+
+def _lock_platform(db, now: datetime) -> bool:
+    # UPDATE блокирует строку до конца транзакции: в PostgreSQL - как
+    # SELECT ... FOR UPDATE, в SQLite берётся блокировка записи БД
+    return bool(db.query(PlatformStatistics).filter(
+        PlatformStatistics.id == PLATFORM_ROW_ID
+    ).update({PlatformStatistics.reconciled_at: now}, synchronize_session=False))
+
+
+def _deltas(fields: tuple, stored: tuple, actual: tuple) -> dict:
+    return {field: new - old for field, old, new in zip(fields, stored, actual) if new != old}
+
+
+def _actual_counters(db) -> tuple:
+    """Счётчики по исходным таблицам: ({категория: COUNTERS}, число пользователей)"""
+    by_category = {
+        category_id: (projects, float(raised or 0), backers or 0)
+        for category_id, projects, raised, backers in db.query(
+            Project.category_id,
+            func.count(Project.id),
+            func.sum(Project.raised_amount),
+            func.sum(Project.backers_count),
+        ).group_by(Project.category_id)
+    }
+    return by_category, db.query(func.count(User.id)).scalar()
+
+
+def _count_statistics(db) -> dict:
+    """Статистика по исходным таблицам, без счётчиков (только чтение)"""
+    by_category, total_users = _actual_counters(db)
+    totals = tuple(map(sum, zip(*by_category.values()))) or (0, 0.0, 0)
+    return {
+        **dict(zip(COUNTERS, totals)),
+        "total_users": total_users,
+        "categories": [
+            {"category_id": category_id, "name": name, **dict(zip(COUNTERS, by_category.get(category_id, (0, 0.0, 0))))}
+            for category_id, name in db.query(Category.id, Category.name).order_by(Category.name)
+        ],
+    }
+
+
+def reconcile(db):
+    """Сверить счётчики с исходными таблицами и исправить расхождения
+
+    До подсчёта блокируется строка статистики платформы. Запись
+    инвестиции, проекта или пользователя обновляет эту строку, поэтому
+    ждёт конца сверки и не теряется между подсчётом и записью.
+    Исправления записываются разницей (x = x + delta).
+    """
+    now = datetime.utcnow()
+    if not _lock_platform(db, now):
+        db.add(PlatformStatistics(
+            id=PLATFORM_ROW_ID, total_projects=0, total_raised=0, total_backers=0,
+            total_users=0, reconciled_at=now,
+        ))
+        try:
+            db.flush()
+        except IntegrityError:
+            # Строку одновременно создал другой воркер
+            db.rollback()
+            _lock_platform(db, now)
+
+    by_category, total_users = _actual_counters(db)
+
+    stored = {
+        category_id: counters
+        for category_id, *counters in db.query(
+            CategoryStatistics.category_id, *(getattr(CategoryStatistics, field) for field in COUNTERS)
+        )
+    }
+    for (category_id,) in db.query(Category.id):
+        actual = by_category.get(category_id, (0, 0, 0))
+        if category_id not in stored:
+            db.add(CategoryStatistics(category_id=category_id, **dict(zip(COUNTERS, actual))))
+            continue
+        deltas = _deltas(COUNTERS, tuple(stored[category_id]), actual)
+        if deltas:
+            _bump_category(db, category_id, **deltas)
+
+    platform_fields = COUNTERS + ("total_users",)
+    platform = db.query(
+        *(getattr(PlatformStatistics, field) for field in platform_fields)
+    ).filter(PlatformStatistics.id == PLATFORM_ROW_ID).one()
+    totals = tuple(map(sum, zip(*by_category.values()))) or (0, 0, 0)
+    deltas = _deltas(platform_fields, tuple(platform), totals + (total_users,))
+    if deltas:
+        _bump_platform(db, **deltas)
+    db.commit()
+
+
+def read_statistics(db) -> dict:
+    """Прочитать статистику платформы и разбивку по категориям
+
+    При STATS_MAX_STALENESS > 0 ответ берётся из снимка в памяти,
+    пока он моложе заданного числа секунд.
+    """
+    global _snapshot, _snapshot_at
+
+    if MAX_STALENESS and _snapshot is not None and time.monotonic() - _snapshot_at < MAX_STALENESS:
+        return _snapshot
+
+    platform = db.query(PlatformStatistics).filter(
+        PlatformStatistics.id == PLATFORM_ROW_ID
+    ).first()
+    if not platform and "replica" in db.info:
+        # Счётчики создаются сверкой на основной БД; пока они не дошли
+        # до реплики, статистика считается по её исходным таблицам
+        return _count_statistics(db)
+    if not platform:
+        reconcile(db)
+        platform = db.query(PlatformStatistics).filter(
+            PlatformStatistics.id == PLATFORM_ROW_ID
+        ).first()
+
+    categories = db.query(CategoryStatistics, Category.name).join(
+        Category, Category.id == CategoryStatistics.category_id
+    ).order_by(Category.name).all()
+
+    _snapshot = {
+        "total_projects": platform.total_projects,
+        "total_raised": platform.total_raised,
+        "total_backers": platform.total_backers,
+        "total_users": platform.total_users,
+        "categories": [
+            {
+                "category_id": stats.category_id,
+                "name": name,
+                "total_projects": stats.total_projects,
+                "total_raised": stats.total_raised,
+                "total_backers": stats.total_backers,
+            }
+            for stats, name in categories
+        ],
+    }
+    _snapshot_at = time.monotonic()
+    return _snapshot
+
+
+def reconcile_once():
+    db = SessionLocal()
+    try:
+        reconcile(db)
+    finally:
+        db.close()
+
+
+async def reconcile_periodically():
+    """Фоновая задача периодической сверки счётчиков (в одном воркере)"""
+    await background.run_periodically(
+        RECONCILE_INTERVAL, reconcile_once, "Ошибка сверки статистики", lease="statistics"
+    )
+
+
+if __name__ == "__main__":
+    reconcile_once()
+    print("✓ Статистика пересчитана")
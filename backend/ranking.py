@@ -0,0 +1,240 @@
+"""Рейтинг проектов (hot score) для сортировки popular и избранных
+
+hot_score = log(1 + скорость инвестиций)
+            + PROGRESS_WEIGHT * доля собранной суммы (не больше 1)
+            + DEADLINE_WEIGHT * близость дедлайна (за DEADLINE_HORIZON_DAYS до конца растёт от 0 до 1)
+
+Скорость - число инвестиций с экспоненциальным затуханием: вклад
+инвестиции уменьшается вдвое каждые RANKING_HALF_LIFE_HOURS часов.
+Завершённые проекты получают FINISHED_SCORE и опускаются в конец.
+
+Рейтинг хранится в индексированной колонке projects.hot_score, поэтому
+топ-N и топ-N категории читаются по индексу. Инвестиции обновляют
+скорость и рейтинг своего проекта тем же UPDATE, что и суммы. Рейтинги
+остальных проектов со временем устаревают (скорость затухает,
+дедлайн приближается), поэтому раз в RANKING_REBUILD_INTERVAL секунд
+один воркер (аренда "ranking", см. background.py) пересчитывает
+рейтинги по сохранённой скорости и записывает только изменившиеся.
+Полный пересчёт скорости по таблице инвестиций - python ranking.py --full.
+"""
+
+import argparse
+import math
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, update
+
+import background
+from cache import response_cache
+from database import SessionLocal
+from models import Project, Investment
+
+HALF_LIFE_HOURS = float(os.getenv("RANKING_HALF_LIFE_HOURS", "24"))
+# Период пересчёта рейтингов в секундах (0 - отключено)
+REBUILD_INTERVAL = float(os.getenv("RANKING_REBUILD_INTERVAL", "300"))
+REBUILD_CHUNK_SIZE = 10000
+# Меньшие изменения рейтинга не записываются
+SCORE_EPSILON = 1e-3
+
+PROGRESS_WEIGHT = 0.5
+DEADLINE_WEIGHT = 0.3
+DEADLINE_HORIZON_DAYS = 30
+FINISHED_SCORE = -1.0
+
+# Инвестиции старше стольких периодов полураспада не влияют на скорость
+_WINDOW_HALF_LIVES = 20
+
+
+def decay(velocity: float, since: datetime, now: datetime) -> float:
+    """Скорость, затухшая от момента since до now"""
+    if not velocity or since is None:
+        return 0.0
+    hours = max((now - since).total_seconds(), 0) / 3600
+    return velocity * 0.5 ** (hours / HALF_LIFE_HOURS)
+
+
+def hot_score(velocity: float, raised: float, goal: float, deadline: datetime, now: datetime) -> float:
+    """Рейтинг проекта на момент now (velocity уже приведена к now)"""
+    if deadline < now:
+        return FINISHED_SCORE
+    progress = min((raised or 0) / goal, 1.0) if goal else 0.0
+    days_left = (deadline - now).total_seconds() / 86400
+    closeness = max(0.0, 1 - days_left / DEADLINE_HORIZON_DAYS)
+    return math.log1p(velocity) + PROGRESS_WEIGHT * progress + DEADLINE_WEIGHT * closeness
+
+
+def score_new_project(project: Project) -> float:
+    """Начальный рейтинг проекта без инвестиций"""
+    return hot_score(0.0, project.raised_amount, project.goal, project.deadline, datetime.utcnow())
+
+
+def refresh_project(project: Project):
+    """Пересчитать рейтинг загруженного проекта (после изменения цели или срока)"""
+    now = datetime.utcnow()
+    velocity = decay(project.pledge_velocity, project.velocity_updated_at, now)
+    project.pledge_velocity = velocity
+    project.velocity_updated_at = now
+    project.hot_score = hot_score(velocity, project.raised_amount, project.goal, project.deadline, now)
+
+
+def pledge_effect(velocity: float, velocity_at: datetime, raised: float, goal: float,
+                  deadline: datetime, pledges: int, amount: float, now: datetime) -> tuple:
+    """(множитель затухания, новый рейтинг) для новых инвестиций проекта
+
+    Значения строки прочитаны до UPDATE. Скорость обновляется атомарно
+    (pledge_velocity = pledge_velocity * множитель + pledges), поэтому
+    параллельные инвестиции не теряются; рейтинг при гонке может слегка
+    отстать и выравнивается при пересчёте.
+    """
+    factor = decay(1.0, velocity_at, now)
+    score = hot_score(
+        (velocity or 0.0) * factor + pledges, (raised or 0.0) + amount, goal, deadline, now
+    )
+    return factor, score
+
+
+def pledge_columns(factor: float, score: float, pledges: int, now: datetime) -> dict:
+    """Значения для query.update() проекта вместе с суммами инвестиций"""
+    return {
+        Project.pledge_velocity: Project.pledge_velocity * factor + pledges,
+        Project.velocity_updated_at: now,
+        Project.hot_score: score,
+    }
+
+
+def _write_scores(db, values: list, now: datetime):
+    table = Project.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("project_id_"))
+        .values(
+            pledge_velocity=bindparam("velocity_"),
+            velocity_updated_at=now,
+            hot_score=bindparam("score_"),
+            # Рейтинг не входит в ответ API - версия строки (ETag) не меняется
+            updated_at=table.c.updated_at,
+        ),
+        values,
+    )
+
+
+def _moved(old: float, new: float) -> bool:
+    return old is None or abs(new - old) > SCORE_EPSILON
+
+
+def rebuild(db) -> int:
+    """Пересчитать скорость и рейтинг всех проектов по таблице инвестиций
+
+    Полный пересчёт - после миграции и для исправления расхождений
+    (python ranking.py --full). Записываются только проекты, у которых
+    скорость или рейтинг изменились больше чем на SCORE_EPSILON.
+    Инвестиция, записанная во время пересчёта, может не попасть в
+    скорость до следующего пересчёта.
+    """
+    now = datetime.utcnow()
+    since = now - timedelta(hours=HALF_LIFE_HOURS * _WINDOW_HALF_LIVES)
+
+    velocities = {}
+    for project_id, created_at in db.query(
+        Investment.project_id, Investment.created_at
+    ).filter(Investment.created_at >= since).yield_per(REBUILD_CHUNK_SIZE):
+        velocities[project_id] = velocities.get(project_id, 0.0) + decay(1.0, created_at, now)
+
+    # Проекты - пачками по id, каждая пачка в своей транзакции
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Project.id, Project.raised_amount, Project.goal, Project.deadline,
+            Project.pledge_velocity, Project.velocity_updated_at, Project.hot_score,
+        ).filter(Project.id > last_id).order_by(Project.id).limit(REBUILD_CHUNK_SIZE).all()
+        if not rows:
+            return updated
+        values = []
+        for project_id, raised, goal, deadline, stored_velocity, velocity_at, stored_score in rows:
+            velocity = velocities.get(project_id, 0.0)
+            score = hot_score(velocity, raised, goal, deadline, now)
+            if _moved(decay(stored_velocity, velocity_at, now), velocity) or _moved(stored_score, score):
+                values.append({"project_id_": project_id, "velocity_": velocity, "score_": score})
+        if values:
+            _write_scores(db, values, now)
+            db.commit()
+        updated += len(values)
+        last_id = rows[-1].id
+
+
+def refresh_scores(db) -> int:
+    """Пересчитать рейтинги незавершённых проектов по сохранённой скорости
+
+    Таблица инвестиций не читается: скорость затухает от
+    velocity_updated_at до текущего момента. Записываются только
+    рейтинги, изменившиеся больше чем на SCORE_EPSILON, и только если
+    с момента чтения у проекта не было инвестиций (иначе рейтинг уже
+    обновлён инвестицией). Возвращает число обновлённых проектов.
+    """
+    now = datetime.utcnow()
+    table = Project.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("project_id_"))
+        .where(table.c.velocity_updated_at.is_not_distinct_from(bindparam("velocity_at_")))
+        .values(hot_score=bindparam("score_"), updated_at=table.c.updated_at)
+    )
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Project.id, Project.raised_amount, Project.goal, Project.deadline,
+            Project.pledge_velocity, Project.velocity_updated_at, Project.hot_score,
+        ).filter(
+            Project.id > last_id, Project.hot_score != FINISHED_SCORE
+        ).order_by(Project.id).limit(REBUILD_CHUNK_SIZE).all()
+        if not rows:
+            return updated
+        values = []
+        for project_id, raised, goal, deadline, velocity, velocity_at, stored_score in rows:
+            score = hot_score(decay(velocity, velocity_at, now), raised, goal, deadline, now)
+            if _moved(stored_score, score):
+                values.append({"project_id_": project_id, "velocity_at_": velocity_at, "score_": score})
+        if values:
+            db.execute(statement, values)
+            db.commit()
+        updated += len(values)
+        last_id = rows[-1].id
+
+
+def rebuild_once() -> int:
+    db = SessionLocal()
+    try:
+        return rebuild(db)
+    finally:
+        db.close()
+
+
+def refresh_once() -> int:
+    db = SessionLocal()
+    try:
+        return refresh_scores(db)
+    finally:
+        db.close()
+
+
+def _refresh_job():
+    if refresh_once():
+        response_cache.invalidate("featured")
+
+
+async def rebuild_periodically():
+    """Фоновая задача периодического пересчёта рейтингов (в одном воркере)"""
+    await background.run_periodically(
+        REBUILD_INTERVAL, _refresh_job, "Ошибка пересчёта рейтингов", lease="ranking"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт рейтингов проектов")
+    parser.add_argument("--full", action="store_true", help="Пересчитать и скорость по таблице инвестиций")
+    args = parser.parse_args()
+    updated = rebuild_once() if args.full else refresh_once()
+    print(f"✓ Рейтинги пересчитаны: обновлено {updated} проектов")
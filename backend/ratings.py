@@ -0,0 +1,115 @@
+"""Агрегаты оценок проектов из отзывов
+
+Число, сумма и средняя оценок и распределение оценок 1-5 хранятся в
+колонках projects. create_review обновляет их атомарно в транзакции
+отзыва (UPDATE ... SET rating_count = rating_count + 1, ...), поэтому
+списки проектов и сортировка sort_by=rating не агрегируют отзывы.
+
+`python ratings.py` сверяет агрегаты с таблицей отзывов и исправляет
+расхождения.
+"""
+
+from sqlalchemy import Float, bindparam, case, cast, func, update
+
+from database import SessionLocal, lock_rows
+from models import Project, Review
+
+RATINGS = range(1, 6)
+HISTOGRAM_COLUMNS = {rating: getattr(Project, f"rating_{rating}") for rating in RATINGS}
+RECONCILE_CHUNK_SIZE = 10000
+
+
+def record_review(db, project_id: int, rating: int):
+    """Учесть оценку нового отзыва в агрегатах проекта"""
+    db.query(Project).filter(Project.id == project_id).update({
+        Project.rating_count: Project.rating_count + 1,
+        Project.rating_sum: Project.rating_sum + rating,
+        # В SET используются значения строки до обновления
+        Project.rating_average: cast(Project.rating_sum + rating, Float) / (Project.rating_count + 1),
+        HISTOGRAM_COLUMNS[rating]: HISTOGRAM_COLUMNS[rating] + 1,
+    }, synchronize_session=False)
+
+
+def summary(project: Project) -> dict:
+    """Сводка оценок для ответа API"""
+    return {
+        "count": project.rating_count,
+        "average": project.rating_average if project.rating_count else None,
+        "histogram": {rating: getattr(project, f"rating_{rating}") for rating in RATINGS},
+    }
+
+
+def reconcile(db) -> int:
+    """Пересчитать агрегаты по таблице отзывов; возвращает число исправленных проектов
+
+    Проекты обрабатываются пачками по id, каждая пачка в своей транзакции:
+    строки пачки блокируются до подсчёта отзывов, поэтому отзыв не
+    теряется между подсчётом и записью. Исправления записываются разницей
+    (x = x + delta), средняя пересчитывается из суммы и числа в том же
+    UPDATE. Изменяются только строки с расхождениями, в том числе средней.
+    """
+    table = Project.__table__
+    count = table.c.rating_count + bindparam("count_")
+    total = table.c.rating_sum + bindparam("sum_")
+    stmt = update(table).where(table.c.id == bindparam("project_id_")).values(
+        rating_count=count,
+        rating_sum=total,
+        rating_average=case((count > 0, cast(total, Float) / count), else_=0.0),
+        **{
+            f"rating_{rating}": table.c[f"rating_{rating}"] + bindparam(f"rating_{rating}_")
+            for rating in RATINGS
+        },
+    )
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = [project_id for (project_id,) in db.query(Project.id).filter(
+            Project.id > last_id
+        ).order_by(Project.id).limit(RECONCILE_CHUNK_SIZE)]
+        if not ids:
+            return fixed
+        # create_review обновляет строку проекта и ждёт конца сверки пачки
+        lock_rows(db, table, ids[0], ids[-1])
+        rows = db.query(
+            Project.id, *HISTOGRAM_COLUMNS.values(), Project.rating_count, Project.rating_sum,
+            Project.rating_average,
+        ).filter(Project.id.between(ids[0], ids[-1])).order_by(Project.id).all()
+
+        histograms = {}
+        for project_id, rating, n in db.query(
+            Review.project_id, Review.rating, func.count(Review.id)
+        ).filter(
+            Review.project_id.between(ids[0], ids[-1]),
+            Review.rating.between(RATINGS.start, RATINGS.stop - 1),
+        ).group_by(Review.project_id, Review.rating):
+            histograms.setdefault(project_id, [0] * len(RATINGS))[rating - 1] = n
+
+        values = []
+        for row in rows:
+            histogram = histograms.get(row.id, [0] * len(RATINGS))
+            stored = list(row[1:len(RATINGS) + 1])
+            deltas = [actual - current for actual, current in zip(histogram, stored)]
+            count_delta = sum(histogram) - row.rating_count
+            sum_delta = sum(rating * n for rating, n in zip(RATINGS, histogram)) - row.rating_sum
+            average = row.rating_sum / row.rating_count if row.rating_count else 0.0
+            if not any(deltas) and not count_delta and not sum_delta and abs(row.rating_average - average) < 1e-9:
+                continue
+            values.append({
+                "project_id_": row.id,
+                "count_": count_delta,
+                "sum_": sum_delta,
+                **{f"rating_{rating}_": n for rating, n in zip(RATINGS, deltas)},
+            })
+        if values:
+            db.execute(stmt, values)
+        db.commit()
+        fixed += len(values)
+        last_id = ids[-1]
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"✓ Оценки проектов сверены, исправлено проектов: {reconcile(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,128 @@
+"""Чтение с реплик БД
+
+Читающие обработчики получают сессию через get_read_db (database.py):
+она открывается на реплике из DATABASE_REPLICA_URLS, а запись и
+остальные обработчики работают с основной БД. Реплика выбирается
+наименее загруженная по занятым соединениям пула, при равенстве - по
+кругу.
+
+Чтение своих записей: после успешного изменяющего запроса клиент
+получает cookie, и DB_REPLICA_PIN_SECONDS секунд его чтения идут в
+основную БД, пока реплики догоняют изменения. Ответы, прочитанные с
+реплики, кэшируются отдельно от прочитанных из основной БД (main.cache_args).
+
+Реплика, к которой не удалось подключиться, исключается на
+DB_REPLICA_RETRY_SECONDS секунд, запрос читает из основной БД. Сбой
+проверяется при выдаче соединения из пула (pool_pre_ping), без
+отдельного запроса.
+"""
+
+import itertools
+import logging
+import os
+import time
+from http.cookies import SimpleCookie
+
+logger = logging.getLogger(__name__)
+
+# Реплики только для чтения через запятую (тот же драйвер, что в DATABASE_URL)
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Окно чтения из основной БД после записи клиента в секундах
+PIN_SECONDS = float(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+# Через сколько секунд снова пробовать недоступную реплику
+RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Replica:
+    """Реплика: engine для статистики пула, фабрика сессий и engine выгрузок
+
+    stream_engine - синхронный engine для чтения курсором (export.py);
+    в синхронном режиме это тот же engine.
+    """
+
+    def __init__(self, name: str, engine, sessionmaker, stream_engine=None):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = sessionmaker
+        self.stream_engine = stream_engine or engine
+        self.failed_until = 0.0
+
+    @property
+    def load(self) -> int:
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.failed_until <= time.monotonic()
+
+
+class ReplicaSet:
+    """Выбор реплики и учёт недоступных"""
+
+    def __init__(self, replicas: list):
+        self.replicas = replicas
+        self._turn = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Replica:
+        """Наименее загруженная доступная реплика или None"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._turn) % len(healthy)
+        return min(healthy[start:] + healthy[:start], key=lambda replica: replica.load)
+
+    def mark_failed(self, replica: Replica, error: Exception):
+        replica.failed_until = time.monotonic() + RETRY_SECONDS
+        logger.warning(
+            "Реплика %s недоступна, чтение из основной БД %.0f с: %s",
+            replica.name, RETRY_SECONDS, error,
+        )
+
+
+def is_pinned(request) -> bool:
+    """Клиент недавно писал и должен читать из основной БД"""
+    value = request.cookies.get(PIN_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_cookie() -> bytes:
+    cookie = SimpleCookie()
+    cookie[PIN_COOKIE] = f"{time.time() + PIN_SECONDS:.3f}"
+    cookie[PIN_COOKIE]["max-age"] = int(PIN_SECONDS) + 1
+    cookie[PIN_COOKIE]["path"] = "/"
+    cookie[PIN_COOKIE]["httponly"] = True
+    cookie[PIN_COOKIE]["samesite"] = "Lax"
+    return cookie.output(header="").strip().encode()
+
+
+class PrimaryPinMiddleware:
+    """ASGI middleware: cookie чтения из основной БД после успешной записи"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not PIN_SECONDS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", pin_cookie()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,203 @@
+"""Почасовые и подневные итоги инвестиций для графиков сбора
+
+investment_rollups хранит по каждому проекту сумму, число инвестиций и
+число уникальных инвесторов за час и за день (UTC). Итоги обновляются
+в транзакции инвестиции одним INSERT ... ON CONFLICT DO UPDATE.
+Инвестор уникален в интервале, если у него нет более ранней инвестиции
+в проект в этом же интервале: её время читается вместе с проверками
+проекта (индекс investments (project_id, user_id, created_at)).
+Параллельные инвестиции одного пользователя в проект могут дважды
+посчитаться уникальными - это исправляет пересчёт.
+
+Ряд проекта читается одним запросом по диапазону первичного ключа
+(project_id, granularity, bucket_start), сколько бы инвестиций ни было.
+Итоги для уже записанных инвестиций пересчитывает `python rollups.py`
+(можно при работающем API: строки проектов пачки блокируются, исправления
+записываются разницей).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from database import SessionLocal, lock_rows
+from models import Investment, InvestmentRollup, Project
+from schemas import naive_utc
+
+GRANULARITIES = ("hour", "day")
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    """Начало часа или дня, в который попадает value"""
+    if granularity == "day":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def last_pledge_today(project_id, user_id, now: datetime):
+    """Скалярный подзапрос: последняя инвестиция пользователя в проект с начала суток"""
+    return select(func.max(Investment.created_at)).where(
+        Investment.project_id == project_id,
+        Investment.user_id == user_id,
+        Investment.created_at >= bucket_start(now, "day"),
+    ).scalar_subquery()
+
+
+def last_pledges_today(db, project_ids, user_ids, now: datetime) -> dict:
+    """{(project_id, user_id): последняя инвестиция с начала суток} для пачки"""
+    return {
+        (project_id, user_id): created_at
+        for project_id, user_id, created_at in db.query(
+            Investment.project_id, Investment.user_id, func.max(Investment.created_at)
+        ).filter(
+            Investment.project_id.in_(project_ids),
+            Investment.user_id.in_(user_ids),
+            Investment.created_at >= bucket_start(now, "day"),
+        ).group_by(Investment.project_id, Investment.user_id)
+    }
+
+
+def pledge_deltas(project_id: int, pledges: list, previous: dict, now: datetime) -> list:
+    """Приращения итогов проекта для инвестиций pledges [(user_id, amount)]
+
+    previous - {user_id: последняя инвестиция в проект с начала суток}
+    до записи pledges.
+    """
+    rows = []
+    for granularity in GRANULARITIES:
+        start = bucket_start(now, granularity)
+        new_backers = {
+            user_id for user_id, _ in pledges
+            if previous.get(user_id) is None or previous[user_id] < start
+        }
+        rows.append({
+            "project_id": project_id,
+            "granularity": granularity,
+            "bucket_start": start,
+            "amount": sum(amount for _, amount in pledges),
+            "count": len(pledges),
+            "backers": len(new_backers),
+        })
+    return rows
+
+
+def record(db, rows: list):
+    """Прибавить приращения к итогам (строка интервала создаётся при первой инвестиции)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    table = InvestmentRollup.__table__
+    stmt = upsert(table)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.project_id, table.c.granularity, table.c.bucket_start],
+            set_={
+                "amount": table.c.amount + stmt.excluded.amount,
+                "count": table.c.count + stmt.excluded.count,
+                "backers": table.c.backers + stmt.excluded.backers,
+            },
+        ),
+        rows,
+    )
+
+
+def read_series(db, project_id: int, granularity: str,
+                start: datetime = None, end: datetime = None) -> list:
+    """Итоги проекта по интервалам в порядке времени (start и end со смещением приводятся к UTC)"""
+    start, end = naive_utc(start), naive_utc(end)
+    query = db.query(
+        InvestmentRollup.bucket_start, InvestmentRollup.amount,
+        InvestmentRollup.count, InvestmentRollup.backers,
+    ).filter(
+        InvestmentRollup.project_id == project_id,
+        InvestmentRollup.granularity == granularity,
+    )
+    if start is not None:
+        query = query.filter(InvestmentRollup.bucket_start >= bucket_start(start, granularity))
+    if end is not None:
+        query = query.filter(InvestmentRollup.bucket_start <= end)
+    return query.order_by(InvestmentRollup.bucket_start).all()
+
+
+def backfill(db) -> int:
+    """Пересчитать итоги всех проектов по таблице инвестиций; возвращает число исправленных интервалов
+
+    Проекты обрабатываются пачками по id, каждая пачка в своей транзакции.
+    Строки проектов пачки блокируются до чтения инвестиций: инвестиция
+    обновляет строку своего проекта и ждёт конца пересчёта пачки, поэтому
+    её приращение не теряется. Исправления записываются разницей с
+    текущими итогами, интервалы без инвестиций удаляются.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        project_ids = [
+            project_id for (project_id,) in db.query(Project.id)
+            .filter(Project.id > last_id).order_by(Project.id).limit(BACKFILL_CHUNK_SIZE)
+        ]
+        if not project_ids:
+            return fixed
+        lock_rows(db, Project.__table__, project_ids[0], project_ids[-1])
+
+        totals = {}
+        for project_id, user_id, amount, created_at in db.query(
+            Investment.project_id, Investment.user_id, Investment.amount, Investment.created_at
+        ).filter(Investment.project_id.in_(project_ids)).yield_per(BACKFILL_CHUNK_SIZE):
+            if created_at is None:
+                continue
+            for granularity in GRANULARITIES:
+                key = (project_id, granularity, bucket_start(created_at, granularity))
+                bucket = totals.get(key)
+                if bucket is None:
+                    bucket = totals[key] = [0.0, 0, set()]
+                bucket[0] += amount
+                bucket[1] += 1
+                bucket[2].add(user_id)
+
+        stored = {
+            (project_id, granularity, start): (amount, count, backers)
+            for project_id, granularity, start, amount, count, backers in db.query(
+                InvestmentRollup.project_id, InvestmentRollup.granularity, InvestmentRollup.bucket_start,
+                InvestmentRollup.amount, InvestmentRollup.count, InvestmentRollup.backers,
+            ).filter(InvestmentRollup.project_id.in_(project_ids))
+        }
+        deltas, empty = [], []
+        for key in totals.keys() | stored.keys():
+            amount, count, users = totals.get(key, (0.0, 0, ()))
+            actual = (amount, count, len(users))
+            current = stored.get(key, (0.0, 0, 0))
+            if actual == current:
+                continue
+            if not count:
+                empty.append(key)
+                continue
+            project_id, granularity, start = key
+            deltas.append({
+                "project_id": project_id,
+                "granularity": granularity,
+                "bucket_start": start,
+                "amount": actual[0] - current[0],
+                "count": actual[1] - current[1],
+                "backers": actual[2] - current[2],
+            })
+        if deltas:
+            record(db, deltas)
+        for project_id, granularity, start in empty:
+            db.query(InvestmentRollup).filter(
+                InvestmentRollup.project_id == project_id,
+                InvestmentRollup.granularity == granularity,
+                InvestmentRollup.bucket_start == start,
+            ).delete(synchronize_session=False)
+        db.commit()
+        fixed += len(deltas) + len(empty)
+        last_id = project_ids[-1]
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"✓ Итоги инвестиций пересчитаны, исправлено интервалов: {backfill(db)}")
+    finally:
+        db.close()
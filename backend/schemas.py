@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import datetime, timezone
+from typing import Optional, List, Dict
 
 
 # ==================== USER SCHEMAS ====================
@@ -34,6 +34,13 @@ class CategoryResponse(BaseModel):
 
 # ==================== PROJECT SCHEMAS ====================
 
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Дата со смещением - в UTC без tzinfo (в БД даты хранятся в UTC без зоны)"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class ProjectCreate(BaseModel):
     title: str = Field(..., min_length=5, max_length=200)
     description: str = Field(..., min_length=20)
@@ -43,6 +50,8 @@ class ProjectCreate(BaseModel):
     category: str
     creator_id: int
 
+    _deadline_utc = field_validator("deadline")(naive_utc)
+
 
 class ProjectUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=5, max_length=200)
@@ -52,6 +61,8 @@ class ProjectUpdate(BaseModel):
     deadline: Optional[datetime] = None
     category: Optional[str] = None
 
+    _deadline_utc = field_validator("deadline")(naive_utc)
+
 
 class ProjectResponse(BaseModel):
     id: int
@@ -61,7 +72,10 @@ class ProjectResponse(BaseModel):
     goal: float
     raised_amount: float
     backers_count: int
+    rating_count: int
+    rating_average: float  # 0, пока нет отзывов
     deadline: datetime
+    status: str  # active, funded или expired
     created_at: datetime
     updated_at: datetime
     category_id: int
@@ -103,6 +117,22 @@ class InvestmentResponse(BaseModel):
         from_attributes = True
 
 
+class FundingBucket(BaseModel):
+    bucket_start: datetime
+    amount: float
+    count: int
+    backers: int
+    
+    class Config:
+        from_attributes = True
+
+
+class FundingHistoryResponse(BaseModel):
+    project_id: int
+    granularity: str
+    buckets: List[FundingBucket]
+
+
 # ==================== REVIEW SCHEMAS ====================
 
 class ReviewCreate(BaseModel):
@@ -124,9 +154,44 @@ class ReviewResponse(BaseModel):
         from_attributes = True
 
 
+# ==================== PROJECT DETAIL SCHEMAS ====================
+
+class CreatorResponse(BaseModel):
+    id: int
+    username: str
+    full_name: Optional[str]
+    
+    class Config:
+        from_attributes = True
+
+
+class RatingSummary(BaseModel):
+    count: int
+    average: Optional[float]
+    histogram: Dict[int, int]  # Число оценок 1-5
+
+
+class ProjectDetailResponse(ProjectResponse):
+    category: CategoryResponse
+    creator: CreatorResponse
+    recent_investments: List[InvestmentResponse]
+    rating: RatingSummary
+
+
 # ==================== SEARCH SCHEMAS ====================
 
 class SearchResponse(BaseModel):
     query: str
     results: List[ProjectResponse]
     total: int
+
+
+class ProjectSuggestion(BaseModel):
+    id: int
+    title: str
+
+
+class SuggestResponse(BaseModel):
+    query: str
+    projects: List[ProjectSuggestion]
+    categories: List[CategoryResponse]
@@ -0,0 +1,177 @@
+"""Полнотекстовый поиск проектов (SQLite FTS5 / PostgreSQL tsvector)"""
+
+import re
+
+from sqlalchemy import text, or_, desc, func, literal_column, Integer, Float
+
+from models import Project
+
+
+# Окончания для упрощённого стемминга русских слов (от длинных к коротким)
+RUSSIAN_ENDINGS = sorted([
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ую", "юю",
+    "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев", "ей", "ия", "ья",
+    "ье", "ию", "ью", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 4
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Включается в setup_search_index (или detect_search_index при старте воркера),
+# если индекс создан
+fts_enabled = False
+
+
+def normalize(value: str) -> str:
+    """Приведение к нижнему регистру и замена ё на е"""
+    return value.lower().replace("ё", "е")
+
+
+def tokenize(value: str) -> list:
+    """Разбить строку на нормализованные слова"""
+    return TOKEN_RE.findall(normalize(value))
+
+
+def stem(token: str) -> str:
+    """Отрезать типичное окончание у русского слова"""
+    if not CYRILLIC_RE.search(token):
+        return token
+    for ending in RUSSIAN_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+            return token[:-len(ending)]
+    return token
+
+
+def setup_search_index(engine) -> bool:
+    """Создать полнотекстовый индекс и синхронизацию с таблицей projects"""
+    global fts_enabled
+
+    if engine.dialect.name == "sqlite":
+        fts_enabled = _setup_sqlite(engine)
+    elif engine.dialect.name == "postgresql":
+        fts_enabled = _setup_postgresql(engine)
+    else:
+        fts_enabled = False
+    return fts_enabled
+
+
+def detect_search_index(connection) -> bool:
+    """Включить полнотекстовый поиск, если индекс уже создан (без изменения схемы)"""
+    global fts_enabled
+
+    if connection.dialect.name == "sqlite":
+        fts_enabled = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+        )).first() is not None
+    elif connection.dialect.name == "postgresql":
+        fts_enabled = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'projects' AND column_name = 'search_vector'"
+        )).first() is not None
+    else:
+        fts_enabled = False
+    return fts_enabled
+
+
+def _setup_sqlite(engine) -> bool:
+    # ё заменяется на е при индексации: unicode61 не считает её диакритикой
+    fold = "replace(replace({0}, 'ё', 'е'), 'Ё', 'Е')"
+    title, description = fold.format("new.title"), fold.format("new.description")
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+        )).first()
+        if not exists:
+            try:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE projects_fts USING fts5("
+                    "title, description, tokenize = 'unicode61 remove_diacritics 2')"
+                ))
+            except Exception:
+                # SQLite без FTS5 - остаётся поиск через ILIKE
+                return False
+            conn.execute(text(
+                "INSERT INTO projects_fts (rowid, title, description) "
+                "SELECT id, {0}, {1} FROM projects".format(
+                    fold.format("title"), fold.format("description")
+                )
+            ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN "
+            "INSERT INTO projects_fts (rowid, title, description) "
+            "VALUES (new.id, {0}, {1}); END".format(title, description)
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS projects_fts_update "
+            "AFTER UPDATE OF title, description ON projects BEGIN "
+            "DELETE FROM projects_fts WHERE rowid = old.id; "
+            "INSERT INTO projects_fts (rowid, title, description) "
+            "VALUES (new.id, {0}, {1}); END".format(title, description)
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN "
+            "DELETE FROM projects_fts WHERE rowid = old.id; END"
+        ))
+    return True
+
+
+def _setup_postgresql(engine) -> bool:
+    # Генерируемая колонка обновляется самой БД при INSERT/UPDATE
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('russian', translate(coalesce(title, ''), 'Ёё', 'Ее')), 'A') || "
+            "setweight(to_tsvector('russian', translate(coalesce(description, ''), 'Ёё', 'Ее')), 'B')"
+            ") STORED"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_projects_search_vector "
+            "ON projects USING GIN (search_vector)"
+        ))
+    return True
+
+
+def apply_search(query, q: str, ranked: bool = False):
+    """Добавить к запросу по Project фильтр полнотекстового поиска
+
+    При ranked=True результаты сортируются по релевантности.
+    """
+    tokens = tokenize(q)
+    dialect = query.session.get_bind().dialect.name
+
+    if not fts_enabled or not tokens:
+        return _apply_ilike(query, q)
+
+    if dialect == "sqlite":
+        match = " ".join('"{0}"*'.format(stem(token)) for token in tokens)
+        # Вес заголовка выше, чем описания; bm25 - чем меньше, тем релевантнее
+        fts = text(
+            "SELECT rowid AS id, bm25(projects_fts, 10.0, 1.0) AS rank "
+            "FROM projects_fts WHERE projects_fts MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, rank=Float).subquery("fts")
+        query = query.join(fts, fts.c.id == Project.id)
+        if ranked:
+            query = query.order_by(fts.c.rank)
+        return query
+
+    # PostgreSQL: стемминг выполняет словарь russian, :* - поиск по префиксу
+    tsquery = func.to_tsquery(
+        "russian", " & ".join("{0}:*".format(token) for token in tokens)
+    )
+    vector = literal_column("projects.search_vector")
+    query = query.filter(vector.op("@@")(tsquery))
+    if ranked:
+        query = query.order_by(desc(func.ts_rank(vector, tsquery)))
+    return query
+
+
+def _apply_ilike(query, q: str):
+    search_term = f"%{q}%"
+    return query.filter(or_(
+        Project.title.ilike(search_term),
+        Project.description.ilike(search_term)
+    ))
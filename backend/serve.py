@@ -0,0 +1,214 @@
+"""Production-запуск API в нескольких процессах
+
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+Мастер-процесс открывает сокет, импортирует main (SERVE_PRELOAD) и
+порождает воркеры через fork. Воркеры ничего не делят, кроме сокета:
+у каждого свой event loop, пул соединений (engine создаётся в воркере
+после fork, см. database.py), кэш в памяти и метрики. Соединения
+распределяет ядро ОС между воркерами, принимающими из общего сокета.
+
+Сигналы мастеру:
+    SIGTERM, SIGINT - остановка: воркеры перестают принимать соединения
+                      и дообрабатывают запросы (до SERVE_GRACEFUL_TIMEOUT);
+    SIGHUP          - поочерёдный перезапуск воркеров без остановки
+                      приёма соединений (с SERVE_PRELOAD=false - с новым кодом).
+Завершившийся воркер перезапускается; воркер, упавший при старте (раньше
+MIN_UPTIME секунд), - с задержкой, удваивающейся до RESPAWN_MAX_DELAY.
+
+Схему БД перед запуском обновляет `python migrate.py`. На платформах
+без fork запускается uvicorn с тем же числом воркеров.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+from config import env_bool
+
+load_dotenv()
+
+# Число воркеров по умолчанию - число ядер
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or 0) or os.cpu_count() or 1
+# Импортировать приложение в мастере до fork (воркеры стартуют быстрее и делят память)
+PRELOAD = env_bool("SERVE_PRELOAD", "true")
+# Сколько секунд воркер дообрабатывает запросы при остановке
+GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+BACKLOG = 2048
+APP = "main:app"
+POLL_INTERVAL = 0.5
+# Воркер, проработавший меньше стольких секунд, считается упавшим при старте
+MIN_UPTIME = 5
+# Задержка перезапуска после первого падения при старте; удваивается до максимума
+RESPAWN_DELAY = 0.5
+RESPAWN_MAX_DELAY = 30
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    """Порождение, перезапуск и остановка воркеров"""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children = {}  # pid -> время запуска
+        self.signals = []
+        # Падения при старте подряд и сроки отложенных перезапусков
+        self.crashes = 0
+        self.respawn_at = []
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return pid
+        code = 0
+        try:
+            # Остановку воркера обрабатывает uvicorn (SIGTERM, SIGINT)
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            uvicorn.Server(self.config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Ошибка воркера %s", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(self, pids: list):
+        """Мягко остановить воркеры и дождаться их завершения
+
+        SIGTERM отправляется один раз: повторный сигнал uvicorn считает
+        требованием немедленной остановки.
+        """
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                # Воркер уже завершился
+                pass
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        for pid in pids:
+            try:
+                while not os.waitpid(pid, os.WNOHANG)[0]:
+                    if time.monotonic() > deadline:
+                        logger.warning("Воркер %s не остановился, SIGKILL", pid)
+                        try:
+                            os.kill(pid, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                        os.waitpid(pid, 0)
+                        break
+                    time.sleep(0.05)
+            except ChildProcessError:
+                pass
+            self.children.pop(pid, None)
+
+    def reload(self):
+        """Заменить воркеры по одному: новый запускается до остановки старого"""
+        for pid in list(self.children):
+            self.spawn()
+            self.stop([pid])
+        logger.info("Воркеры перезапущены: %s", sorted(self.children))
+
+    def respawn_delay(self) -> float:
+        """Задержка перезапуска после self.crashes падений при старте подряд"""
+        if not self.crashes:
+            return 0.0
+        return min(RESPAWN_MAX_DELAY, RESPAWN_DELAY * 2 ** (self.crashes - 1))
+
+    def reap(self):
+        """Перезапустить завершившиеся воркеры (упавшие при старте - с задержкой)"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.children.pop(pid, None)
+            now = time.monotonic()
+            if started is not None and now - started < MIN_UPTIME:
+                self.crashes += 1
+            else:
+                self.crashes = 0
+            delay = self.respawn_delay()
+            logger.warning(
+                "Воркер %s завершился (код %s), перезапуск через %.1f с",
+                pid, os.waitstatus_to_exitcode(status), delay,
+            )
+            self.respawn_at.append(now + delay)
+
+    def respawn(self):
+        """Запустить воркеры, срок перезапуска которых наступил"""
+        now = time.monotonic()
+        due = [at for at in self.respawn_at if at <= now]
+        self.respawn_at = [at for at in self.respawn_at if at > now]
+        for _ in due:
+            self.spawn()
+
+    def run(self):
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda signum, frame: self.signals.append(signum))
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("Запущено воркеров: %s (мастер %s)", self.workers, os.getpid())
+
+        while True:
+            time.sleep(POLL_INTERVAL)
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.reload()
+                else:
+                    logger.info("Остановка воркеров")
+                    self.stop(list(self.children))
+                    return
+            self.reap()
+            self.respawn()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        uvicorn.run(APP, host=args.host, port=args.port, workers=args.workers,
+                    log_level=args.log_level, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+        return
+
+    app = APP
+    if PRELOAD:
+        import main as api
+        app = api.app
+    config = uvicorn.Config(
+        app, host=args.host, port=args.port, log_level=args.log_level,
+        backlog=BACKLOG, timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
+    sock = bind_socket(args.host, args.port)
+    Master(config, sock, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
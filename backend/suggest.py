@@ -0,0 +1,241 @@
+"""Подсказки поиска (typeahead) из префиксного индекса в памяти
+
+GET /api/suggest отвечает без обращения к БД: каждый воркер держит
+в памяти отсортированный массив слов названий проектов (и отдельно
+названий категорий) и для каждого слова - id проектов с этим словом.
+Слова нормализуются как в полнотекстовом поиске (search_index.normalize:
+нижний регистр, ё -> е), поэтому "Ёлка", "елка" и "ЕЛ" находят одно и то же.
+
+Каждое слово запроса - префикс слова названия. Слова с префиксом -
+непрерывный диапазон массива (двоичный поиск); кандидаты берутся из
+диапазона самого редкого префикса, остальные слова запроса проверяются
+по названию кандидата. Просмотр ограничен MAX_SCAN кандидатами, поэтому
+время ответа не зависит от размера индекса (редкое сочетание частых
+слов может не найтись, пока запрос не уточнён).
+Порядок: сначала слова, совпадающие с префиксом целиком, затем по
+алфавиту; внутри слова - более новые проекты.
+
+Индекс строится фоновой задачей при старте воркера (до готовности
+эндпоинт отвечает 503). Обработчики создания и изменения проектов и
+категорий обновляют индекс своего воркера сразу; изменения, сделанные
+другими воркерами, подхватываются раз в SUGGEST_REFRESH_INTERVAL секунд
+(новые строки по id) и при полной перестройке раз в SUGGEST_REBUILD_INTERVAL.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+import background
+from database import SessionLocal
+from models import Project, Category
+from search_index import TOKEN_RE, normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Период подгрузки новых проектов и категорий в секундах (0 - индекс не обновляется)
+REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "30"))
+# Период полной перестройки в секундах (подхватывает переименования на других воркерах; 0 - отключено)
+REBUILD_INTERVAL = float(os.getenv("SUGGEST_REBUILD_INTERVAL", "3600"))
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_SCAN = 1000
+LOAD_CHUNK_SIZE = 10000
+RETRY_INTERVAL = 5
+
+
+def _tokens(value: str) -> list:
+    # Повторяющиеся слова хранятся одной строкой
+    return [sys.intern(token) for token in dict.fromkeys(tokenize(value))]
+
+
+class PrefixIndex:
+    """Отсортированный массив слов и id записей с каждым словом"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.words = []      # уникальные слова по алфавиту
+        self.postings = {}   # слово -> id по возрастанию
+        self.texts = {}      # id -> исходный текст
+        # Наибольший id, прочитанный из БД (записи других воркеров - после него)
+        self.loaded_id = 0
+
+    def build(self, rows):
+        """Заменить содержимое индекса строками (id, текст), упорядоченными по id"""
+        postings, texts = {}, {}
+        for row_id, value in rows:
+            texts[row_id] = value
+            for token in _tokens(value):
+                postings.setdefault(token, []).append(row_id)
+        words = sorted(postings)
+        with self.lock:
+            self.words, self.postings, self.texts = words, postings, texts
+            self.loaded_id = max(texts, default=0)
+
+    def add(self, row_id: int, value: str):
+        with self.lock:
+            self._remove(row_id)
+            self.texts[row_id] = value
+            for token in _tokens(value):
+                ids = self.postings.get(token)
+                if ids is None:
+                    bisect.insort(self.words, token)
+                    self.postings[token] = [row_id]
+                elif not ids or ids[-1] < row_id:
+                    ids.append(row_id)
+                else:
+                    bisect.insort(ids, row_id)
+
+    def _remove(self, row_id: int):
+        value = self.texts.pop(row_id, None)
+        if value is None:
+            return
+        for token in _tokens(value):
+            ids = self.postings[token]
+            del ids[bisect.bisect_left(ids, row_id)]
+            if not ids:
+                del self.postings[token]
+                del self.words[bisect.bisect_left(self.words, token)]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """[(id, текст)] записей, у которых каждое слово запроса - префикс слова текста"""
+        prefixes = list(dict.fromkeys(tokenize(query)))
+        if not prefixes:
+            return []
+        results, seen, scanned = [], set(), 0
+        with self.lock:
+            # Кандидаты - из диапазона слов самого редкого префикса
+            if len(prefixes) == 1:
+                prefix = prefixes[0]
+                lo, hi = self._range(prefix)
+            else:
+                _, lo, hi, prefix = min(
+                    (self._count(*bounds), *bounds, prefix)
+                    for prefix in prefixes for bounds in [self._range(prefix)]
+                )
+            others = [other for other in prefixes if other != prefix]
+            for position in range(lo, hi):
+                word = self.words[position]
+                for row_id in reversed(self.postings[word]):
+                    scanned += 1
+                    if row_id not in seen:
+                        seen.add(row_id)
+                        value = self.texts[row_id]
+                        if not others or _matches(value, others):
+                            results.append((row_id, value))
+                            if len(results) >= limit:
+                                return results
+                    if scanned >= MAX_SCAN:
+                        return results
+        return results
+
+    def _range(self, prefix: str) -> tuple:
+        """Границы слов с префиксом prefix в отсортированном массиве"""
+        lo = bisect.bisect_left(self.words, prefix)
+        return lo, bisect.bisect_left(self.words, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+
+    def _count(self, lo: int, hi: int) -> int:
+        """Число id в диапазоне слов (с отсечкой на MAX_SCAN: дальше точность не нужна)"""
+        count = 0
+        for position in range(lo, min(hi, lo + MAX_SCAN)):
+            count += len(self.postings[self.words[position]])
+            if count >= MAX_SCAN:
+                break
+        return count
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+
+def _matches(value: str, prefixes: list) -> bool:
+    folded = normalize(value)
+    # Быстрая проверка подстрокой отсекает почти всех кандидатов без разбиения на слова
+    if not all(prefix in folded for prefix in prefixes):
+        return False
+    tokens = TOKEN_RE.findall(folded)
+    return all(any(token.startswith(prefix) for token in tokens) for prefix in prefixes)
+
+
+projects = PrefixIndex()
+categories = PrefixIndex()
+# Индексы построены (до этого эндпоинт отвечает 503)
+ready = False
+_rebuilt_at = 0.0
+
+
+def _read(db, model, column, after_id: int = 0):
+    """Строки (id, текст) модели с id больше after_id, пачками по первичному ключу"""
+    while True:
+        chunk = db.query(model.id, column).filter(model.id > after_id).order_by(
+            model.id
+        ).limit(LOAD_CHUNK_SIZE).all()
+        yield from chunk
+        if len(chunk) < LOAD_CHUNK_SIZE:
+            return
+        after_id = chunk[-1][0]
+
+
+def load():
+    """Полностью перестроить индексы из БД"""
+    global ready
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        projects.build(_read(db, Project, Project.title))
+        categories.build(_read(db, Category, Category.name))
+    finally:
+        db.close()
+    ready = True
+    logger.info(
+        "Индекс подсказок построен: %s проектов, %s категорий за %.1f с",
+        len(projects), len(categories), time.perf_counter() - started,
+    )
+
+
+def refresh():
+    """Добавить проекты и категории, созданные после построения индекса"""
+    db = SessionLocal()
+    try:
+        for index, model, column in ((projects, Project, Project.title), (categories, Category, Category.name)):
+            for row_id, value in list(_read(db, model, column, index.loaded_id)):
+                index.add(row_id, value)
+                index.loaded_id = row_id
+    finally:
+        db.close()
+
+
+def suggest(query: str, limit: int = DEFAULT_LIMIT) -> dict:
+    return {
+        "query": query,
+        "projects": [{"id": row_id, "title": title} for row_id, title in projects.search(query, limit)],
+        "categories": [{"id": row_id, "name": name} for row_id, name in categories.search(query, limit)],
+    }
+
+
+def _update():
+    global _rebuilt_at
+    if REBUILD_INTERVAL > 0 and time.monotonic() - _rebuilt_at >= REBUILD_INTERVAL:
+        load()
+        _rebuilt_at = time.monotonic()
+    else:
+        refresh()
+
+
+async def refresh_periodically():
+    """Фоновая задача: построение индекса при старте и его обновление"""
+    global _rebuilt_at
+    # Неудачное построение при старте повторяется
+    while not ready:
+        try:
+            await run_in_threadpool(load)
+            _rebuilt_at = time.monotonic()
+        except Exception:
+            logger.exception("Ошибка построения индекса подсказок")
+            await asyncio.sleep(RETRY_INTERVAL)
+    await background.run_periodically(REFRESH_INTERVAL, _update, "Ошибка обновления индекса подсказок")
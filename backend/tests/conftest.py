@@ -0,0 +1,115 @@
+"""Общие фикстуры: временная база и клиент API
+
+DATABASE_URL задаётся до импорта приложения (database.py читает его при
+импорте). Без DATABASE_URL тесты работают на временном файле SQLite;
+с DATABASE_URL - на указанной базе (например, sqlite+aiosqlite:///...
+для асинхронного режима).
+"""
+
+import asyncio
+import contextlib
+import itertools
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+TMP_DIR = tempfile.mkdtemp(prefix="crowdfunding-tests-")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(TMP_DIR, "test.db"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import metrics  # noqa: E402
+import migrate  # noqa: E402
+
+_sequence = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrate.upgrade()
+
+
+@pytest.fixture
+def client():
+    # Без with: lifespan и фоновые задачи не запускаются
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def run_async():
+    """Выполнить корутину в новом цикле событий
+
+    Пулы асинхронных соединений привязаны к циклу, поэтому в конце они
+    закрываются (как при остановке приложения) и следующий цикл создаёт свои.
+    """
+    async def run_and_dispose(coroutine):
+        try:
+            return await coroutine
+        finally:
+            await database.dispose_engines()
+
+    return lambda coroutine: asyncio.run(run_and_dispose(coroutine))
+
+
+@pytest.fixture
+def query_budget(monkeypatch):
+    """Бюджет SQL-запросов: with query_budget(3): client.get(...)
+
+    SQL-запросы считают обработчики install_query_metrics в статистике
+    HTTP-запроса; фикстура забирает её по завершении запроса и проверяет,
+    что каждый запрос внутри with уложился в бюджет (защита от N+1).
+    """
+    finished = []
+    observe = metrics.registry.observe
+
+    def record(method, route, status, duration, stats, response_bytes):
+        finished.append(stats)
+        observe(method, route, status, duration, stats, response_bytes)
+
+    monkeypatch.setattr(metrics.registry, "observe", record)
+
+    @contextlib.contextmanager
+    def budget(max_queries: int):
+        finished.clear()
+        yield
+        assert finished, "внутри with не было HTTP-запросов"
+        for stats in finished:
+            assert stats.queries <= max_queries, (
+                f"{stats.route}: {stats.queries} SQL-запрос(ов), бюджет {max_queries}"
+            )
+
+    return budget
+
+
+@pytest.fixture
+def make_user(client):
+    def make():
+        number = next(_sequence)
+        response = client.post("/api/users", json={
+            "username": f"tester{number}", "email": f"tester{number}@example.com",
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
+
+
+@pytest.fixture
+def make_project(client, make_user):
+    def make(**fields):
+        payload = {
+            "title": f"Тестовый проект {next(_sequence)}",
+            "description": "Описание тестового проекта для проверки API",
+            "goal": 10000,
+            "deadline": (datetime.utcnow() + timedelta(days=30)).isoformat(),
+            "category": "Тесты",
+            "creator_id": make_user()["id"],
+            **fields,
+        }
+        response = client.post("/api/projects", json=payload)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
@@ -0,0 +1,83 @@
+"""Пакетный импорт: CSV с переводами строк в полях, разбор по частям, рейтинг"""
+
+from datetime import datetime
+
+import pytest
+
+import ranking
+from bulk_investments import RecordParser, iter_file_records
+from database import SessionLocal
+from models import Project
+
+CSV = 'amount,project_id,user_id,message\n5,{p},{u},"Спасибо,\nудачи!"\n7,{p},{u},"Он сказал ""да"""\n'
+
+
+def test_csv_parser_keeps_quoted_newlines_across_chunks():
+    data = CSV.format(p=1, u=2).encode()
+    parser = RecordParser("csv")
+    items = []
+    # По одному байту: разрывы внутри записи, кавычек и символов UTF-8
+    for i in range(len(data)):
+        items.extend(parser.feed(data[i:i + 1]))
+    items.extend(parser.finish())
+
+    assert items == [
+        (1, {"amount": "5", "project_id": "1", "user_id": "2", "message": "Спасибо,\nудачи!"}),
+        (2, {"amount": "7", "project_id": "1", "user_id": "2", "message": 'Он сказал "да"'}),
+    ]
+
+
+def test_ndjson_parser_numbers_records():
+    parser = RecordParser("ndjson")
+    items = parser.feed(b'{"amount": 1}\n\n[1]\n{"amo') + parser.feed(b'unt": 2}') + parser.finish()
+
+    assert items == [(1, {"amount": 1}), (2, "Ожидался JSON-объект"), (3, {"amount": 2})]
+
+
+def test_file_records_keep_quoted_newlines(tmp_path):
+    path = tmp_path / "pledges.csv"
+    path.write_text(CSV.format(p=1, u=2), encoding="utf-8")
+
+    records = list(iter_file_records(str(path), "csv"))
+
+    assert [row for row, _ in records] == [1, 2]
+    assert records[0][1]["message"] == "Спасибо,\nудачи!"
+
+
+def test_batch_endpoint_imports_multiline_message(client, make_project):
+    project = make_project()
+
+    response = client.post(
+        "/api/investments/batch",
+        content=CSV.format(p=project["id"], u=project["creator_id"]).encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"total": 2, "imported": 2, "failed": 0, "errors": []}
+    investments = client.get(f"/api/investments/project/{project['id']}").json()
+    assert sorted(investment["message"] for investment in investments) == ['Он сказал "да"', "Спасибо,\nудачи!"]
+
+
+def test_batch_score_matches_ranking(client, make_user, make_project):
+    user = make_user()
+    single, batch = make_project(), make_project()
+    for _ in range(3):
+        client.post("/api/investments", json={"amount": 250, "project_id": single["id"], "user_id": user["id"]})
+    response = client.post("/api/investments/batch", json=[
+        {"amount": 250, "project_id": batch["id"], "user_id": user["id"]}
+    ] * 3)
+    assert response.json()["imported"] == 3
+
+    db = SessionLocal()
+    try:
+        rows = {row.id: row for row in db.query(Project).filter(Project.id.in_([single["id"], batch["id"]]))}
+    finally:
+        db.close()
+    now = datetime.utcnow()
+    expected = ranking.hot_score(
+        ranking.decay(rows[batch["id"]].pledge_velocity, rows[batch["id"]].velocity_updated_at, now),
+        rows[batch["id"]].raised_amount, rows[batch["id"]].goal, rows[batch["id"]].deadline, now,
+    )
+    assert rows[batch["id"]].hot_score == pytest.approx(expected, abs=ranking.SCORE_EPSILON)
+    assert rows[batch["id"]].hot_score == pytest.approx(rows[single["id"]].hot_score, abs=ranking.SCORE_EPSILON)
@@ -0,0 +1,96 @@
+"""Кэш ответов: LRU, TTL, инвалидация по тегам и путь через маршрут"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+import main
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        cache.CacheBackend()
+
+
+def test_redis_without_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(RuntimeError, match="pip install redis"):
+        cache.RedisCache("redis://localhost:6379/0")
+
+
+def test_lru_eviction():
+    backend = cache.LocalCache(max_entries=2)
+    backend.set("a", 1, 60)
+    backend.set("b", 2, 60)
+    # Чтение делает "a" последней использованной - вытесняется "b"
+    assert backend.get("a") == 1
+    backend.set("c", 3, 60)
+
+    assert backend.get("b") is None
+    assert (backend.get("a"), backend.get("c")) == (1, 3)
+    assert backend.stats()["evictions"] == 1
+    assert backend.stats()["size"] == 2
+
+
+def test_ttl_expiry(clock):
+    backend = cache.LocalCache()
+    backend.set("key", "value", 10)
+    clock.now += 9.9
+    assert backend.get("key") == "value"
+    clock.now += 0.2
+    assert backend.get("key") is None
+    assert backend.stats()["size"] == 0
+
+
+def test_tag_invalidation():
+    responses = cache.ResponseCache(cache.LocalCache(), ttls={"project": 30})
+    loads = []
+
+    def loader(value):
+        def load():
+            loads.append(value)
+            return value
+        return load
+
+    assert responses.get_or_load("project", (1,), ["project:1"], loader("old")) == "old"
+    assert responses.get_or_load("project", (1,), ["project:1"], loader("new")) == "old"
+    responses.invalidate("project:2")
+    assert responses.get_or_load("project", (1,), ["project:1"], loader("new")) == "old"
+    responses.invalidate("project:1")
+    assert responses.get_or_load("project", (1,), ["project:1"], loader("new")) == "new"
+    assert loads == ["old", "new"]
+
+
+def test_cached_route(client, make_project, monkeypatch):
+    monkeypatch.setattr(main.response_cache, "backend", cache.LocalCache())
+    monkeypatch.setattr(main.response_cache, "ttls", {"project": 30})
+    project = make_project()
+
+    first = client.get(f"/api/projects/{project['id']}")
+    second = client.get(f"/api/projects/{project['id']}")
+    assert first.json() == second.json()
+    assert client.get("/api/cache/stats").json()["hits"] == 1
+
+    # Изменение проекта инвалидирует его запись
+    client.put(f"/api/projects/{project['id']}", json={"title": "Новое название проекта"})
+    response = client.get(f"/api/projects/{project['id']}")
+    assert response.json()["title"] == "Новое название проекта"
+    stats = client.get("/api/cache/stats").json()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
@@ -0,0 +1,55 @@
+"""Параллельные инвестиции в один проект не теряют обновлений счётчиков"""
+
+import asyncio
+
+import httpx
+
+import main
+from database import SessionLocal
+from models import Investment, Project, PlatformStatistics
+
+PLEDGES = 200
+
+
+async def _pledge_all(pledges: list) -> list:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post("/api/investments", json=pledge) for pledge in pledges
+        ))
+
+
+def _platform_raised(db) -> float:
+    return db.query(PlatformStatistics.total_raised).scalar() or 0.0
+
+
+def test_concurrent_pledges_are_all_counted(client, run_async, make_user, make_project):
+    project = make_project()
+    # Строку статистики платформы создаёт первое чтение
+    client.get("/api/statistics")
+    users = [make_user() for _ in range(10)]
+    pledges = [
+        {"amount": 10 + i % 7, "project_id": project["id"], "user_id": users[i % len(users)]["id"]}
+        for i in range(PLEDGES)
+    ]
+    db = SessionLocal()
+    try:
+        raised_before = _platform_raised(db)
+    finally:
+        db.close()
+
+    responses = run_async(_pledge_all(pledges))
+
+    assert [response.status_code for response in responses] == [200] * PLEDGES
+    total = sum(pledge["amount"] for pledge in pledges)
+    db = SessionLocal()
+    try:
+        raised, backers = db.query(Project.raised_amount, Project.backers_count).filter(
+            Project.id == project["id"]
+        ).one()
+        assert raised == total
+        assert backers == PLEDGES
+        assert db.query(Investment).filter(Investment.project_id == project["id"]).count() == PLEDGES
+        assert _platform_raised(db) - raised_before == total
+    finally:
+        db.close()
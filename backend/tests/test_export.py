@@ -0,0 +1,52 @@
+"""Выгрузка: фильтр по времени со смещением и закрытие во время чтения пачки"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import export
+
+
+def _project_ids(client, **params) -> list:
+    response = client.get("/api/export/projects", params={"format": "ndjson", **params})
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in map(json.loads, response.text.splitlines())]
+
+
+def test_created_range_with_utc_offset(client, make_project):
+    project_id = make_project()["id"]
+    now = datetime.now(timezone.utc)
+    # Без приведения к UTC часы со смещением сравнились бы как есть и дали бы обратный результат
+    later = (now + timedelta(hours=1)).astimezone(timezone(timedelta(hours=-5)))
+    earlier = (now - timedelta(minutes=5)).astimezone(timezone(timedelta(hours=5)))
+
+    assert project_id in _project_ids(client, project_id=project_id, **{"from": earlier.isoformat()})
+    assert _project_ids(client, project_id=project_id, **{"from": later.isoformat()}) == []
+
+
+def test_close_waits_for_running_chunk():
+    started, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+    def chunks():
+        try:
+            yield b"header\n"
+            started.set()
+            release.wait(5)
+            yield b"rows\n"
+        finally:
+            finished.set()
+
+    iterator = export.ClosingIterator(chunks())
+    assert next(iterator) == b"header\n"
+    reader = threading.Thread(target=lambda: next(iterator))
+    reader.start()
+    started.wait(5)
+
+    closer = threading.Thread(target=iterator.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+    reader.join(5)
+
+    assert finished.is_set()
+    assert list(iterator) == []
@@ -0,0 +1,88 @@
+"""fast_json выдаёт те же байты, что response_model и JSONResponse FastAPI"""
+
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import fast_json
+from database import SessionLocal
+from models import Project
+from schemas import CategoryResponse, ProjectResponse, SearchResponse, SuggestResponse
+
+# Строки с особыми символами и числа, которые сериализуются по-разному
+EDGE_PROJECTS = [
+    {"title": 'Кавычки "двойные" и \\ обратный слеш', "goal": 1000, "raised_amount": 0.1 + 0.2},
+    {"title": "Управляющие\tсимволы\nи\x01юникод ё 🚀  ", "goal": 1234567.891, "raised_amount": 1e-3},
+    {"title": "</script> & <b>html</b>", "goal": 99.5, "raised_amount": 0},
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    # Без orjson fast_json сериализует модулем json
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def edge_projects(make_project):
+    template = make_project()
+    db = SessionLocal()
+    try:
+        projects = [
+            Project(
+                description=fields["title"] * 3, image_url=None if i % 2 else "https://example.com/a.png",
+                backers_count=10 ** 9 + i, deadline=datetime.utcnow() + timedelta(days=10, microseconds=123457),
+                category_id=template["category_id"], creator_id=template["creator_id"], **fields,
+            )
+            for i, fields in enumerate(EDGE_PROJECTS)
+        ]
+        db.add_all(projects)
+        db.commit()
+        return [template["id"]] + [project.id for project in projects]
+    finally:
+        db.close()
+
+
+def stock_body(run_async, response_model, content) -> bytes:
+    field = create_response_field(name="response", type_=response_model)
+    return JSONResponse(run_async(serialize_response(field=field, response_content=content))).body
+
+
+def load_projects(ids: list) -> tuple:
+    """ORM-объекты проектов и строки по PROJECT_COLUMNS"""
+    db = SessionLocal()
+    try:
+        orm_rows = db.query(Project).filter(Project.id.in_(ids)).order_by(Project.id).all()
+        rows = db.query(*fast_json.PROJECT_COLUMNS).filter(Project.id.in_(ids)).order_by(Project.id).all()
+    finally:
+        db.close()
+    return orm_rows, rows
+
+
+def test_project_list(run_async, encoder, edge_projects):
+    orm_rows, rows = load_projects(edge_projects)
+    assert fast_json.project_list_response(rows).body == stock_body(run_async, List[ProjectResponse], orm_rows)
+
+
+def test_search(run_async, encoder, edge_projects):
+    orm_rows, rows = load_projects(edge_projects)
+    body = fast_json.dumps({"query": "юникод ё", "results": fast_json.project_rows(rows), "total": len(rows)})
+    stock = stock_body(run_async, SearchResponse, SearchResponse(query="юникод ё", results=orm_rows, total=len(rows)))
+    assert body == stock
+
+
+def test_nested_lists(run_async, encoder):
+    content = {
+        "query": "эко 🚀",
+        "projects": [{"id": 1, "title": "Экология \"города\""}, {"id": 2, "title": "</script>"}],
+        "categories": [{"id": 3, "name": "Наука\tи техника"}],
+    }
+    assert fast_json.dumps(content) == stock_body(run_async, SuggestResponse, content)
+    categories = content["categories"] + [{"id": 4, "name": "ё"}]
+    assert fast_json.dumps(categories) == stock_body(run_async, List[CategoryResponse], categories)
@@ -0,0 +1,56 @@
+"""Поток сбора средств: инвестиция между подпиской и снимком не теряется и не дублируется"""
+
+import asyncio
+
+import httpx
+
+import events
+import main
+
+
+async def _collect(subscription, snapshot: dict, queued: list) -> str:
+    for event in queued:
+        subscription.queue.put_nowait(event)
+    subscription.queue.put_nowait(events.EVICTED)
+    return "".join([chunk async for chunk in events.stream(subscription, snapshot)])
+
+
+def test_stream_skips_events_already_in_snapshot():
+    async def run():
+        subscription = events.hub.subscribe(1)
+        snapshot = {"project_id": 1, "raised_amount": 30.0, "backers_count": 3, "goal": 100, "status": "active"}
+        return await _collect(subscription, snapshot, [
+            {"type": "funding", "project_id": 1, "amount": 10.0, "backers": 1, "backers_count": 3},
+            {"type": "funding", "project_id": 1, "amount": 15.0, "backers": 1, "backers_count": 4},
+            {"type": "status", "project_id": 1, "status": "funded"},
+        ])
+
+    body = asyncio.run(run())
+
+    assert body.count("event: funding") == 1
+    assert '"backers_count": 4' in body
+    assert "event: status" in body
+
+
+def test_pledge_event_carries_project_sequence(run_async, make_user, make_project):
+    project = make_project()
+    user = make_user()
+
+    async def run():
+        subscription = events.hub.subscribe(project["id"])
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                for amount in (10, 20):
+                    response = await client.post("/api/investments", json={
+                        "amount": amount, "project_id": project["id"], "user_id": user["id"],
+                    })
+                    assert response.status_code == 200, response.text
+            return [await asyncio.wait_for(subscription.queue.get(), 5) for _ in range(2)]
+        finally:
+            events.hub.unsubscribe(subscription)
+
+    first, second = run_async(run())
+
+    assert (first["amount"], first["backers_count"]) == (10, 1)
+    assert (second["amount"], second["backers_count"]) == (20, 2)
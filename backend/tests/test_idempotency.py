@@ -0,0 +1,51 @@
+"""Idempotency-Key: параллельные дубликаты выполняют обработчик один раз"""
+
+import asyncio
+
+import httpx
+
+import main
+import ranking
+
+DUPLICATES = 10
+
+
+async def _post_duplicates(path: str, payload: dict, key: str) -> list:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post(path, json=payload, headers={"Idempotency-Key": key}) for _ in range(DUPLICATES)
+        ))
+
+
+def test_concurrent_duplicates_run_once(client, run_async, make_user, make_project, monkeypatch):
+    project = make_project()
+    pledge = {"amount": 100, "project_id": project["id"], "user_id": make_user()["id"]}
+    calls = []
+    pledge_effect = ranking.pledge_effect
+
+    def counted(*args):
+        calls.append(args)
+        return pledge_effect(*args)
+
+    monkeypatch.setattr(ranking, "pledge_effect", counted)
+
+    responses = run_async(_post_duplicates("/api/investments", pledge, f"concurrent-{project['id']}"))
+
+    assert [response.status_code for response in responses] == [200] * DUPLICATES
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == DUPLICATES - 1
+    assert len(calls) == 1
+    assert len(client.get(f"/api/investments/project/{project['id']}").json()) == 1
+
+
+def test_failed_request_releases_key(client, make_user, make_project):
+    project = make_project(deadline="2000-01-01T00:00:00")
+    pledge = {"amount": 100, "project_id": project["id"], "user_id": make_user()["id"]}
+    headers = {"Idempotency-Key": f"failed-{project['id']}"}
+
+    assert client.post("/api/investments", json=pledge, headers=headers).status_code == 400
+    assert client.post("/api/investments", json=pledge, headers=headers).status_code == 400
+    other = {**pledge, "project_id": make_project()["id"]}
+    # Ключ после ошибки свободен: его можно использовать с другим телом
+    assert client.post("/api/investments", json=other, headers=headers).status_code == 200
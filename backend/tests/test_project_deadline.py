@@ -0,0 +1,29 @@
+"""Дедлайн с часовым поясом приводится к UTC без зоны"""
+
+from datetime import datetime
+
+
+def test_create_with_utc_offset(make_project):
+    project = make_project(deadline="2030-01-01T00:00:00Z")
+
+    assert project["deadline"] == "2030-01-01T00:00:00"
+    assert project["status"] == "active"
+
+
+def test_update_with_local_offset(client, make_project):
+    project = make_project()
+
+    response = client.put(f"/api/projects/{project['id']}", json={"deadline": "2030-06-01T03:00:00+03:00"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["deadline"] == "2030-06-01T00:00:00"
+
+
+def test_past_deadline_with_offset_finishes_campaign(client, make_project):
+    project = make_project()
+
+    response = client.put(f"/api/projects/{project['id']}", json={"deadline": "2020-01-01T00:00:00-05:00"})
+
+    assert response.status_code == 200, response.text
+    assert datetime.fromisoformat(response.json()["deadline"]) == datetime(2020, 1, 1, 5)
+    assert response.json()["status"] == "expired"
@@ -0,0 +1,125 @@
+"""Число SQL-запросов маршрутов (защита от N+1 и ленивых загрузок)"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+import suggest
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    # Без кэша ответов каждый запрос доходит до БД
+    monkeypatch.setattr(main.response_cache, "ttls", {})
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"sort_by": "new"},
+    {"sort_by": "ending"},
+    {"sort_by": "rating"},
+    {"category": "Технологии"},
+    {"category": "Технологии", "sort_by": "ending"},
+    {"category": "Технологии", "sort_by": "rating"},
+    {"search": "проверка"},
+    {"status": "expired", "sort_by": "ending"},
+    {"category": "Технологии", "status": "funded"},
+    {"status": "all"},
+])
+def test_project_list(client, make_project, query_budget, params):
+    make_project(category="Технологии")
+    with query_budget(1):
+        assert client.get("/api/projects", params=params).status_code == 200
+
+
+def test_project_list_pages(client, make_project, query_budget):
+    make_project()
+    make_project()
+    cursor = client.get("/api/projects", params={"limit": 1}).headers["x-next-cursor"]
+    etag = client.get("/api/projects").headers["etag"]
+    with query_budget(1):
+        assert client.get("/api/projects", params={"cursor": cursor, "limit": 1}).status_code == 200
+        assert client.get("/api/projects", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_project_reads(client, make_project, query_budget):
+    project = make_project()
+    etag = client.get(f"/api/projects/{project['id']}").headers["etag"]
+    with query_budget(1):
+        assert client.get(f"/api/projects/{project['id']}").status_code == 200
+        assert client.get(f"/api/projects/{project['id']}", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(f"/api/investments/project/{project['id']}").status_code == 200
+        assert client.get(f"/api/reviews/project/{project['id']}").status_code == 200
+        assert client.get(
+            f"/api/projects/{project['id']}/funding-history", params={"granularity": "hour"}
+        ).status_code == 200
+        assert client.get(f"/api/users/{project['creator_id']}").status_code == 200
+    with query_budget(2):
+        assert client.get(f"/api/projects/{project['id']}/details").status_code == 200
+
+
+def test_project_writes(client, make_user, make_project, query_budget):
+    user = make_user()
+    project = make_project()
+    with query_budget(8):
+        response = client.post("/api/projects", json={
+            "title": "Проект для бюджета запросов", "description": "Проект, созданный во время проверки",
+            "goal": 100, "deadline": (datetime.utcnow() + timedelta(days=30)).isoformat(),
+            "category": "Экология", "creator_id": user["id"],
+        })
+        assert response.status_code == 200
+    with query_budget(3):
+        response = client.put(f"/api/projects/{project['id']}", json={"title": "Проект (обновлено)"})
+        assert response.status_code == 200
+
+
+def test_investment_writes(client, make_user, make_project, query_budget):
+    project = make_project()
+    investment = {"amount": 100, "project_id": project["id"], "user_id": make_user()["id"]}
+    # Изменение проекта, счётчиков, итогов по часам и дням и чтение backers_count
+    with query_budget(8):
+        assert client.post("/api/investments", json=investment).status_code == 200
+    with query_budget(9):
+        assert client.post("/api/investments/batch", json=[investment, investment]).status_code == 200
+    # С Idempotency-Key: чтение ключа, его вставка и запись ответа; повтор - одно чтение
+    headers = {"Idempotency-Key": f"budget-{project['id']}"}
+    with query_budget(11):
+        assert client.post("/api/investments", json=investment, headers=headers).status_code == 200
+    with query_budget(1):
+        assert client.post("/api/investments", json=investment, headers=headers).status_code == 200
+
+
+def test_other_writes(client, make_user, make_project, query_budget):
+    user = make_user()
+    project = make_project()
+    review = {"text": "Отличный проект, жду!", "rating": 5, "project_id": project["id"], "user_id": user["id"]}
+    with query_budget(4):
+        assert client.post("/api/reviews", json=review).status_code == 200
+        assert client.post("/api/reviews", json=review).status_code == 200
+        assert client.post("/api/users", json={
+            "username": f"budget{project['id']}", "email": f"budget{project['id']}@example.com",
+        }).status_code == 200
+        assert client.post("/api/categories", params={"name": f"Бюджет {project['id']}"}).status_code == 200
+
+
+def test_catalog_reads(client, make_project, query_budget):
+    project = make_project(category="Технологии")
+    suggest.load()
+    with query_budget(1):
+        assert client.get("/api/categories").status_code == 200
+        assert client.get("/api/search", params={"q": "проект"}).status_code == 200
+        assert client.get("/api/featured-projects").status_code == 200
+        assert client.get("/api/export/investments", params={"project_id": project["id"]}).status_code == 200
+        assert client.get("/api/export/investments", params={
+            "from": datetime.utcnow().isoformat(), "format": "ndjson",
+        }).status_code == 200
+        assert client.get("/api/export/projects", params={
+            "category": "Технологии", "gzip": "true",
+        }).status_code == 200
+    # Первое обращение создаёт счётчики сверкой
+    client.get("/api/statistics")
+    with query_budget(2):
+        assert client.get("/api/statistics").status_code == 200
+    with query_budget(0):
+        assert client.get("/api/suggest", params={"q": "тест про"}).status_code == 200
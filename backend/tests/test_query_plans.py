@@ -0,0 +1,148 @@
+"""Планы SQL-запросов обработчиков: таблицы читаются по индексам
+
+Каждый маршрут выполняется на мигрированной схеме, его SQL
+перехватывается и проверяется через EXPLAIN: полное сканирование
+допустимо только для небольших справочников.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import database
+import main
+import suggest
+
+# Таблицы, которые допустимо читать целиком (небольшие справочники)
+ALLOWED_FULL_SCANS = {"categories", "platform_statistics", "category_statistics"}
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)(?!.*(USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY|VIRTUAL TABLE))")
+
+
+def explain(statement: str, parameters) -> tuple:
+    """План запроса и список таблиц, читаемых полным сканированием"""
+    connection = database.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if database.engine.dialect.name == "postgresql":
+            # На маленьких таблицах PostgreSQL выбирает Seq Scan всегда -
+            # с enable_seqscan=off он останется только там, где нет индекса
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = plan if isinstance(plan, list) else json.loads(plan)
+            lines, scans = [], []
+            _walk_pg_plan(plan[0]["Plan"], lines, scans)
+        else:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            lines = [row[-1] for row in cursor.fetchall()]
+            scans = [m.group(1) for m in map(SQLITE_FULL_SCAN.match, lines) if m]
+        connection.rollback()
+    finally:
+        connection.close()
+    return lines, [table for table in scans if table not in ALLOWED_FULL_SCANS]
+
+
+def _walk_pg_plan(node: dict, lines: list, scans: list):
+    lines.append(f"{node['Node Type']} {node.get('Relation Name', '')}".strip())
+    if node["Node Type"] == "Seq Scan":
+        scans.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        _walk_pg_plan(child, lines, scans)
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """SQL, выполненный на основной БД (без кэша ответов)"""
+    monkeypatch.setattr(main.response_cache, "ttls", {})
+    engines = [database.get_engine()]
+    if database.ASYNC_MODE:
+        engines.append(database.get_async_engine().sync_engine)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters, executemany))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def test_routes_use_indexes(client, make_user, make_project, captured):
+    user = make_user()
+    project = make_project(title="Проверка планов запросов", category="Технологии")
+    make_project(title="Второй проект планов", category="Технологии")
+    client.get("/api/statistics")
+    # Индекс подсказок строит фоновая задача lifespan, здесь - вызов напрямую
+    suggest.load()
+    cursor = client.get("/api/projects", params={"limit": 1}).headers.get("x-next-cursor")
+    list_etag = client.get("/api/projects").headers["etag"]
+    project_etag = client.get(f"/api/projects/{project['id']}").headers["etag"]
+
+    deadline = (datetime.utcnow() + timedelta(days=30)).isoformat()
+    investment = {"amount": 100, "project_id": project["id"], "user_id": user["id"]}
+    review = {"text": "Отличный проект, жду!", "rating": 5, "project_id": project["id"], "user_id": user["id"]}
+    routes = [
+        ("GET", "/api/projects", {}),
+        ("GET", "/api/projects", {"params": {"sort_by": "new"}}),
+        ("GET", "/api/projects", {"params": {"sort_by": "ending"}}),
+        ("GET", "/api/projects", {"params": {"cursor": cursor, "limit": 1}}),
+        ("GET", "/api/projects", {"params": {"category": "Технологии"}}),
+        ("GET", "/api/projects", {"params": {"category": "Технологии", "sort_by": "ending"}}),
+        ("GET", "/api/projects", {"params": {"sort_by": "rating"}}),
+        ("GET", "/api/projects", {"params": {"category": "Технологии", "sort_by": "rating"}}),
+        ("GET", "/api/projects", {"params": {"search": "проверка"}}),
+        ("GET", "/api/projects", {"params": {"status": "expired", "sort_by": "ending"}}),
+        ("GET", "/api/projects", {"params": {"category": "Технологии", "status": "funded"}}),
+        ("GET", "/api/projects", {"params": {"status": "all"}}),
+        ("GET", f"/api/projects/{project['id']}", {}),
+        ("GET", "/api/projects", {"headers": {"If-None-Match": list_etag}}),
+        ("GET", f"/api/projects/{project['id']}", {"headers": {"If-None-Match": project_etag}}),
+        ("POST", "/api/projects", {"json": {
+            "title": "Третий проект планов", "description": "Проект, созданный во время проверки",
+            "goal": 100, "deadline": deadline, "category": "Экология", "creator_id": user["id"],
+        }}),
+        ("PUT", f"/api/projects/{project['id']}", {"json": {"title": "Проверка планов (обновлено)"}}),
+        ("POST", "/api/investments", {"json": investment}),
+        ("POST", "/api/investments/batch", {"json": [investment, investment]}),
+        ("POST", "/api/investments", {"json": investment, "headers": {"Idempotency-Key": "plans"}}),
+        ("POST", "/api/investments", {"json": investment, "headers": {"Idempotency-Key": "plans"}}),
+        ("GET", f"/api/investments/project/{project['id']}", {}),
+        ("GET", f"/api/projects/{project['id']}/funding-history", {"params": {"granularity": "hour"}}),
+        ("POST", "/api/reviews", {"json": review}),
+        ("POST", "/api/reviews", {"json": review}),
+        ("GET", f"/api/reviews/project/{project['id']}", {}),
+        ("GET", f"/api/projects/{project['id']}/details", {}),
+        ("GET", f"/api/users/{user['id']}", {}),
+        ("GET", "/api/categories", {}),
+        ("POST", "/api/categories", {"params": {"name": "Планы"}}),
+        ("GET", "/api/search", {"params": {"q": "проверка"}}),
+        ("GET", "/api/export/investments", {"params": {"project_id": project["id"]}}),
+        ("GET", "/api/export/investments", {"params": {"from": deadline, "format": "ndjson"}}),
+        ("GET", "/api/export/projects", {"params": {"category": "Технологии", "gzip": "true"}}),
+        ("GET", "/api/statistics", {}),
+        ("GET", "/api/featured-projects", {}),
+    ]
+
+    failures = []
+    for method, path, kwargs in routes:
+        captured.clear()
+        response = client.request(method, path, **kwargs)
+        label = " ".join(str(part) for part in (method, path, kwargs.get("params")) if part)
+        assert response.status_code < 400, f"{label}: HTTP {response.status_code} {response.text}"
+        for statement, parameters, executemany in captured:
+            if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                continue
+            lines, scans = explain(statement, parameters)
+            if scans:
+                failures.append("\n".join([
+                    f"{label}: полное сканирование {', '.join(scans)}",
+                    "  " + " ".join(statement.split()),
+                    *(f"    {line}" for line in lines),
+                ]))
+    assert not failures, "\n".join(failures)
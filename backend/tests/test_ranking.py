@@ -0,0 +1,47 @@
+"""Периодический пересчёт рейтингов: только изменившиеся строки, один воркер"""
+
+from datetime import datetime, timedelta
+
+import background
+import ranking
+from database import SessionLocal
+from models import JobLease, Project
+
+
+def _project(project_id: int) -> Project:
+    db = SessionLocal()
+    try:
+        return db.get(Project, project_id)
+    finally:
+        db.close()
+
+
+def test_refresh_writes_only_moved_scores(make_project):
+    project_id = make_project()["id"]
+    db = SessionLocal()
+    db.query(Project).filter(Project.id == project_id).update({Project.hot_score: 5.0})
+    db.commit()
+    db.close()
+
+    assert ranking.refresh_once() >= 1
+    stored = _project(project_id)
+    expected = ranking.hot_score(0.0, stored.raised_amount, stored.goal, stored.deadline, datetime.utcnow())
+    assert abs(stored.hot_score - expected) <= ranking.SCORE_EPSILON
+    # Рейтинги уже актуальны - записывать нечего
+    assert ranking.refresh_once() == 0
+
+
+def test_lease_is_held_by_one_worker(monkeypatch):
+    assert background.acquire_lease("test", 60)
+    assert background.acquire_lease("test", 60)
+
+    monkeypatch.setattr(background, "_owner", lambda: "other-worker")
+    assert not background.acquire_lease("test", 60)
+
+    db = SessionLocal()
+    db.query(JobLease).filter(JobLease.name == "test").update(
+        {JobLease.expires_at: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+    db.close()
+    assert background.acquire_lease("test", 60)
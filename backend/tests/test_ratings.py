@@ -0,0 +1,86 @@
+"""Сверка агрегатов оценок: исправляет расхождения и не теряет параллельные отзывы"""
+
+import asyncio
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+import main
+import ratings
+from database import SessionLocal
+from models import Project
+
+REVIEWS = 50
+RECONCILES = 10
+
+
+def _reconcile_once() -> int:
+    db = SessionLocal()
+    try:
+        return ratings.reconcile(db)
+    finally:
+        db.close()
+
+
+def _aggregates(project_id: int) -> tuple:
+    db = SessionLocal()
+    try:
+        return db.query(
+            Project.rating_count, Project.rating_sum, Project.rating_average,
+            *ratings.HISTOGRAM_COLUMNS.values(),
+        ).filter(Project.id == project_id).one()
+    finally:
+        db.close()
+
+
+def _review(project_id: int, user_id: int, rating: int) -> dict:
+    return {"text": "Отзыв для проверки оценок", "rating": rating, "project_id": project_id, "user_id": user_id}
+
+
+def test_reconcile_fixes_counts_and_average(client, make_user, make_project):
+    project_id = make_project()["id"]
+    user_id = make_user()["id"]
+    for rating in (5, 4, 4):
+        assert client.post("/api/reviews", json=_review(project_id, user_id, rating)).status_code == 200
+    expected = _aggregates(project_id)
+    _reconcile_once()
+
+    db = SessionLocal()
+    db.query(Project).filter(Project.id == project_id).update({
+        Project.rating_count: 7, Project.rating_4: 0, Project.rating_average: 1.5,
+    })
+    db.commit()
+    db.close()
+    assert _reconcile_once() == 1
+    assert _aggregates(project_id) == expected
+
+    # Расходится только средняя
+    db = SessionLocal()
+    db.query(Project).filter(Project.id == project_id).update({Project.rating_average: 2.0})
+    db.commit()
+    db.close()
+    assert _reconcile_once() == 1
+    assert _aggregates(project_id) == expected
+    assert _reconcile_once() == 0
+
+
+def test_reconcile_keeps_concurrent_reviews(run_async, make_user, make_project):
+    project_id = make_project()["id"]
+    user_id = make_user()["id"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post("/api/reviews", json=_review(project_id, user_id, 1 + i % 5)) for i in range(REVIEWS)),
+                *(run_in_threadpool(_reconcile_once) for _ in range(RECONCILES)),
+            )
+
+    results = run_async(run())
+
+    assert [response.status_code for response in results[:REVIEWS]] == [200] * REVIEWS
+    count, total, average, *histogram = _aggregates(project_id)
+    assert count == REVIEWS
+    assert histogram == [REVIEWS // 5] * 5
+    assert total == sum(1 + i % 5 for i in range(REVIEWS))
+    assert average == total / count
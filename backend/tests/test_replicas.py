@@ -0,0 +1,179 @@
+"""Чтение с реплик: по кругу, свои записи из основной БД, недоступная реплика
+
+Реплики - копии файла основной БД SQLite, снятые в начале теста:
+записи после копирования в них не попадают, как в отстающую реплику.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+import platform_stats
+import replicas
+from cache import response_cache
+
+SCHEME, PRIMARY_PATH = database.DATABASE_URL.split(":///", 1)
+
+
+def _path(url: str) -> str:
+    return url.split(":///", 1)[1]
+
+
+def _copy_primary(urls: list):
+    primary = sqlite3.connect(PRIMARY_PATH)
+    for url in urls:
+        copy = sqlite3.connect(_path(url))
+        primary.backup(copy)
+        copy.close()
+    primary.close()
+
+
+@pytest.fixture
+def use_replicas(monkeypatch):
+    def use(urls: list):
+        monkeypatch.setattr(replicas, "REPLICA_URLS", urls)
+        database._engines.pop("replicas", None)
+    yield use
+    # Закрыть пулы реплик (остальные engine создадутся заново)
+    asyncio.run(database.dispose_engines())
+
+
+@pytest.fixture
+def replica_urls(tmp_path, use_replicas):
+    urls = [f"{SCHEME}:///{tmp_path / name}" for name in ("replica1.db", "replica2.db")]
+    _copy_primary(urls)
+    use_replicas(urls)
+    return urls
+
+
+@pytest.fixture
+def pinning_client():
+    # Middleware добавляется в main только если реплики заданы при импорте
+    return TestClient(replicas.PrimaryPinMiddleware(main.app))
+
+
+def test_reads_go_to_replicas_in_turn(client, replica_urls, make_user):
+    user = make_user()
+    # Пользователь записан после копирования - его нет ни в одной реплике
+    assert client.get(f"/api/users/{user['id']}").status_code == 404
+
+    connection = sqlite3.connect(_path(replica_urls[1]))
+    connection.execute(
+        "INSERT INTO users (id, username, email, created_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+        (user["id"], user["username"], user["email"]),
+    )
+    connection.commit()
+    connection.close()
+
+    statuses = [client.get(f"/api/users/{user['id']}").status_code for _ in range(4)]
+    assert sorted(statuses) == [200, 200, 404, 404]
+    assert statuses[0] != statuses[1]
+
+
+def test_client_reads_own_write_from_primary(replica_urls, pinning_client, client, make_user):
+    response = pinning_client.post("/api/projects", json={
+        "title": "Проект после копирования",
+        "description": "Есть только в основной БД, реплики отстают",
+        "goal": 1000,
+        "deadline": "2030-01-01T00:00:00",
+        "category": "Тесты",
+        "creator_id": make_user()["id"],
+    })
+    assert response.status_code == 200, response.text
+    assert replicas.PIN_COOKIE in pinning_client.cookies
+
+    project_id = response.json()["id"]
+    assert pinning_client.get(f"/api/projects/{project_id}").status_code == 200
+    assert client.get(f"/api/projects/{project_id}").status_code == 404
+
+
+def test_pinned_client_does_not_get_replica_response_from_cache(
+    monkeypatch, make_project, replica_urls, pinning_client, client,
+):
+    monkeypatch.setitem(response_cache.ttls, "project", 60)
+    project = make_project(title="Название до изменения")
+    # Реплики получают проект, но не последующее изменение
+    _copy_primary(replica_urls)
+
+    response = pinning_client.put(f"/api/projects/{project['id']}", json={"title": "Новое название"})
+    assert response.status_code == 200, response.text
+
+    # Другой клиент читает отстающую реплику, ответ попадает в кэш
+    assert client.get(f"/api/projects/{project['id']}").json()["title"] == "Название до изменения"
+    assert pinning_client.get(f"/api/projects/{project['id']}").json()["title"] == "Новое название"
+
+
+def _exported_ids(client, project_id: int) -> list:
+    response = client.get("/api/export/projects", params={"format": "ndjson", "project_id": project_id})
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in map(json.loads, response.text.splitlines())]
+
+
+def test_export_reads_from_replica_unless_pinned(replica_urls, client, make_project):
+    project_id = make_project()["id"]
+
+    assert _exported_ids(client, project_id) == []
+    client.cookies.set(replicas.PIN_COOKIE, str(time.time() + 60))
+    assert _exported_ids(client, project_id) == [project_id]
+
+
+def test_unavailable_replica_falls_back_to_primary(tmp_path, use_replicas, client, make_user, make_project):
+    missing = tmp_path / "missing" / "replica.db"
+    use_replicas([f"{SCHEME}:///{missing}"])
+    user = make_user()
+
+    assert client.get(f"/api/users/{user['id']}").status_code == 200
+    replica = database.get_replica_set().replicas[0]
+    assert not replica.healthy
+    assert not os.path.exists(missing)
+
+    # Выгрузка после повторной попытки тоже читает из основной БД
+    replica.failed_until = 0.0
+    project_id = make_project()["id"]
+    assert _exported_ids(client, project_id) == [project_id]
+    assert not replica.healthy
+
+
+def test_statistics_on_replica_without_counters(tmp_path, use_replicas, client, make_project, monkeypatch):
+    make_project()
+    platform_stats.reconcile_once()
+    expected = client.get("/api/statistics").json()
+    url = f"{SCHEME}:///{tmp_path / 'replica.db'}"
+    _copy_primary([url])
+    # Реплика ещё не получила строку счётчиков платформы
+    replica = sqlite3.connect(_path(url))
+    replica.execute("DELETE FROM platform_statistics")
+    replica.commit()
+    replica.close()
+    use_replicas([url])
+    monkeypatch.setattr(response_cache, "ttls", {})
+
+    def no_primary():
+        raise AssertionError("чтение статистики открыло сессию основной БД")
+
+    monkeypatch.setattr(platform_stats, "SessionLocal", no_primary)
+
+    assert client.get("/api/statistics").json() == expected
+
+
+def test_cors_allows_credentials_for_frontend_origin(client):
+    origin = main.FRONTEND_ORIGINS[0]
+
+    preflight = client.options("/api/investments", headers={
+        "Origin": origin, "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "content-type",
+    })
+    response = client.get("/api/categories", headers={"Origin": origin})
+
+    for result in (preflight, response):
+        assert result.headers["access-control-allow-origin"] == origin
+        assert result.headers["access-control-allow-credentials"] == "true"
+    other = client.get("/api/categories", headers={"Origin": "http://evil.example"})
+    assert "access-control-allow-origin" not in other.headers
@@ -0,0 +1,110 @@
+"""Итоги инвестиций: пересчёт без потерь и диапазон истории со смещением"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+
+import main
+import rollups
+from database import SessionLocal
+from models import Investment, InvestmentRollup
+
+PLEDGES = 60
+BACKFILLS = 10
+
+
+def _backfill_once() -> int:
+    db = SessionLocal()
+    try:
+        return rollups.backfill(db)
+    finally:
+        db.close()
+
+
+def _series(project_id: int) -> list:
+    db = SessionLocal()
+    try:
+        return [tuple(row) for row in db.query(
+            InvestmentRollup.granularity, InvestmentRollup.bucket_start,
+            InvestmentRollup.amount, InvestmentRollup.count, InvestmentRollup.backers,
+        ).filter(InvestmentRollup.project_id == project_id).order_by(
+            InvestmentRollup.granularity, InvestmentRollup.bucket_start
+        )]
+    finally:
+        db.close()
+
+
+def _pledge(project_id: int, user_id: int, amount: float) -> dict:
+    return {"amount": amount, "project_id": project_id, "user_id": user_id}
+
+
+def test_backfill_repairs_drift(client, make_user, make_project):
+    project_id = make_project()["id"]
+    for amount in (10, 20):
+        assert client.post("/api/investments", json=_pledge(project_id, make_user()["id"], amount)).status_code == 200
+    _backfill_once()
+    expected = _series(project_id)
+
+    db = SessionLocal()
+    db.query(InvestmentRollup).filter(
+        InvestmentRollup.project_id == project_id, InvestmentRollup.granularity == "hour"
+    ).update({InvestmentRollup.amount: 1000.0, InvestmentRollup.backers: 7})
+    db.query(InvestmentRollup).filter(
+        InvestmentRollup.project_id == project_id, InvestmentRollup.granularity == "day"
+    ).delete()
+    db.add(InvestmentRollup(
+        project_id=project_id, granularity="day", bucket_start=datetime(2020, 1, 1),
+        amount=5.0, count=1, backers=1,
+    ))
+    db.commit()
+    db.close()
+
+    assert _backfill_once() == 3
+    assert _series(project_id) == expected
+    assert _backfill_once() == 0
+
+
+def test_backfill_keeps_concurrent_pledges(run_async, make_user, make_project):
+    project_id = make_project()["id"]
+    users = [make_user()["id"] for _ in range(3)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post("/api/investments", json=_pledge(project_id, users[i % 3], 5))
+                  for i in range(PLEDGES)),
+                *(run_in_threadpool(_backfill_once) for _ in range(BACKFILLS)),
+            )
+
+    results = run_async(run())
+
+    assert [response.status_code for response in results[:PLEDGES]] == [200] * PLEDGES
+    db = SessionLocal()
+    try:
+        for granularity in rollups.GRANULARITIES:
+            amount, count = db.query(func.sum(InvestmentRollup.amount), func.sum(InvestmentRollup.count)).filter(
+                InvestmentRollup.project_id == project_id, InvestmentRollup.granularity == granularity
+            ).one()
+            assert (amount, count) == (5.0 * PLEDGES, PLEDGES)
+        assert db.query(Investment).filter(Investment.project_id == project_id).count() == PLEDGES
+    finally:
+        db.close()
+
+
+def test_history_range_with_utc_offset(client, make_user, make_project):
+    project_id = make_project()["id"]
+    assert client.post("/api/investments", json=_pledge(project_id, make_user()["id"], 10)).status_code == 200
+    now = datetime.now(timezone.utc)
+
+    response = client.get(f"/api/projects/{project_id}/funding-history", params={
+        "granularity": "hour",
+        "start": (now - timedelta(minutes=1)).astimezone(timezone(timedelta(hours=3))).isoformat(),
+        "end": (now + timedelta(hours=1)).astimezone(timezone(timedelta(hours=-5))).isoformat(),
+    })
+
+    assert response.status_code == 200, response.text
+    assert [bucket["count"] for bucket in response.json()["buckets"]] == [1]
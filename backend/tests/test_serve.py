@@ -0,0 +1,57 @@
+"""Мастер serve.py: остановка завершившихся воркеров и задержка перезапуска"""
+
+import os
+import time
+
+import serve
+
+
+def _exited_statuses(pids: list):
+    pending = list(pids)
+
+    def waitpid(pid, options):
+        if not pending:
+            raise ChildProcessError
+        return pending.pop(0), 256
+    return waitpid
+
+
+def test_stop_ignores_already_reaped_worker():
+    pid = os.fork()
+    if not pid:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    master = serve.Master(None, None, 1)
+    master.children[pid] = time.monotonic()
+
+    master.stop([pid])
+
+    assert not master.children
+
+
+def test_workers_crashing_on_start_are_respawned_with_backoff(monkeypatch):
+    master = serve.Master(None, None, 1)
+    delays = []
+    for pid in range(100, 106):
+        master.children[pid] = time.monotonic()
+        monkeypatch.setattr(os, "waitpid", _exited_statuses([pid]))
+        master.reap()
+        delays.append(master.respawn_at.pop() - time.monotonic())
+
+    expected = [serve.RESPAWN_DELAY * 2 ** n for n in range(6)]
+    assert [round(delay, 1) for delay in delays] == [round(min(d, serve.RESPAWN_MAX_DELAY), 1) for d in expected]
+
+
+def test_worker_that_ran_long_enough_is_respawned_at_once(monkeypatch):
+    master = serve.Master(None, None, 1)
+    master.crashes = 3
+    master.children[200] = time.monotonic() - serve.MIN_UPTIME - 1
+    monkeypatch.setattr(os, "waitpid", _exited_statuses([200]))
+    spawned = []
+    monkeypatch.setattr(master, "spawn", lambda: spawned.append(True))
+
+    master.reap()
+    master.respawn()
+
+    assert master.crashes == 0
+    assert spawned == [True] and not master.respawn_at
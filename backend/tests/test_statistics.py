@@ -0,0 +1,73 @@
+"""Сверка статистики: исправляет расхождения и не теряет параллельные инвестиции"""
+
+import asyncio
+
+import httpx
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+
+import main
+import platform_stats
+from database import SessionLocal
+from models import CategoryStatistics, PlatformStatistics, Project
+
+PLEDGES = 100
+RECONCILES = 20
+
+
+def _counters(db) -> tuple:
+    platform = db.query(PlatformStatistics.total_raised, PlatformStatistics.total_backers).one()
+    actual = db.query(func.sum(Project.raised_amount), func.sum(Project.backers_count)).one()
+    return tuple(platform), tuple(actual)
+
+
+async def _pledge_and_reconcile(pledges: list) -> list:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(
+            *(client.post("/api/investments", json=pledge) for pledge in pledges),
+            *(run_in_threadpool(platform_stats.reconcile_once) for _ in range(RECONCILES)),
+        )
+
+
+def test_reconcile_fixes_drift(client, make_project):
+    project = make_project()
+    client.get("/api/statistics")
+    db = SessionLocal()
+    try:
+        platform_stats._bump_platform(db, total_raised=123.0, total_backers=-1)
+        db.query(CategoryStatistics).filter(
+            CategoryStatistics.category_id == project["category_id"]
+        ).update({CategoryStatistics.total_projects: 0})
+        db.commit()
+
+        platform_stats.reconcile(db)
+
+        stored, actual = _counters(db)
+        assert stored == actual
+        projects = db.query(func.count(Project.id)).filter(
+            Project.category_id == project["category_id"]
+        ).scalar()
+        assert db.get(CategoryStatistics, project["category_id"]).total_projects == projects
+    finally:
+        db.close()
+
+
+def test_reconcile_keeps_concurrent_pledges(client, run_async, make_user, make_project):
+    project = make_project()
+    client.get("/api/statistics")
+    users = [make_user() for _ in range(5)]
+    pledges = [
+        {"amount": 5 + i % 3, "project_id": project["id"], "user_id": users[i % len(users)]["id"]}
+        for i in range(PLEDGES)
+    ]
+
+    results = run_async(_pledge_and_reconcile(pledges))
+
+    assert [response.status_code for response in results[:PLEDGES]] == [200] * PLEDGES
+    db = SessionLocal()
+    try:
+        stored, actual = _counters(db)
+        assert stored == actual
+    finally:
+        db.close()
@@ -4,10 +4,13 @@
 // =================================================================================
 
 // API Configuration
+// Запросы отправляются с cookie (credentials: 'include'): после записи API
+// ставит cookie, и чтения клиента идут в основную БД, а не в отстающую реплику
 const API_BASE_URL = 'http://localhost:8000/api';
 
 // Global state
 let currentProjects = [];
+let fundingStream = null;
 let currentUser = null;
 let state = {
     projects: [],
@@ -25,7 +28,7 @@ const API = {
     async get(endpoint, params = {}) {
         const query = new URLSearchParams(params);
         const url = `${API_BASE_URL}${endpoint}${query.toString() ? '?' + query : ''}`;
-        const response = await fetch(url);
+        const response = await fetch(url, { credentials: 'include' });
         if (!response.ok) throw new Error(`HTTP ${response.status}`);
         return response.json();
     },
@@ -33,6 +36,7 @@ const API = {
     async post(endpoint, data) {
         const response = await fetch(`${API_BASE_URL}${endpoint}`, {
             method: 'POST',
+            credentials: 'include',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(data)
         });
@@ -43,6 +47,7 @@ const API = {
     async put(endpoint, data) {
         const response = await fetch(`${API_BASE_URL}${endpoint}`, {
             method: 'PUT',
+            credentials: 'include',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(data)
         });
@@ -184,6 +189,15 @@ async function searchProjects(query, params = {}) {
     }
 }
 
+async function getSuggestions(query) {
+    try {
+        return await API.get('/suggest', { q: query, limit: 8 });
+    } catch (error) {
+        // 503, пока индекс подсказок загружается - просто без подсказок
+        return { projects: [], categories: [] };
+    }
+}
+
 async function getStatistics() {
     try {
         return await API.get('/statistics');
@@ -302,12 +316,12 @@ function openProjectModal(projectId) {
                 <p>${project.description}</p>
                 
                 <div style="margin:20px 0;">
-                    <p><strong>Прогресс: ${progress}%</strong></p>
+                    <p><strong id="modal-progress">Прогресс: ${progress}%</strong></p>
                     <div style="background:#e0e0e0;height:10px;border-radius:5px;overflow:hidden;">
-                        <div style="background:#ea580c;height:100%;width:${Math.min(progress, 100)}%;"></div>
+                        <div id="modal-progress-bar" style="background:#ea580c;height:100%;width:${Math.min(progress, 100)}%;"></div>
                     </div>
-                    <p>Собрано: ${formatCurrency(project.raised_amount)} / ${formatCurrency(project.goal)}</p>
-                    <p>Поддерживающих: ${project.backers_count}</p>
+                    <p id="modal-raised">Собрано: ${formatCurrency(project.raised_amount)} / ${formatCurrency(project.goal)}</p>
+                    <p id="modal-backers">Поддерживающих: ${project.backers_count}</p>
                 </div>
 
                 <div style="margin-bottom:20px;">
@@ -326,6 +340,43 @@ function openProjectModal(projectId) {
         `;
 
         document.body.appendChild(modal);
+        subscribeToFunding(project);
+    });
+}
+
+// Живое обновление прогресса открытого проекта (Server-Sent Events)
+function subscribeToFunding(project) {
+    if (fundingStream) fundingStream.close();
+    if (!window.EventSource) return;
+
+    let raised = project.raised_amount;
+    let backers = project.backers_count;
+    const render = () => {
+        const progress = Math.round((raised / project.goal) * 100);
+        const modal = document.getElementById('project-modal');
+        if (!modal) {
+            fundingStream.close();
+            fundingStream = null;
+            return;
+        }
+        document.getElementById('modal-progress').textContent = `Прогресс: ${progress}%`;
+        document.getElementById('modal-progress-bar').style.width = `${Math.min(progress, 100)}%`;
+        document.getElementById('modal-raised').textContent = `Собрано: ${formatCurrency(raised)} / ${formatCurrency(project.goal)}`;
+        document.getElementById('modal-backers').textContent = `Поддерживающих: ${backers}`;
+    };
+
+    fundingStream = new EventSource(`${API_BASE_URL}/projects/${project.id}/stream`);
+    fundingStream.addEventListener('snapshot', event => {
+        const data = JSON.parse(event.data);
+        raised = data.raised_amount;
+        backers = data.backers_count;
+        render();
+    });
+    fundingStream.addEventListener('funding', event => {
+        const data = JSON.parse(event.data);
+        raised += data.amount;
+        backers += data.backers;
+        render();
     });
 }
 
@@ -418,6 +469,26 @@ document.addEventListener('DOMContentLoaded', async function() {
         searchInput.addEventListener('keypress', function(e) {
             if (e.key === 'Enter') performSearch();
         });
+
+        // Подсказки при вводе (запрос после паузы в наборе)
+        let suggestTimer = null;
+        searchInput.addEventListener('input', function() {
+            clearTimeout(suggestTimer);
+            const query = searchInput.value.trim();
+            if (!query) return;
+            suggestTimer = setTimeout(async () => {
+                const suggestions = await getSuggestions(query);
+                const list = document.getElementById('search-suggestions');
+                if (!list || searchInput.value.trim() !== query) return;
+                list.innerHTML = '';
+                [...suggestions.projects.map(p => p.title), ...suggestions.categories.map(c => c.name)]
+                    .forEach(value => {
+                        const option = document.createElement('option');
+                        option.value = value;
+                        list.appendChild(option);
+                    });
+            }, 150);
+        });
     }
 
     // Обработчик изменения сортировки